@@ -0,0 +1,87 @@
+"""MegaOS boot entry resolution: bcdedit output parsing (per display
+language), the full bcdedit switch with and without the entry cache, and
+the native firmware variable path."""
+
+from __future__ import annotations
+
+import shutil
+import tempfile
+from typing import List
+
+from benchmarks.fakes import BCDEDIT_LOCALES, bcdedit_runner, load_bcdedit_sample, make_efivar_store
+from benchmarks.harness import Case
+from modules import bcdedit
+from modules import switch_to_megaos
+from modules.startup_cache import StartupCache
+
+
+def _parse(locale: str):
+    def setup():
+        text = load_bcdedit_sample(locale)
+
+        def op():
+            entry = bcdedit.find_entry(bcdedit.parse_firmware_entries(text), switch_to_megaos.MEGAOS_BOOT_DESCRIPTION)
+            if entry is None:
+                raise RuntimeError("MegaOS entry not found")
+
+        return op
+    return setup
+
+
+def _change_boot_order_case(locale: str, cached: bool) -> Case:
+    tmp: List[str] = []
+
+    def setup():
+        cache = None
+        if cached:
+            tmp.append(tempfile.mkdtemp(prefix="openh3c-bench-"))
+            cache = StartupCache(f"{tmp[0]}/startup_cache.json")
+        switch_to_megaos.set_entry_cache(cache)
+        runner = bcdedit_runner(locale)
+
+        def op():
+            code = switch_to_megaos.change_boot_order(runner=runner)
+            if code != switch_to_megaos.EXIT_SUCCESS:
+                raise RuntimeError(f"change_boot_order returned {code}")
+
+        return op
+
+    def teardown():
+        switch_to_megaos.set_entry_cache(None)
+        while tmp:
+            shutil.rmtree(tmp.pop(), ignore_errors=True)
+
+    return Case("boot.change_boot_order_bcdedit", setup, {"locale": locale, "entry_cache": cached},
+                iterations=500, teardown=teardown)
+
+
+def _native_case(entries: int) -> Case:
+    tmp: List[str] = []
+
+    def setup():
+        tmp.append(tempfile.mkdtemp(prefix="openh3c-bench-efivars-"))
+        store = make_efivar_store(tmp[0], entries)
+        switch_to_megaos.set_entry_cache(None)
+
+        def op():
+            if switch_to_megaos.locate_native_entry(store) is None:
+                raise RuntimeError("MegaOS entry not found")
+
+        return op
+
+    def teardown():
+        while tmp:
+            shutil.rmtree(tmp.pop(), ignore_errors=True)
+
+    return Case("boot.locate_native_entry", setup, {"boot_entries": entries}, iterations=300, teardown=teardown)
+
+
+def cases() -> List[Case]:
+    result = [Case("boot.parse_bcdedit", _parse(locale), {"locale": locale}, iterations=2000)
+              for locale in BCDEDIT_LOCALES]
+    for cached in (False, True):
+        result.append(_change_boot_order_case("en-US", cached))
+    result.append(_change_boot_order_case("zh-CN", False))
+    for entries in (8, 64):
+        result.append(_native_case(entries))
+    return result
@@ -0,0 +1,127 @@
+"""Hotkey path benchmarks.
+
+- hotkeys.dispatch: raw F20/F21 events through HotkeyDispatcher.
+- hotkeys.unbound_keystroke: what an ordinary keystroke (one we don't
+  bind) costs in Python, per down or up event:
+  - path=scan_code_table: KeyboardHook's table lookup, which is all the
+    Windows WH_KEYBOARD_LL callback does for such a key,
+  - path=keyboard_hook_key: the `keyboard` library's per-event handling
+    with one hook_key() per hotkey (the previous setup): pressed-key
+    bookkeeping, the queue to its processing thread, and the per-key
+    handler lookup there.
+  Neither includes the ctypes callback itself, which both pay, nor
+  `keyboard`'s KeyboardEvent construction and name lookup on Windows,
+  which only the old path paid.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from benchmarks.fakes import FakeKeyboardSource, FakeTypist
+from benchmarks.harness import Case, Skip
+from modules.hotkey_dispatch import HotkeyDispatcher
+from modules.keyboard_hook import KeyboardHook
+
+PRESSES = 5_000
+KEYSTROKES = 10_000
+# Set 1 scan codes, as Windows reports them.
+_BOUND_SCAN_CODES = {"f20": 0x6B, "f21": 0x6C}
+
+
+def _dispatch(presses: int):
+    def setup():
+        events = list(FakeKeyboardSource().events(presses))
+        dispatcher: HotkeyDispatcher
+
+        def deliver(event):
+            # Run the "action" right away, as a free UI thread would.
+            dispatcher.action_started(event)
+            dispatcher.action_finished(event)
+
+        def op():
+            nonlocal dispatcher
+            dispatcher = HotkeyDispatcher(deliver)
+            dispatcher.bind("f20", coalesce=True)
+            dispatcher.bind("f21", coalesce=False)
+            for key, is_down, t in events:
+                dispatcher.on_key_event(key, is_down, t)
+            if dispatcher.stats.delivered != presses:
+                raise RuntimeError(f"delivered {dispatcher.stats.delivered} of {presses} presses")
+
+        return op
+    return setup
+
+
+def _unbound_table(keystrokes: int):
+    def setup():
+        events = FakeTypist().events(keystrokes)
+        delivered = []
+        hook = KeyboardHook(_BOUND_SCAN_CODES, lambda key, is_down: delivered.append(key),
+                            resolve=lambda key: [_BOUND_SCAN_CODES[key]])
+        handle = hook.handle_scan_code
+
+        def op():
+            for scan_code, is_down in events:
+                handle(scan_code, is_down)
+            if delivered:
+                raise RuntimeError("an unbound key was delivered")
+
+        return op
+    return setup
+
+
+def _unbound_keyboard_library(keystrokes: int):
+    def setup():
+        try:
+            import keyboard
+        except Exception as e:
+            raise Skip(f"keyboard not importable: {e}")
+        import collections
+
+        # A listener set up like keyboard's init(), minus the OS hook, so
+        # that nothing is installed on this machine.
+        listener = keyboard._KeyboardListener()
+        listener.active_modifiers = set()
+        listener.blocking_hooks = []
+        listener.blocking_keys = collections.defaultdict(list)
+        listener.nonblocking_keys = collections.defaultdict(list)
+        listener.blocking_hotkeys = collections.defaultdict(list)
+        listener.nonblocking_hotkeys = collections.defaultdict(list)
+        listener.filtered_modifiers = collections.Counter()
+        listener.is_replaying = False
+        listener.modifier_states = {}
+        # Left/right shift, ctrl, alt, win; avoids the OS name tables.
+        keyboard._modifier_scan_codes.update((0x2A, 0x36, 0x1D, 0x38, 0x5B, 0x5C))
+
+        delivered = []
+        for key, scan_code in _BOUND_SCAN_CODES.items():
+            listener.nonblocking_keys[scan_code].append(lambda e, key=key: delivered.append(key))
+        events = [keyboard.KeyboardEvent(keyboard.KEY_DOWN if is_down else keyboard.KEY_UP, scan_code)
+                  for scan_code, is_down in FakeTypist().events(keystrokes)]
+        direct_callback, pending = listener.direct_callback, listener.queue
+
+        def op():
+            for event in events:
+                # Hook thread, then the library's processing thread.
+                direct_callback(event)
+                queued = pending.get_nowait()
+                if listener.pre_process_event(queued):
+                    listener.invoke_handlers(queued)
+            if delivered:
+                raise RuntimeError("an unbound key was delivered")
+
+        return op
+    return setup
+
+
+def cases() -> List[Case]:
+    raw_events = sum(1 for _ in FakeKeyboardSource().events(PRESSES))
+    return [
+        Case("hotkeys.dispatch", _dispatch(PRESSES), {"presses": PRESSES},
+             iterations=30, warmup=2, batch=raw_events),
+        Case("hotkeys.unbound_keystroke", _unbound_table(KEYSTROKES), {"path": "scan_code_table"},
+             iterations=30, warmup=2, batch=2 * KEYSTROKES),
+        Case("hotkeys.unbound_keystroke", _unbound_keyboard_library(KEYSTROKES), {"path": "keyboard_hook_key"},
+             iterations=30, warmup=2, batch=2 * KEYSTROKES),
+    ]
@@ -0,0 +1,118 @@
+"""Mic toggle round trip: mute call -> endpoint callback -> MicrophoneState.
+
+mic.audio_worker measures the same toggle queued to the audio thread:
+`submit` is what the UI thread pays, `round_trip` includes the result.
+
+mic.mute_all compares muting every capture device through the cached
+endpoint set with one default-device style open + SetMute per device.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import List
+
+from benchmarks.fakes import FakeEndpoint, FakeMicrophoneBackend
+from benchmarks.harness import Case
+from modules import microphone_control
+from modules.audio_worker import OP_TOGGLE, AudioWorker
+from modules.microphone_state import state as mic_state
+
+_changed = threading.Event()
+_expected = [None]
+_subscribed = False
+
+
+def _on_state(muted) -> None:
+    if muted == _expected[0]:
+        _changed.set()
+
+
+def _toggle_round_trip(notify_on_thread: bool, reopen: bool):
+    def setup():
+        global _subscribed
+        endpoint = FakeEndpoint(notify_on_thread=notify_on_thread)
+        microphone_control.set_backend(FakeMicrophoneBackend(endpoint))
+        if not _subscribed:
+            mic_state.subscribe(_on_state)
+            _subscribed = True
+        mic_state.start()
+        microphone_control.get_mic_endpoint()
+
+        def op():
+            if reopen:
+                # Same as after a default device change.
+                microphone_control.invalidate_mic_endpoint("benchmark")
+            target = not bool(endpoint.muted)
+            _expected[0] = target
+            _changed.clear()
+            if target:
+                microphone_control.disable_microphone()
+            else:
+                microphone_control.enable_microphone()
+            if not _changed.wait(1.0):
+                raise RuntimeError("microphone state callback did not arrive")
+
+        return op
+    return setup
+
+
+_worker = AudioWorker()
+
+
+def _audio_worker(wait: bool):
+    def setup():
+        microphone_control.set_backend(FakeMicrophoneBackend())
+        _worker.start()
+
+        def op():
+            future = _worker.submit(OP_TOGGLE)
+            if wait:
+                future.result(1.0)
+
+        return op
+    return setup
+
+
+def _mute_all(path: str, devices: int):
+    def setup():
+        backend = FakeMicrophoneBackend(extra_devices=devices - 1, activate_latency=_ACTIVATE_LATENCY)
+        microphone_control.set_backend(backend)
+        state = [True]
+
+        if path == "batched":
+            microphone_control.get_capture_endpoints()
+
+            def op():
+                microphone_control.set_capture_mute(state[0])
+                state[0] = not state[0]
+        else:
+            def op():
+                # What calling the single-device functions per device costs:
+                # each of them enumerates and activates its endpoint.
+                for device_id in backend.devices:
+                    backend.open_endpoint(device_id).SetMute(1 if state[0] else 0, None)
+                state[0] = not state[0]
+
+        return op
+    return setup
+
+
+# Roughly what IMMDevice::Activate(IAudioEndpointVolume) takes.
+_ACTIVATE_LATENCY = 0.0002
+
+
+def cases() -> List[Case]:
+    return [
+        Case("mic.toggle_round_trip", _toggle_round_trip(False, False),
+             {"callback": "inline", "endpoint": "cached"}, iterations=2000),
+        Case("mic.toggle_round_trip", _toggle_round_trip(True, False),
+             {"callback": "thread", "endpoint": "cached"}, iterations=1000),
+        Case("mic.toggle_round_trip", _toggle_round_trip(False, True),
+             {"callback": "inline", "endpoint": "reopened"}, iterations=1000),
+        Case("mic.audio_worker", _audio_worker(False), {"path": "submit"}, iterations=2000),
+        Case("mic.audio_worker", _audio_worker(True), {"path": "round_trip"}, iterations=2000,
+             teardown=_worker.stop),
+        Case("mic.mute_all", _mute_all("batched", 4), {"path": "batched", "devices": 4}, iterations=2000),
+        Case("mic.mute_all", _mute_all("per_device", 4), {"path": "per_device", "devices": 4}, iterations=500),
+    ]
@@ -0,0 +1,93 @@
+"""Process lookups ("is SystemControl.exe running?") at various table sizes.
+
+The target is not running, which is the normal case for the startup
+conflict check and the worst case for a lookup: every name has to be known.
+"""
+
+from __future__ import annotations
+
+from typing import List
+
+from benchmarks.fakes import FakeProcessTable
+from benchmarks.harness import Case
+from modules import process_index
+from modules.check_official_h3ccc import is_official_h3c_control_center_running
+from modules.process_index import ProcessIndex
+
+TARGET = "SystemControl.exe"
+SIZES = (500, 5_000, 50_000)
+# Processes started/ended between two lookups.
+CHURN = 5
+# Cost of resolving one process name (psutil.Process(pid).name() on Windows
+# is in this range).
+NAME_COST_SECONDS = 10e-6
+
+
+def _steady(count: int):
+    def setup():
+        table = FakeProcessTable(count, name_cost=NAME_COST_SECONDS)
+        index = ProcessIndex(table)
+        index.refresh()
+
+        def op():
+            table.churn(CHURN)
+            if index.is_running(TARGET):
+                raise RuntimeError("unexpected target process")
+
+        return op
+    return setup
+
+
+def _cold(count: int):
+    def setup():
+        table = FakeProcessTable(count, name_cost=NAME_COST_SECONDS)
+
+        def op():
+            ProcessIndex(table).is_running(TARGET)
+
+        return op
+    return setup
+
+
+def _full_scan(count: int):
+    """What the code did before the index: resolve every name each time."""
+    def setup():
+        table = FakeProcessTable(count, name_cost=NAME_COST_SECONDS)
+
+        def op():
+            table.churn(CHURN)
+            if any(table.name(pid) == TARGET for pid in table.pids()):
+                raise RuntimeError("unexpected target process")
+
+        return op
+    return setup
+
+
+def _conflict_check(count: int) -> Case:
+    """The startup conflict check through the shared index."""
+    previous: List[ProcessIndex] = []
+
+    def setup():
+        previous.append(process_index.get_process_index())
+        process_index.set_process_index(ProcessIndex(FakeProcessTable(count, name_cost=NAME_COST_SECONDS)))
+        return is_official_h3c_control_center_running
+
+    def teardown():
+        process_index.set_process_index(previous.pop())
+
+    return Case("process.conflict_check", setup, {"processes": count}, iterations=500, teardown=teardown)
+
+
+def cases() -> List[Case]:
+    result = []
+    for count in SIZES:
+        # Cold lookups and full scans resolve every name: keep them short.
+        iterations = max(5, 100_000 // count)
+        result.append(Case("process.lookup_incremental", _steady(count), {"processes": count},
+                           iterations=500))
+        result.append(Case("process.lookup_cold", _cold(count), {"processes": count},
+                           iterations=iterations, warmup=1))
+        result.append(Case("process.lookup_full_scan", _full_scan(count), {"processes": count},
+                           iterations=iterations, warmup=1))
+    result.append(_conflict_check(5_000))
+    return result
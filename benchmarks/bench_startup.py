@@ -0,0 +1,71 @@
+"""Startup to tray: launch main.py with --profile-startup and read back the
+milestones. The tray app uses Qt's "offscreen" platform so no display is
+needed; `--headless` is measured the same way."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks.harness import Case, Skip
+
+MAIN = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+_TIMEOUT_SECONDS = 30.0
+
+
+def _launch(extra_args: List[str]) -> Dict[str, float]:
+    with tempfile.TemporaryDirectory(prefix="openh3c-bench-startup-") as tmp:
+        profile = os.path.join(tmp, "startup_profile.json")
+        env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+        started = time.perf_counter()
+        proc = subprocess.Popen([sys.executable, MAIN, f"--profile-startup={profile}", *extra_args],
+                                stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, env=env)
+        try:
+            report = None
+            while report is None:
+                if time.perf_counter() - started > _TIMEOUT_SECONDS:
+                    raise RuntimeError("no startup profile within the timeout")
+                if proc.poll() is not None and not os.path.exists(profile):
+                    raise RuntimeError(f"app exited with {proc.returncode} before the tray was up "
+                                       f"(is another instance running?)")
+                try:
+                    with open(profile, "r", encoding="utf-8") as fh:
+                        report = json.load(fh)
+                except (OSError, ValueError):
+                    time.sleep(0.005)
+            wall_ms = (time.perf_counter() - started) * 1000.0
+        finally:
+            proc.kill()
+            proc.wait()
+
+    milestones = {item["name"]: item for item in report["milestones"]}
+    result = {"launch_to_profile_ms": wall_ms}
+    for name in ("imports_done", "tray_shown", "hotkeys_hooked", "event_loop_started"):
+        if name in milestones:
+            result[f"{name}_ms"] = milestones[name]["ms"]
+    if report.get("peak_rss_kb") is not None:
+        result["peak_rss_kb"] = report["peak_rss_kb"]
+    return result
+
+
+def _startup(mode: str):
+    def setup():
+        if mode == "tray":
+            try:
+                import PyQt6.QtWidgets  # noqa: F401
+            except ImportError as e:
+                raise Skip(f"PyQt6 not available: {e}")
+        extra_args = ["--headless"] if mode == "headless" else []
+        return lambda: _launch(extra_args)
+    return setup
+
+
+def cases() -> List[Case]:
+    return [Case("startup.to_tray", _startup(mode), {"mode": mode}, iterations=5, warmup=1)
+            for mode in ("tray", "headless")]
@@ -0,0 +1,423 @@
+"""Fake hardware and OS backends for the benchmarks.
+
+Each fake plugs into the extension point the real module already has:
+
+- FakeMicrophoneBackend -> microphone_control.set_backend(), optionally with
+                           several capture devices
+- FakeProcessTable      -> process_index.ProcessIndex(table)
+- FakeProcessTree       -> h3c_sound.H3CSoundManager(tree), and as the
+                           process table of a ProcessIndex
+- FakeWindowWatcher     -> the window_watcher_factory of H3CSoundManager
+- FakeRunner            -> the `runner=` argument (subprocess.run stand-in)
+  of bcdedit / switch_to_megaos
+- make_efivar_store()   -> an efivarfs-style directory for efivars
+- FakeKeyboardSource    -> raw down/up events for HotkeyDispatcher
+- FakeTypist            -> everyday typing, as scan codes, for the keyboard hook
+- FakeTray, FakeTimers  -> the show / schedule / clock arguments of
+                           notifications.NotificationManager
+
+None of them touch Windows, COM or real processes.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import struct
+import subprocess
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from modules import efivars
+from modules.h3c_sound import ProcessTree, ProcInfo, WindowWatcher
+from modules.microphone_control import MicrophoneBackend
+from modules.process_index import ProcessTable
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+BCDEDIT_LOCALES = ("en-US", "zh-CN", "de-DE")
+
+
+class FakeEndpoint:
+    """IAudioEndpointVolume stand-in.
+
+    With notify_on_thread=True the volume callbacks arrive on a separate
+    thread, like COM delivers them; otherwise they run inside SetMute().
+    """
+
+    def __init__(self, notify_on_thread: bool = False, call_latency: float = 0.0) -> None:
+        self.muted = 0
+        self.notify_on_thread = notify_on_thread
+        self.call_latency = call_latency
+        self._callbacks: List[Callable[[bool], None]] = []
+
+    def GetMute(self) -> int:
+        if self.call_latency:
+            time.sleep(self.call_latency)
+        return self.muted
+
+    def SetMute(self, mute: int, context) -> None:
+        if self.call_latency:
+            time.sleep(self.call_latency)
+        changed = self.muted != mute
+        self.muted = mute
+        if changed:
+            for callback in list(self._callbacks):
+                if self.notify_on_thread:
+                    threading.Thread(target=callback, args=(bool(mute),), daemon=True).start()
+                else:
+                    callback(bool(mute))
+
+
+class FakeMicrophoneBackend(MicrophoneBackend):
+    """A default capture device plus `extra_devices` more.
+
+    activate_latency is paid for every endpoint opened, like enumerating
+    and activating IAudioEndpointVolume costs on real hardware.
+    """
+
+    def __init__(self, endpoint: Optional[FakeEndpoint] = None, device_id: str = "{fake-capture-0}",
+                 extra_devices: int = 0, activate_latency: float = 0.0) -> None:
+        self.endpoint = endpoint or FakeEndpoint()
+        self.device_id = device_id
+        self.devices: Dict[str, FakeEndpoint] = {device_id: self.endpoint}
+        for n in range(extra_devices):
+            self.devices[f"{{fake-capture-{n + 1}}}"] = FakeEndpoint()
+        self.activate_latency = activate_latency
+        self.opened = 0
+        self.on_default_change: Optional[Callable[[], None]] = None
+        self.on_devices_change: Optional[Callable[[], None]] = None
+
+    def open_endpoint(self, device_id: str) -> FakeEndpoint:
+        self.opened += 1
+        if self.activate_latency:
+            time.sleep(self.activate_latency)
+        return self.devices[device_id]
+
+    def open_default_endpoint(self):
+        return self.device_id, self.open_endpoint(self.device_id)
+
+    def watch_default_device(self, on_change) -> None:
+        self.on_default_change = on_change
+
+    def open_capture_endpoints(self):
+        return [(device_id, self.open_endpoint(device_id)) for device_id in self.devices]
+
+    def watch_capture_devices(self, on_change) -> None:
+        self.on_devices_change = on_change
+
+    def watch_endpoint_volume(self, endpoint, on_mute):
+        endpoint._callbacks.append(on_mute)
+        return lambda: endpoint._callbacks.remove(on_mute)
+
+
+# Names that show up in a typical Windows process list.
+_COMMON_NAMES = (
+    "svchost.exe", "RuntimeBroker.exe", "chrome.exe", "msedge.exe", "explorer.exe",
+    "conhost.exe", "dllhost.exe", "SearchHost.exe", "Teams.exe", "Code.exe",
+    "audiodg.exe", "WmiPrvSE.exe", "csrss.exe", "lsass.exe", "sihost.exe",
+)
+
+
+class FakeProcessTable(ProcessTable):
+    """`count` processes with realistic names; churn() replaces some of them.
+
+    name() busy-waits `name_cost` seconds to model OpenProcess +
+    QueryFullProcessImageName, which is what makes resolving every name on
+    each lookup expensive on a real machine. Processes named in
+    `extra_names` are never churned away.
+    """
+
+    def __init__(self, count: int, extra_names: Tuple[str, ...] = (), name_cost: float = 0.0,
+                 seed: int = 1) -> None:
+        self._random = random.Random(seed)
+        self._next_pid = 4
+        self.name_cost = name_cost
+        self.names: Dict[int, str] = {}
+        # Churnable PIDs, for O(1) random removal.
+        self._pool: List[int] = []
+        for name in extra_names:
+            self._spawn(name)
+        while len(self.names) < count:
+            self._pool.append(self._spawn(self._random.choice(_COMMON_NAMES)))
+        self.name_calls = 0
+
+    def _spawn(self, name: str) -> int:
+        pid = self._next_pid
+        self._next_pid += 4
+        self.names[pid] = name
+        return pid
+
+    def churn(self, count: int) -> None:
+        """End `count` random processes and start as many new ones."""
+        for _ in range(min(count, len(self._pool))):
+            index = self._random.randrange(len(self._pool))
+            self._pool[index], self._pool[-1] = self._pool[-1], self._pool[index]
+            del self.names[self._pool.pop()]
+        for _ in range(count):
+            self._pool.append(self._spawn(self._random.choice(_COMMON_NAMES)))
+
+    def pids(self):
+        return list(self.names)
+
+    def name(self, pid: int) -> Optional[str]:
+        self.name_calls += 1
+        if self.name_cost:
+            end = time.perf_counter() + self.name_cost
+            while time.perf_counter() < end:
+                pass
+        return self.names.get(pid)
+
+
+class FakeProcess:
+    def __init__(self, pid: int, ppid: int, create_time: float, name: str) -> None:
+        self.pid = pid
+        self.ppid = ppid
+        self.create_time = create_time
+        self.name = name
+        self.exited = threading.Event()
+
+    def info(self) -> ProcInfo:
+        return ProcInfo(self.pid, self.create_time, self.name)
+
+
+class FakeProcessTree(ProcessTree, ProcessTable):
+    """Processes with parents and creation times, as both a ProcessTree
+    and a ProcessTable.
+
+    spawn() starts a process named after the executable; add() starts one
+    under a given parent, exit() ends it. Creation times come from a
+    counter, so later processes are always younger. wait() blocks until
+    the process has ended, like the real one. kill() ends processes at
+    once and records their PIDs in `killed`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._next_pid = 1000
+        self._clock = 0.0
+        self.procs: Dict[int, FakeProcess] = {}
+        self.killed: List[int] = []
+
+    def add(self, name: str, ppid: int = 0, pid: Optional[int] = None,
+            create_time: Optional[float] = None) -> FakeProcess:
+        """Start a process; `pid` reuses the PID of an exited one."""
+        with self._lock:
+            self._clock += 1.0
+            if pid is None:
+                pid = self._next_pid
+                self._next_pid += 4
+            proc = FakeProcess(pid, ppid, self._clock if create_time is None else create_time, name)
+            self.procs[pid] = proc
+            return proc
+
+    def exit(self, pid: int) -> None:
+        with self._lock:
+            proc = self.procs.pop(pid, None)
+        if proc is not None:
+            proc.exited.set()
+
+    def spawn(self, args: List[str]) -> ProcInfo:
+        return self.add(os.path.basename(args[0].replace("\\", "/"))).info()
+
+    def wait(self, proc: ProcInfo) -> None:
+        with self._lock:
+            current = self.procs.get(proc.pid)
+        if current is not None and current.create_time == proc.create_time:
+            current.exited.wait()
+
+    def children(self, proc: ProcInfo) -> List[ProcInfo]:
+        with self._lock:
+            return [child.info() for child in self.procs.values()
+                    if child.ppid == proc.pid and child.create_time >= proc.create_time]
+
+    def parent_of(self, pid: int) -> Optional[Tuple[int, float]]:
+        with self._lock:
+            proc = self.procs.get(pid)
+            return None if proc is None else (proc.ppid, proc.create_time)
+
+    def kill(self, procs: List[ProcInfo]) -> None:
+        for info in procs:
+            with self._lock:
+                proc = self.procs.get(info.pid)
+            if proc is None or (info.create_time and proc.create_time != info.create_time):
+                continue
+            self.killed.append(info.pid)
+            self.exit(info.pid)
+
+    def pids(self):
+        with self._lock:
+            return list(self.procs)
+
+    def name(self, pid: int) -> Optional[str]:
+        with self._lock:
+            proc = self.procs.get(pid)
+            return None if proc is None else proc.name
+
+
+class FakeWindowWatcher(WindowWatcher):
+    """show(pid) and hide() stand in for the settings window appearing and
+    closing; a window counts only if the session owns its process."""
+
+    def __init__(self) -> None:
+        self.owns_pid: Optional[Callable[[int], bool]] = None
+        self.on_visible_changed: Optional[Callable[[bool], None]] = None
+        self.stopped = False
+
+    def start(self, owns_pid, on_visible_changed) -> None:
+        self.owns_pid = owns_pid
+        self.on_visible_changed = on_visible_changed
+
+    def show(self, pid: int) -> bool:
+        if not self.owns_pid(pid):
+            return False
+        self.on_visible_changed(True)
+        return True
+
+    def hide(self) -> None:
+        self.on_visible_changed(False)
+
+    def stop(self) -> None:
+        self.stopped = True
+
+
+def load_bcdedit_sample(locale: str) -> str:
+    """`bcdedit /enum firmware /v` output in the given display language."""
+    with open(os.path.join(DATA_DIR, f"bcdedit_{locale}.txt"), "r", encoding="utf-8") as fh:
+        return fh.read()
+
+
+class FakeRunner:
+    """subprocess.run stand-in with scripted answers.
+
+    `responses` maps the first two arguments (e.g. ("bcdedit", "/enum")) to
+    (returncode, stdout). Every call is recorded in `calls`.
+    """
+
+    def __init__(self, responses: Dict[Tuple[str, ...], Tuple[int, str]], latency: float = 0.0) -> None:
+        self.responses = responses
+        self.latency = latency
+        self.calls: List[List[str]] = []
+
+    def __call__(self, args, **kwargs) -> subprocess.CompletedProcess:
+        self.calls.append(list(args))
+        if self.latency:
+            time.sleep(self.latency)
+        returncode, stdout = self.responses.get(tuple(args[:2]), (0, ""))
+        return subprocess.CompletedProcess(args, returncode, stdout, "")
+
+
+def bcdedit_runner(locale: str = "en-US", latency: float = 0.0) -> FakeRunner:
+    return FakeRunner({
+        ("bcdedit", "/enum"): (0, load_bcdedit_sample(locale)),
+        ("bcdedit", "/set"): (0, "The operation completed successfully.\n"),
+        ("shutdown", "/r"): (0, ""),
+    }, latency=latency)
+
+
+def make_efivar_store(root: str, entries: int, target: str = "MegaOS") -> efivars.EfivarfsVariableStore:
+    """Fill `root` with BootOrder and `entries` Boot#### variables, the
+    MegaOS one last, and return a store on it."""
+    store = efivars.EfivarfsVariableStore(root)
+    order = list(range(entries))
+    for number in order:
+        description = target if number == entries - 1 else f"UEFI Boot Option {number}"
+        option = efivars.LoadOption(
+            number=number,
+            attributes=efivars.LOAD_OPTION_ACTIVE,
+            description=description,
+            # END_ENTIRE device path node.
+            file_path_list=bytes((0x7F, 0xFF, 0x04, 0x00)),
+        )
+        store.write(f"Boot{number:04X}", efivars.EFI_GLOBAL_VARIABLE_GUID, efivars.encode_load_option(option))
+    store.write("BootOrder", efivars.EFI_GLOBAL_VARIABLE_GUID, struct.pack(f"<{len(order)}H", *order))
+    return store
+
+
+class FakeKeyboardSource:
+    """Raw hook events as (key, is_down, t) tuples on a synthetic clock.
+
+    Each press is a down/up pair `gap` seconds after the previous one; every
+    `repeat_every`-th press also carries auto-repeat downs, like a held key.
+    """
+
+    def __init__(self, keys: Tuple[str, ...] = ("f20", "f21"), gap: float = 0.2,
+                 repeat_every: int = 10, repeats: int = 3) -> None:
+        self.keys = keys
+        self.gap = gap
+        self.repeat_every = repeat_every
+        self.repeats = repeats
+
+    def events(self, presses: int, start: float = 0.0) -> Iterator[Tuple[str, bool, float]]:
+        t = start
+        for index in range(presses):
+            key = self.keys[index % len(self.keys)]
+            yield key, True, t
+            if self.repeat_every and index % self.repeat_every == 0:
+                for step in range(self.repeats):
+                    yield key, True, t + 0.03 * (step + 1)
+            yield key, False, t + 0.1
+            t += self.gap
+
+
+class FakeTypist:
+    """Scan-code down/up pairs of ordinary typing (letters, space, shift),
+    none of them bound to an action."""
+
+    # Set 1 scan codes: letter rows, space, left shift, backspace.
+    SCAN_CODES = tuple(range(0x10, 0x1A)) + tuple(range(0x1E, 0x27)) + tuple(range(0x2C, 0x33)) \
+        + (0x39, 0x2A, 0x0E)
+
+    def __init__(self, seed: int = 1) -> None:
+        self._random = random.Random(seed)
+
+    def events(self, keystrokes: int) -> List[Tuple[int, bool]]:
+        events = []
+        for _ in range(keystrokes):
+            scan_code = self._random.choice(self.SCAN_CODES)
+            events.append((scan_code, True))
+            events.append((scan_code, False))
+        return events
+
+
+class FakeTray:
+    """showMessage() stand-in; every toast is recorded in `shown` as
+    (title, message)."""
+
+    def __init__(self) -> None:
+        self.shown: List[Tuple[str, str]] = []
+
+    def show(self, title: str, message: str, icon, duration_ms: int) -> None:
+        self.shown.append((title, message))
+
+
+class FakeTimers:
+    """A manual clock with single-shot timers. advance() moves the clock
+    and runs the timers that came due, in order."""
+
+    def __init__(self, now: float = 1000.0) -> None:
+        self.now = now
+        self._timers: List[Tuple[float, int, Callable[[], None]]] = []
+        self._sequence = 0
+
+    def clock(self) -> float:
+        return self.now
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> None:
+        self._sequence += 1
+        self._timers.append((self.now + delay, self._sequence, callback))
+
+    def pending(self) -> int:
+        return len(self._timers)
+
+    def advance(self, seconds: float) -> None:
+        end = self.now + seconds
+        while True:
+            due = [timer for timer in self._timers if timer[0] <= end]
+            if not due:
+                break
+            timer = min(due)
+            self._timers.remove(timer)
+            self.now = max(self.now, timer[0])
+            timer[2]()
+        self.now = end
@@ -0,0 +1,92 @@
+"""Minimal benchmark harness: cases, timing and statistics."""
+
+from __future__ import annotations
+
+import gc
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class Case:
+    """One benchmark.
+
+    `setup()` builds the fixtures and returns `op`. Each call of `op()` is
+    timed on its own and counts as `batch` operations (use batch > 1 for
+    operations too fast to time one by one). `op()` may return a dict of
+    extra numbers (e.g. milestones), which are reported as medians.
+    """
+    name: str
+    setup: Callable[[], Callable[[], Optional[Dict[str, float]]]]
+    params: Dict[str, Any] = field(default_factory=dict)
+    iterations: int = 200
+    warmup: int = 5
+    batch: int = 1
+    teardown: Optional[Callable[[], None]] = None
+
+    @property
+    def full_name(self) -> str:
+        if not self.params:
+            return self.name
+        return self.name + "[" + ",".join(f"{key}={value}" for key, value in self.params.items()) + "]"
+
+
+class Skip(Exception):
+    """Raised by setup() when a case cannot run here (missing dependency)."""
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    index = min(len(ordered) - 1, max(0, int(q * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def run_case(case: Case, scale: float = 1.0) -> Dict[str, Any]:
+    result: Dict[str, Any] = {"name": case.name, "id": case.full_name, "params": case.params}
+    try:
+        op = case.setup()
+    except Skip as e:
+        result["skipped"] = str(e)
+        return result
+
+    iterations = max(1, int(case.iterations * scale))
+    extras: Dict[str, List[float]] = {}
+    samples: List[float] = []
+    try:
+        for _ in range(case.warmup):
+            op()
+        gc.collect()
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for _ in range(iterations):
+                started = time.perf_counter()
+                extra = op()
+                samples.append((time.perf_counter() - started) / case.batch)
+                if extra:
+                    for key, value in extra.items():
+                        extras.setdefault(key, []).append(value)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    finally:
+        if case.teardown is not None:
+            case.teardown()
+
+    ordered = sorted(samples)
+    mean = statistics.fmean(samples)
+    result.update({
+        "iterations": iterations,
+        "batch": case.batch,
+        "unit": "seconds/op",
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": mean,
+        "p99": _percentile(ordered, 0.99),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "ops_per_second": 1.0 / mean if mean > 0 else None,
+    })
+    if extras:
+        result["extra"] = {key: statistics.median(values) for key, values in extras.items()}
+    return result
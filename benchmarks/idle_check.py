@@ -0,0 +1,91 @@
+"""Check that an idle instance does not poll.
+
+    python -m benchmarks.idle_check                 # headless, 20 s window
+    python -m benchmarks.idle_check --tray --window 60
+
+Starts the app with `--audit-wakeups=WINDOW` (headless by default, where
+nothing but our own code runs), leaves it alone, reads the report from
+wakeup_audit.json and stops the app. It fails (exit code 1) if, during
+the window:
+
+- any timer of the app's own code fired, or
+- any of its Python threads woke up (Linux, where per-thread context
+  switches can be read; elsewhere only timers are checked).
+
+Threads that are not ours (Qt, COM) are listed but only fail the check
+with --strict. The app is a single instance, so close a running one first.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def problems(report: Dict[str, Any], strict: bool = False) -> List[str]:
+    found = [f"timer {name} fired {count} times" for name, count in sorted(report["timer_fires"].items())]
+    for thread in report["threads"]:
+        if thread["wakeups"] and (thread["python"] or strict):
+            found.append(f"thread {thread['thread']} woke up {thread['wakeups']} times")
+    return found
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    from modules import wakeup_audit
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.idle_check", description=__doc__.splitlines()[0])
+    parser.add_argument("--window", type=float, default=20.0,
+                        help="idle window in seconds (default 20); keep it below MEMORY_BUDGET_IDLE_SECONDS, "
+                             "after which the idle trim fires once")
+    parser.add_argument("--tray", action="store_true", help="audit the tray app instead of --headless")
+    parser.add_argument("--strict", action="store_true", help="fail on wakeups of non-Python threads too")
+    args = parser.parse_args(argv)
+
+    report_path = os.path.join(ROOT, wakeup_audit.REPORT_NAME)
+    if os.path.exists(report_path):
+        os.remove(report_path)
+    command = [sys.executable, os.path.join(ROOT, "main.py"), f"{wakeup_audit.ARG_NAME}={args.window:g}"]
+    if not args.tray:
+        command.append("--headless")
+    proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # Startup, the settle period and the window itself.
+        deadline = time.monotonic() + args.window + 60.0
+        while not os.path.exists(report_path):
+            if proc.poll() is not None:
+                print(f"The app exited with code {proc.returncode} before the audit finished.", file=sys.stderr)
+                return 1
+            if time.monotonic() > deadline:
+                print("No audit report; is another instance running?", file=sys.stderr)
+                return 1
+            time.sleep(0.5)
+        with open(report_path, "r", encoding="utf-8") as fh:
+            report = json.load(fh)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(5.0)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        if os.path.exists(report_path):
+            os.remove(report_path)
+
+    for line in wakeup_audit.format_lines(report):
+        print(line)
+    found = problems(report, args.strict)
+    for problem in found:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    if not found:
+        print("OK: no periodic wakeups while idle.")
+    return 1 if found else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Replay a hotkey trace through the hotkey pipeline, with fake backends.
+
+    python -m benchmarks.replay logs/hotkeys-20261018-101500-manual.trace
+    python -m benchmarks.replay TRACE --speed 10        # ten times real time
+    python -m benchmarks.replay TRACE --speed 0         # as fast as possible
+    python -m benchmarks.replay --synthetic 20000 --rate 5000 --keys f20
+
+The key downs and ups of a trace written by --dump-trace, or of a
+synthetic one, take the same path that setup_hotkeys() builds:
+KeyboardHook's scan-code table -> HotkeyDispatcher (bindings and
+coalescing from config.HOTKEY_BINDINGS) -> a UI thread fed through a queue,
+as the Qt signal does -> the action. toggle_mic is queued to the
+AudioWorker, which mutes a FakeMicrophoneBackend; switch_megaos stands in
+for its modal dialog by sleeping --dialog-ms.
+
+A JSON summary goes to stdout: events fed per second, the dispatcher's
+counters, hook-to-finish latency, and whether the fake mic ended up in the
+state the delivered toggles imply. The exit code is 1 if it didn't.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import queue
+import statistics
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.fakes import FakeMicrophoneBackend
+from benchmarks.run import _quiet_logging
+from modules import keyboard_hook, microphone_control, trace_recorder
+from modules.audio_worker import OP_QUERY, OP_TOGGLE, AudioResult, AudioWorker
+from modules.hotkey_dispatch import HotkeyDispatcher
+
+# (key, is_down, seconds since the first event)
+KeyEvents = List[Tuple[str, bool, float]]
+
+
+def trace_key_events(trace: trace_recorder.Trace) -> KeyEvents:
+    """The raw key downs and ups of a recorded trace."""
+    raw = [event for event in trace.events
+           if event.kind in (trace_recorder.KIND_KEY_DOWN, trace_recorder.KIND_KEY_UP)]
+    if not raw:
+        return []
+    start = raw[0].t
+    return [(event.key, event.kind == trace_recorder.KIND_KEY_DOWN, event.t - start) for event in raw]
+
+
+def synthetic_key_events(presses: int, rate: float, keys: Tuple[str, ...]) -> KeyEvents:
+    """`presses` down/up pairs at `rate` presses per second, cycling through keys."""
+    gap = 1.0 / rate
+    events: KeyEvents = []
+    for index in range(presses):
+        key = keys[index % len(keys)]
+        events.append((key, True, index * gap))
+        events.append((key, False, (index + 0.5) * gap))
+    return events
+
+
+class ReplayPipeline:
+    def __init__(self, bindings: Dict[Any, str], debounce_seconds: float, dialog_seconds: float,
+                 recorder: Optional[trace_recorder.TraceRecorder] = None) -> None:
+        bindings = keyboard_hook.action_bindings(bindings)
+        self.actions = {keyboard_hook.key_name(key): action for key, action in bindings.items()}
+        self.dialog_seconds = dialog_seconds
+        self.backend = FakeMicrophoneBackend()
+        microphone_control.set_backend(self.backend)
+        # As in the app, the result is posted back to the UI thread, which
+        # only then finishes the press.
+        self.audio = AudioWorker(on_result=lambda result: self._ui_queue.put(result))
+        self.toggles = 0
+        self.latencies: List[float] = []
+        self._ui_queue: "queue.Queue[Any]" = queue.Queue()
+
+        self.dispatcher = HotkeyDispatcher(self._ui_queue.put, debounce_seconds=debounce_seconds,
+                                           recorder=recorder)
+        for key, action in self.actions.items():
+            self.dispatcher.bind(key, coalesce=keyboard_hook.ACTION_COALESCE[action])
+        # Made-up scan codes; the table lookup is the same as with real ones.
+        self.scan_codes = {key: 0x100 + index for index, key in enumerate(self.actions)}
+        self.hook = keyboard_hook.KeyboardHook(self.actions, self.dispatcher.on_key_event,
+                                               resolve=lambda key: [self.scan_codes[keyboard_hook.key_name(key)]])
+        self._ui_thread = threading.Thread(target=self._run_ui, name="replay-ui", daemon=True)
+
+    def _run_ui(self) -> None:
+        while True:
+            event = self._ui_queue.get()
+            if event is None:
+                return
+            if isinstance(event, AudioResult):
+                if event.tag is not None:
+                    self._finish(event.tag)
+                continue
+            self.dispatcher.action_started(event)
+            if self.actions[event.key] == keyboard_hook.ACTION_TOGGLE_MIC:
+                self.audio.submit(OP_TOGGLE, tag=event)
+                self.toggles += 1
+                continue
+            if self.dialog_seconds:
+                time.sleep(self.dialog_seconds)
+            self._finish(event)
+
+    def _finish(self, event: Any) -> None:
+        self.dispatcher.action_finished(event)
+        self.latencies.append(event.t_finished - event.t_hook)
+
+    def run(self, events: KeyEvents, speed: float) -> Dict[str, Any]:
+        self.audio.start()
+        self._ui_thread.start()
+        handle = self.hook.handle_scan_code
+        scan_codes = self.scan_codes
+        started = time.perf_counter()
+        for key, is_down, t in events:
+            if speed > 0:
+                due = started + t / speed
+                remaining = due - time.perf_counter()
+                # Sleep for the coarse part, spin for the last millisecond.
+                if remaining > 0.002:
+                    time.sleep(remaining - 0.001)
+                while time.perf_counter() < due:
+                    pass
+            scan_code = scan_codes.get(key)
+            if scan_code is not None:
+                handle(scan_code, is_down)
+        fed = time.perf_counter() - started
+
+        # Let the UI thread and the audio queue run dry.
+        while self.dispatcher.stats.delivered > len(self.latencies):
+            time.sleep(0.001)
+        self._ui_queue.put(None)
+        self._ui_thread.join()
+        final = self.audio.submit(OP_QUERY).result(10.0)
+        drained = time.perf_counter() - started
+        self.audio.stop()
+
+        stats = self.dispatcher.stats
+        expected_muted = self.toggles % 2 == 1
+        ordered = sorted(self.latencies)
+        return {
+            "events": len(events),
+            "speed": speed,
+            "feed_seconds": fed,
+            "events_per_second": len(events) / fed if fed else None,
+            "drain_seconds": drained,
+            "dispatcher": {
+                "delivered": stats.delivered,
+                "repeats_dropped": stats.repeats_dropped,
+                "bounces_dropped": stats.bounces_dropped,
+                "busy_dropped": stats.busy_dropped,
+                "coalesced": stats.coalesced,
+            },
+            "toggles": self.toggles,
+            "hook_to_finish_ms": {
+                "median": statistics.median(ordered) * 1000 if ordered else None,
+                "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000 if ordered else None,
+                "max": ordered[-1] * 1000 if ordered else None,
+            },
+            "expected_muted": expected_muted,
+            "final_muted": final.muted,
+            "consistent": final.muted == expected_muted,
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import config
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.replay", description=__doc__.splitlines()[0])
+    parser.add_argument("trace", nargs="?", help="trace file written by --dump-trace")
+    parser.add_argument("--synthetic", type=int, metavar="PRESSES", help="generate this many presses instead")
+    parser.add_argument("--rate", type=float, default=1000.0,
+                        help="presses per second of the synthetic trace (default 1000)")
+    parser.add_argument("--keys", default=",".join(str(key) for key in config.HOTKEY_BINDINGS),
+                        help="comma-separated keys pressed by the synthetic trace (default: every bound key)")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="multiple of real time; 0 feeds the events as fast as possible (default 1)")
+    parser.add_argument("--debounce-ms", type=float, default=150.0,
+                        help="dispatcher debounce window, as in the app (default 150)")
+    parser.add_argument("--dialog-ms", type=float, default=0.0,
+                        help="how long the switch_megaos stand-in action takes (default 0)")
+    parser.add_argument("--record", metavar="PATH", help="write the replay's own trace to PATH")
+    args = parser.parse_args(argv)
+
+    if args.synthetic:
+        keys = tuple(keyboard_hook.key_name(key) for key in args.keys.split(",") if key.strip())
+        events = synthetic_key_events(args.synthetic, args.rate, keys)
+    elif args.trace:
+        events = trace_key_events(trace_recorder.load(args.trace))
+    else:
+        parser.error("give a trace file or --synthetic")
+
+    _quiet_logging()
+    recorder = trace_recorder.TraceRecorder(max(1, len(events) * 4)) if args.record else None
+    pipeline = ReplayPipeline(config.HOTKEY_BINDINGS, args.debounce_ms / 1000.0, args.dialog_ms / 1000.0,
+                              recorder=recorder)
+    summary = pipeline.run(events, args.speed)
+    if recorder is not None:
+        recorder.dump(args.record)
+    print(json.dumps(summary, indent=2))
+    return 0 if summary["consistent"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
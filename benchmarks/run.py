@@ -0,0 +1,132 @@
+"""Offline benchmark suite.
+
+Runs on plain Linux (or Windows) without COM, bcdedit or the H3C binaries:
+every hardware and OS dependency is replaced by a fake from
+benchmarks/fakes.py. Results are written as JSON so runs can be compared.
+
+    python -m benchmarks.run                       # all cases, JSON to stdout
+    python -m benchmarks.run -k process -o new.json
+    python -m benchmarks.run --compare old.json -o new.json
+
+With --compare, the median of every case is compared against the baseline
+file and the exit code is 1 if any case got slower than --threshold.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+SCHEMA_VERSION = 1
+
+# Imported lazily so that `-k` only loads what it needs.
+_SUITES = (
+    "benchmarks.bench_microphone",
+    "benchmarks.bench_process_index",
+    "benchmarks.bench_boot_entry",
+    "benchmarks.bench_hotkeys",
+    "benchmarks.bench_startup",
+)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def _quiet_logging() -> None:
+    """Log like the app does (enqueue only), but write nothing: the cost on
+    the calling thread is what the benchmarks should see."""
+    from modules.log_setup import AsyncLogSink
+
+    logger.remove()
+    logger.add(AsyncLogSink(None, None), level="DEBUG", format="{message}", catch=True)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> int:
+    old = {item["id"]: item for item in baseline.get("results", []) if "median" in item}
+    regressions = 0
+    for item in current["results"]:
+        if "median" not in item or item["id"] not in old:
+            continue
+        ratio = item["median"] / old[item["id"]]["median"] if old[item["id"]]["median"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  <-- slower"
+            regressions += 1
+        print(f"{item['id']:<70} {old[item['id']]['median'] * 1e6:>12.2f} us -> "
+              f"{item['median'] * 1e6:>12.2f} us  x{ratio:.2f}{flag}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="only run cases whose id contains this text")
+    parser.add_argument("-o", "--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--quick", action="store_true", help="run a tenth of the iterations")
+    parser.add_argument("--compare", metavar="BASELINE", help="compare medians with an earlier results file")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio counted as a regression by --compare (default 1.25)")
+    args = parser.parse_args(argv)
+
+    _quiet_logging()
+    from importlib import import_module
+
+    results = []
+    for suite in _SUITES:
+        for case in import_module(suite).cases():
+            if args.filter not in case.full_name:
+                continue
+            from benchmarks.harness import run_case
+
+            print(f"{case.full_name} ...", file=sys.stderr, flush=True)
+            try:
+                result = run_case(case, scale=0.1 if args.quick else 1.0)
+            except Exception as e:
+                result = {"name": case.name, "id": case.full_name, "params": case.params, "error": str(e)}
+            if "median" in result:
+                print(f"    median {result['median'] * 1e6:.2f} us, p99 {result['p99'] * 1e6:.2f} us"
+                      + (f", {result['extra']}" if "extra" in result else ""), file=sys.stderr)
+            else:
+                print(f"    {result.get('skipped') or result.get('error')}", file=sys.stderr)
+            results.append(result)
+
+    document = {
+        "schema": SCHEMA_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "quick": args.quick,
+        "results": results,
+    }
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    code = 1 if any("error" in item for item in results) else 0
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            code = max(code, compare(json.load(fh), document, args.threshold))
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,70 @@
 IS_SKIP_H3CCC_CHECK = False
+
+# Global hotkeys: key name (or scan code) -> action. Actions are
+# "toggle_mic" and "switch_megaos".
+HOTKEY_BINDINGS = {
+    "f20": "toggle_mic",
+    "f21": "switch_megaos",
+}
+
+# The keyboard hook is self-tested (and re-installed if Windows dropped
+# it) whenever a hook callback ran late. Set this to also test it every
+# N seconds; 0 means only when needed.
+HOOK_WATCHDOG_INTERVAL_SECONDS = 0
+
+# Keep the last this many hotkey events (key downs/ups, what the
+# dispatcher did with them, action start/finish; 12 bytes each) in memory.
+# Written to logs/ by --dump-trace and when the app crashes. 0 turns it off.
+HOTKEY_TRACE_EVENTS = 16384
+
+# Garbage collector thresholds set after startup, once the startup objects
+# are frozen out of the collector (None keeps Python's defaults).
+GC_THRESHOLDS = (5000, 20, 20)
+
+# Close the H3CSound settings app (and what it started) this long after
+# its window was closed.
+H3C_SOUND_IDLE_TIMEOUT_SECONDS = 60
+
+# Give up on a MegaOS switch (bcdedit + reboot request) after this long.
+MEGAOS_SWITCH_TIMEOUT_SECONDS = 60
+
+# Change BootOrder through firmware variable APIs instead of bcdedit.
+# bcdedit is still used if the native call fails or finds no MegaOS entry.
+# Off by default until it has been tried on more machines.
+IS_USE_NATIVE_UEFI_BACKEND = False
+
+# How long a command from another launch (--toggle-mic etc.) may take.
+IPC_COMMAND_TIMEOUT_SECONDS = 4
+
+# --headless has no confirmation dialog: F21 / --switch-megaos must be
+# repeated within this many seconds to start the MegaOS switch.
+HEADLESS_MEGAOS_CONFIRM_SECONDS = 5
+
+# Log file (logs/OpenH3CSystemControl.jsonl next to the app) rotation.
+LOG_MAX_BYTES = 1024 * 1024
+LOG_ROTATE_HOURS = 24
+LOG_BACKUP_COUNT = 5
+
+# Serve latency metrics in Prometheus text format on
+# http://127.0.0.1:<port>/metrics (loopback only).
+IS_ENABLE_METRICS_EXPORTER = False
+METRICS_EXPORTER_PORT = 9469
+
+# Tray notifications: at most one per category (e.g. microphone) every
+# this many seconds; toasts in between are merged into the latest one and
+# dropped if older than NOTIFICATION_MAX_AGE_SECONDS by the time they'd show.
+NOTIFICATION_MIN_INTERVAL_SECONDS = 2.0
+NOTIFICATION_MAX_AGE_SECONDS = 5.0
+# Start with notifications turned off (can be changed from the tray menu).
+IS_QUIET_NOTIFICATIONS = False
+
+# Mute/unmute every active capture device (headset, webcam, internal mic)
+# together instead of only the default one (can be changed from the tray
+# menu). The tray shows them as muted only when all of them are.
+IS_MUTE_ALL_MICROPHONES = False
+
+# After this many seconds without a hotkey, menu or IPC action, drop
+# caches, collect garbage and trim the working set. The first press after
+# a trim may be a little slower while pages are faulted back in.
+IS_ENABLE_MEMORY_BUDGET = True
+MEMORY_BUDGET_IDLE_SECONDS = 300
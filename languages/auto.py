@@ -157,12 +157,42 @@ def get_language_module_name() -> str:
     return "languages.en"
 
 
-def apply_language(target_globals: Dict[str, Any]) -> str:
+_LANGUAGE_MODULES = ("languages.en", "languages.zhcn", "languages.ja")
+
+
+def get_language_cache_key() -> str:
+    """Cheap fingerprint of the inputs of get_language_module_name().
+
+    One LANGID call on Windows plus the locale environment variables; if it
+    is unchanged, a cached language choice is still valid.
+    """
+    parts = []
+    if os.name == "nt":
+        try:
+            parts.append(str(ctypes.windll.kernel32.GetUserDefaultUILanguage()))  # type: ignore[attr-defined]
+        except Exception:
+            pass
+    for key in ("LC_ALL", "LC_MESSAGES", "LANG"):
+        parts.append(os.environ.get(key, ""))
+    return "|".join(parts)
+
+
+def apply_language(target_globals: Dict[str, Any], cache: Any = None) -> str:
     """Load language constants and inject into target_globals.
 
+    `cache` is an optional StartupCache-like object (get/put); a cached
+    choice made under the same get_language_cache_key() skips detection.
+
     Returns the imported module name (e.g. 'languages.zhcn').
     """
-    module_name = get_language_module_name()
+    module_name = None
+    if cache is not None:
+        cache_key = get_language_cache_key()
+        module_name = cache.get("language", cache_key)
+    if module_name not in _LANGUAGE_MODULES:
+        module_name = get_language_module_name()
+        if cache is not None:
+            cache.put("language", cache_key, module_name)
     module = import_module(module_name)
 
     for name, value in vars(module).items():
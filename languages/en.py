@@ -12,8 +12,11 @@ MSGBOX_ERROR_TITLE = "Error"
 MSG_MICROPHONE_TOGGLE = "Microphone Control"
 MSG_MICROPHONE_TOGGLED_ON = "✅ Microphone: ON"
 MSG_MICROPHONE_TOGGLED_OFF = "🚫 Microphone: OFF"
+MENU_MIC_STATE_MUTED = "Muted"
+MENU_MIC_STATE_UNMUTED = "Unmuted"
 
 MSG_H3CCC_RUNNING = "Official H3C Control Center is running! Please uninstall or close it before using this app. For more informations, please check the GitHub page."
+MSG_H3CCC_CHECK_FAILED_TEMPLATE = "Could not check whether the official H3C Control Center is running: {error}\nClose it if it is running, or set IS_SKIP_H3CCC_CHECK = True in config.py to skip this check."
 
 MSG_ALREADY_RUNNING = "Open H3C System Control is already running."
 
@@ -25,4 +28,14 @@ MENU_ABOUT = "About"
 MSG_ABOUT_TITLE = "About Program"
 MSG_ABOUT_TEXT_TEMPLATE = "Open H3C System Control\nVersion: {version}\nMade by Remik1r3n and other contributors.\n\nLicensed under GPLv3.\nhttps://github.com/Remik1r3n/OpenH3CSystemControl"
 MSG_MEGAOS_SWITCH_NEXT_REBOOT = "You will be switched to MegaOS on the next reboot."
-MSG_FAILED_TO_SWITCH_MEGAOS = "Failed to switch to MegaOS, cannot continue."
\ No newline at end of file
+MSG_FAILED_TO_SWITCH_MEGAOS = "Failed to switch to MegaOS, cannot continue."
+
+MENU_DIAGNOSTICS = "Diagnostics"
+MSG_DIAGNOSTICS_TITLE = "Diagnostics"
+MSG_DIAGNOSTICS_EMPTY = "No actions measured yet."
+MSG_DIAGNOSTICS_HOTKEYS_TEMPLATE = "Hotkeys: delivered={delivered}, coalesced={coalesced}, repeats dropped={repeats_dropped}, bounces dropped={bounces_dropped}"
+MSG_DIAGNOSTICS_LOG_DROPPED_TEMPLATE = "Log records dropped: {count}"
+MSG_DIAGNOSTICS_NOTIFICATIONS = "Notifications"
+MSG_DIAGNOSTICS_MEMORY = "Memory"
+MENU_QUIET_NOTIFICATIONS = "Quiet Notifications"
+MENU_MUTE_ALL_MICROPHONES = "Mute All Microphones"
@@ -13,8 +13,11 @@ MSGBOX_ERROR_TITLE = "エラー"
 MSG_MICROPHONE_TOGGLE = "マイク制御"
 MSG_MICROPHONE_TOGGLED_ON = "✅ マイク: ON"
 MSG_MICROPHONE_TOGGLED_OFF = "🚫 マイク: OFF"
+MENU_MIC_STATE_MUTED = "ミュート中"
+MENU_MIC_STATE_UNMUTED = "ミュート解除"
 
 MSG_H3CCC_RUNNING = "H3C 公式コントロールセンターが実行中です。このアプリを使用する前に、アンインストールするか閉じてください。詳細は GitHub ページを参照してください。"
+MSG_H3CCC_CHECK_FAILED_TEMPLATE = "H3C 公式コントロールセンターが実行中かどうかを確認できませんでした：{error}\n実行中の場合は閉じてください。このチェックを省略するには、config.py で IS_SKIP_H3CCC_CHECK = True に設定してください。"
 
 MSG_ALREADY_RUNNING = "Open H3C System Control は既に実行されています。"
 
@@ -26,4 +29,14 @@ MENU_ABOUT = "About"
 MSG_ABOUT_TITLE = "プログラムについて"
 MSG_ABOUT_TEXT_TEMPLATE = "Open H3C System Control\nバージョン: {version}\nRemik1r3n とその他の貢献者により製作。\n\nGPLv3 の下でライセンスされています。\nhttps://github.com/Remik1r3n/OpenH3CSystemControl"
 MSG_MEGAOS_SWITCH_NEXT_REBOOT = "次回の再起動時に MegaOS に切り替わります。"
-MSG_FAILED_TO_SWITCH_MEGAOS = "MegaOS への切り替えに失敗しました。続行できません。"
\ No newline at end of file
+MSG_FAILED_TO_SWITCH_MEGAOS = "MegaOS への切り替えに失敗しました。続行できません。"
+
+MENU_DIAGNOSTICS = "診断情報"
+MSG_DIAGNOSTICS_TITLE = "診断情報"
+MSG_DIAGNOSTICS_EMPTY = "まだ計測された操作はありません。"
+MSG_DIAGNOSTICS_HOTKEYS_TEMPLATE = "ホットキー：処理済み={delivered}、統合={coalesced}、破棄したオートリピート={repeats_dropped}、破棄したチャタリング={bounces_dropped}"
+MSG_DIAGNOSTICS_LOG_DROPPED_TEMPLATE = "破棄したログレコード：{count}"
+MSG_DIAGNOSTICS_NOTIFICATIONS = "通知"
+MSG_DIAGNOSTICS_MEMORY = "メモリ"
+MENU_QUIET_NOTIFICATIONS = "通知を表示しない"
+MENU_MUTE_ALL_MICROPHONES = "すべてのマイクをミュート"
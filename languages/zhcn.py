@@ -12,8 +12,11 @@ MSGBOX_ERROR_TITLE = "错误"
 MSG_MICROPHONE_TOGGLE = "麦克风控制"
 MSG_MICROPHONE_TOGGLED_ON = "✅ 麦克风：启用"
 MSG_MICROPHONE_TOGGLED_OFF = "🚫 麦克风：禁用"
+MENU_MIC_STATE_MUTED = "已静音"
+MENU_MIC_STATE_UNMUTED = "未静音"
 
 MSG_H3CCC_RUNNING = "检测到官方 H3C 控制中心正在运行！请先卸载或关闭它，然后才能使用此程序。若需要更多支持，请查看 GitHub 页面。"
+MSG_H3CCC_CHECK_FAILED_TEMPLATE = "无法检测官方 H3C 控制中心是否正在运行：{error}\n如果它正在运行，请先关闭；或在 config.py 中设置 IS_SKIP_H3CCC_CHECK = True 以跳过此检查。"
 
 MSG_ALREADY_RUNNING = "Open H3C 系统控制中心已在运行。"
 
@@ -25,4 +28,14 @@ MENU_ABOUT = "关于"
 MSG_ABOUT_TITLE = "关于程序"
 MSG_ABOUT_TEXT_TEMPLATE = "Open H3C System Control\n版本: {version}\nby Remik1r3n and other contributors.\n\n本程序在 GPLv3 许可下发布。\nhttps://github.com/Remik1r3n/OpenH3CSystemControl"
 MSG_MEGAOS_SWITCH_NEXT_REBOOT = "将在下一次重启时切换到 MegaOS。"
-MSG_FAILED_TO_SWITCH_MEGAOS = "切换到 MegaOS 时出错，无法继续。"
\ No newline at end of file
+MSG_FAILED_TO_SWITCH_MEGAOS = "切换到 MegaOS 时出错，无法继续。"
+
+MENU_DIAGNOSTICS = "诊断信息"
+MSG_DIAGNOSTICS_TITLE = "诊断信息"
+MSG_DIAGNOSTICS_EMPTY = "尚未记录任何操作。"
+MSG_DIAGNOSTICS_HOTKEYS_TEMPLATE = "热键：已处理={delivered}，已合并={coalesced}，丢弃的自动重复={repeats_dropped}，丢弃的抖动={bounces_dropped}"
+MSG_DIAGNOSTICS_LOG_DROPPED_TEMPLATE = "丢弃的日志记录：{count}"
+MSG_DIAGNOSTICS_NOTIFICATIONS = "通知"
+MSG_DIAGNOSTICS_MEMORY = "内存"
+MENU_QUIET_NOTIFICATIONS = "免打扰（不显示通知）"
+MENU_MUTE_ALL_MICROPHONES = "静音所有麦克风"
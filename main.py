@@ -4,24 +4,26 @@
 
 import sys
 import os
-import keyboard
 import ctypes
-from PyQt6.QtCore import Qt
-from PyQt6.QtWidgets import (QApplication, QSystemTrayIcon, QMenu, 
-                             QMessageBox)
-from PyQt6.QtGui import QIcon, QAction, QCursor
-from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+from concurrent.futures import Future
 
-from loguru import logger
-from config import *
-from _version import __version__
-from languages.auto import apply_language
-from modules.h3c_sound import start_h3c_sound, stop_h3c_sound
-from modules.microphone_control import toggle_microphone, is_microphone_mute
-from modules.check_official_h3ccc import is_official_h3c_control_center_running
-from modules.switch_to_megaos import change_boot_order
-from modules.single_instance import SingleInstance
+from modules import ipc
+from modules import log_setup
+from modules import startup_profiler
 
+APP_ID = "OpenH3CSystemControl"
+
+# Commands for the running instance (--toggle-mic, --status, ...) are sent
+# from here, before Qt, pycaw or keyboard are imported.
+_ipc_command = ipc.command_from_argv(sys.argv)
+if _ipc_command is not None:
+    sys.exit(ipc.run_client(APP_ID, _ipc_command))
+
+# Start before the heavy imports below, so they are timed as well.
+startup_profiler.start_from_argv(
+    sys.argv,
+    os.path.dirname(sys.executable if getattr(sys, "frozen", False) else os.path.abspath(__file__)),
+)
 
 def _set_safe_working_directory() -> None:
     """Set a stable working directory.
@@ -44,8 +46,59 @@ def _set_safe_working_directory() -> None:
 
 _set_safe_working_directory()
 
+# All logging goes through one background writer, see modules.log_setup.
+import config
+log_setup.setup_logging(
+    max_bytes=config.LOG_MAX_BYTES,
+    rotate_hours=config.LOG_ROTATE_HOURS,
+    backup_count=config.LOG_BACKUP_COUNT,
+)
+
+# --headless runs the hotkeys, microphone and MegaOS switch without Qt.
+if __name__ == "__main__" and "--headless" in sys.argv[1:]:
+    from modules import headless
+    sys.exit(headless.main(APP_ID))
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import (QApplication, QSystemTrayIcon, QMenu, 
+                             QMessageBox)
+from PyQt6.QtGui import QIcon, QAction, QCursor, QPixmapCache
+from PyQt6.QtCore import QObject, pyqtSignal, QTimer
+
+from loguru import logger
+from config import *
+from _version import __version__
+from languages.auto import apply_language, get_language_cache_key, get_language_module_name
+from modules.h3c_sound import start_h3c_sound, stop_h3c_sound, is_h3c_sound_installed
+from modules.microphone_control import get_capture_endpoints, is_mute_all, set_mute_all
+from modules.audio_worker import OP_MUTE, OP_QUERY, OP_TOGGLE, OP_UNMUTE, AudioWorker
+from modules.microphone_state import state as mic_state
+from modules.check_official_h3ccc import is_official_h3c_control_center_running
+from modules.megaos_switch_job import MegaOSSwitchJob
+from modules.hotkey_dispatch import HotkeyDispatcher
+from modules import hook_watchdog
+from modules import keyboard_hook
+from modules.single_instance import SingleInstance
+from modules.startup_cache import get_startup_cache
+from modules.startup_orchestrator import StartupOrchestrator
+from modules import efivars
+from modules import metrics
+from modules.notifications import NotificationManager
+from modules import memory_budget
+from modules.process_index import get_process_index
+from modules import switch_to_megaos
+from modules import trace_recorder
+from modules import wakeup_audit
+from modules.tray_icons import (TrayIconAtlas, STATE_IDLE, STATE_UNMUTED, STATE_MUTED,
+                                STATE_BUSY, STATE_ERROR)
+
+startup_profiler.mark("imports_done")
+
+# Values from the previous run (language, MegaOS entry, capture device).
+_startup_cache = get_startup_cache()
+
 # Load language constants based on system language.
-_selected_language_module = apply_language(globals())
+_selected_language_module = apply_language(globals(), cache=_startup_cache)
 logger.info(f"Language module selected: {_selected_language_module}")
 
 def show_startup_blocking_error(title: str, message: str) -> None:
@@ -70,7 +123,7 @@ def show_startup_blocking_error(title: str, message: str) -> None:
         QMessageBox.critical(None, title, message)
     except Exception:
         # As a last resort, avoid crashing during error handling.
-        print(f"{title}: {message}")
+        logger.error(f"{title}: {message}")
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -87,21 +140,35 @@ class KeySignal(QObject):
     Helper class to emit signals from the background keyboard thread 
     to the main Qt UI thread.
     """
-    mic_key_pressed = pyqtSignal()
-    megaos_key_pressed = pyqtSignal()
+    mic_key_pressed = pyqtSignal(object)
+    megaos_key_pressed = pyqtSignal(object)
+
+class MicStateSignal(QObject):
+    """
+    Carries microphone state changes from COM callback threads
+    to the main Qt UI thread.
+    """
+    changed = pyqtSignal(object)
+
+class AudioSignal(QObject):
+    """
+    Carries results from the audio worker thread to the main Qt UI
+    thread.
+    """
+    finished = pyqtSignal(object)
+
+class IpcSignal(QObject):
+    """
+    Carries commands from the IPC listener thread to the main Qt UI
+    thread. The second argument is a Future for the reply.
+    """
+    command_received = pyqtSignal(str, object)
 
 class OpenH3CControlCenter:
     def __init__(self):
         logger.info("Initializing...")
         self.app = QApplication(sys.argv)
-        if not IS_SKIP_H3CCC_CHECK:
-            if is_official_h3c_control_center_running():
-                show_startup_blocking_error(MSGBOX_ERROR_TITLE, MSG_H3CCC_RUNNING)
-                sys.exit(1)
-            else:
-                logger.info("Official H3C Control Center not running, so continue.")
-        else:
-            logger.info("Skipping official H3C Control Center check.")
+        startup_profiler.mark("qapplication_created")
 
         # Prevent the app from exiting when the last window is closed 
         # (since we only use a tray icon)
@@ -109,31 +176,100 @@ class OpenH3CControlCenter:
 
         # Signal bridge for thread safety
         self.signals = KeySignal()
-        self.signals.mic_key_pressed.connect(self.handle_mic_key)
-        self.signals.megaos_key_pressed.connect(self.handle_megaos_key)
+        # Queued even when emitted on the UI thread: a coalesced follow-up is
+        # delivered from inside the previous action's action_finished().
+        self.signals.mic_key_pressed.connect(self.handle_mic_key, Qt.ConnectionType.QueuedConnection)
+        self.signals.megaos_key_pressed.connect(self.handle_megaos_key, Qt.ConnectionType.QueuedConnection)
 
         # State tracking
-        self.sound_process = None
+        self.megaos_job = None
+        self.ipc_server = None
+        self.metrics_exporter = None
+        # Hotkey press being handled, for the per-stage latency metrics
+        self.current_hotkey_event = None
+        # Tray icon state; the last action failed while tray_error is set
+        self.tray_state = None
+        self.tray_error = False
+        # Mute state of all capture devices together (None if mixed), shown
+        # instead of the default device's while "mute all" is on
+        self.capture_muted = None
 
         # Setup UI
         self.setup_tray()
+        self.notifications = NotificationManager(
+            show=self.tray_icon.showMessage,
+            schedule=wakeup_audit.counted_scheduler(
+                "notifications", lambda delay, callback: QTimer.singleShot(int(delay * 1000), callback)),
+            min_interval=NOTIFICATION_MIN_INTERVAL_SECONDS,
+            max_age=NOTIFICATION_MAX_AGE_SECONDS,
+            quiet=IS_QUIET_NOTIFICATIONS,
+        )
+
+        # Trim memory while nobody is using the app
+        self.memory_budget = memory_budget.MemoryBudget(
+            MEMORY_BUDGET_IDLE_SECONDS,
+            schedule=wakeup_audit.counted_scheduler(
+                "memory_budget", lambda delay, callback: QTimer.singleShot(int(delay * 1000), callback)),
+            enabled=IS_ENABLE_MEMORY_BUDGET,
+        )
+        self.memory_budget.add_releaser("process names", get_process_index().clear)
+        self.memory_budget.add_releaser("Qt pixmap cache", QPixmapCache.clear)
+        self.memory_budget.add_releaser("stdlib caches", memory_budget.release_common_caches)
+
+        # Follow the microphone state, whoever changes it
+        self.mic_signals = MicStateSignal()
+        self.mic_signals.changed.connect(self.on_mic_state_changed)
+        mic_state.subscribe(self.mic_signals.changed.emit)
+        set_mute_all(IS_MUTE_ALL_MICROPHONES)
+
+        # Every microphone (COM) call runs on the audio worker thread
+        self.audio_signals = AudioSignal()
+        self.audio_signals.finished.connect(self.on_audio_result)
+        self.audio = AudioWorker(on_result=self.on_audio_done)
+        mic_state.set_reopen_runner(self.audio.post)
+        self.audio.start()
 
         # Setup Logic
         self.setup_hotkeys()
 
+        # Commands from later launches (--toggle-mic, --status, ...)
+        self.ipc_signals = IpcSignal()
+        self.ipc_signals.command_received.connect(self.on_ipc_command)
+        self.ipc_server = ipc.IpcServer(APP_ID, self.handle_ipc_command)
+        try:
+            self.ipc_server.start()
+        except Exception as e:
+            logger.error(f"Failed to start IPC server: {e}")
+
+        # Optional Prometheus endpoint for fleet tooling (127.0.0.1 only)
+        if IS_ENABLE_METRICS_EXPORTER:
+            self.metrics_exporter = metrics.MetricsExporter(METRICS_EXPORTER_PORT)
+            try:
+                self.metrics_exporter.start()
+                logger.info(f"Metrics exporter listening on 127.0.0.1:{METRICS_EXPORTER_PORT}")
+            except Exception as e:
+                logger.error(f"Failed to start metrics exporter: {e}")
+                self.metrics_exporter = None
+
+        # Remember where the MegaOS entry is between runs
+        switch_to_megaos.set_entry_cache(_startup_cache)
+
+        # Everything else warms up in parallel once the tray is usable
+        self.start_warmup()
+
     def setup_tray(self):
         """Initialize the System Tray Icon and Menu."""
         self.tray_icon = QSystemTrayIcon()
         
-        # Icon
+        # Icons: every state is rendered here once, at every size and
+        # device-pixel ratio, so changing state is only a setIcon()
         icon_path = resource_path("TrayIcon.png")
-        if os.path.exists(icon_path):
-            self.icon = QIcon(icon_path)
-        else:
-            # Fallback icon
-            self.icon = QIcon.fromTheme("computer")
-            
-        self.tray_icon.setIcon(self.icon)
+        # Fallback icon
+        fallback = None if os.path.exists(icon_path) else QIcon.fromTheme("computer")
+        self.icon_atlas = TrayIconAtlas.from_file(icon_path, fallback)
+        self.icon_atlas.render()
+        startup_profiler.mark("tray_icons_rendered")
+        self.update_tray_icon()
         self.tray_icon.setToolTip(MENU_TRAY_TOOLTIP)
 
         # Context Menu
@@ -148,12 +284,12 @@ class OpenH3CControlCenter:
 
         # Toggle Microphone Trigger
         self.mic_action = QAction(MENU_TOGGLE_MIC, self.menu)
-        self.mic_action.triggered.connect(self.handle_mic_key)
+        self.mic_action.triggered.connect(lambda: self.handle_mic_key())
         self.menu.addAction(self.mic_action)
 
         # Switch to MegaOS Trigger
         self.mega_action = QAction(MENU_SWITCH_MEGAOS, self.menu)
-        self.mega_action.triggered.connect(self.handle_megaos_key)
+        self.mega_action.triggered.connect(lambda: self.handle_megaos_key())
         self.menu.addAction(self.mega_action)
 
         # Start H3CSound Settings UI
@@ -162,7 +298,26 @@ class OpenH3CControlCenter:
         self.menu.addAction(self.h3c_action)
 
         self.menu.addSeparator()
+
+        # Quiet Notifications Toggle
+        self.quiet_action = QAction(MENU_QUIET_NOTIFICATIONS, self.menu)
+        self.quiet_action.setCheckable(True)
+        self.quiet_action.setChecked(IS_QUIET_NOTIFICATIONS)
+        self.quiet_action.toggled.connect(lambda checked: self.notifications.set_quiet(checked))
+        self.menu.addAction(self.quiet_action)
+
+        # Mute All Microphones Toggle
+        self.mute_all_action = QAction(MENU_MUTE_ALL_MICROPHONES, self.menu)
+        self.mute_all_action.setCheckable(True)
+        self.mute_all_action.setChecked(IS_MUTE_ALL_MICROPHONES)
+        self.mute_all_action.toggled.connect(self.on_mute_all_toggled)
+        self.menu.addAction(self.mute_all_action)
         
+        # Diagnostics Action (latency metrics)
+        diagnostics_action = QAction(MENU_DIAGNOSTICS, self.menu)
+        diagnostics_action.triggered.connect(self.handle_diagnostics)
+        self.menu.addAction(diagnostics_action)
+
         # About Action
         about_action = QAction(MENU_ABOUT, self.menu)
         about_action.triggered.connect(self.handle_about)
@@ -175,7 +330,7 @@ class OpenH3CControlCenter:
 
         # Exit Action
         exit_action = QAction(MENU_EXIT, self.menu)
-        exit_action.triggered.connect(self.quit_app)
+        exit_action.triggered.connect(lambda: self.quit_app())
         self.menu.addAction(exit_action)
 
         # Set the standard right-click context menu
@@ -185,8 +340,77 @@ class OpenH3CControlCenter:
         self.tray_icon.activated.connect(self.on_tray_activated)
 
         self.tray_icon.show()
+        startup_profiler.mark("tray_shown")
         logger.info("Tray Icon initialized!")
 
+    def start_warmup(self):
+        """Run the conflict check and warm-up tasks on a worker pool."""
+        self.warmup = StartupOrchestrator()
+        if not IS_SKIP_H3CCC_CHECK:
+            self.warmup.add("conflict_check", is_official_h3c_control_center_running)
+        else:
+            logger.info("Skipping official H3C Control Center check.")
+        self.warmup.add("language", self.check_cached_language)
+        self.warmup.add("mic_endpoint", self.open_mic_endpoint)
+        self.warmup.add("megaos_entry", self.prefetch_megaos_entry)
+        self.warmup.add("h3c_sound", is_h3c_sound_installed)
+        self.warmup.task_finished.connect(self.on_warmup_task_finished)
+        self.warmup.task_failed.connect(self.on_warmup_task_failed)
+        self.warmup.all_finished.connect(self.on_warmup_finished)
+        self.warmup.start()
+
+    def on_warmup_task_finished(self, name, result, seconds):
+        if name == "conflict_check":
+            if result:
+                show_startup_blocking_error(MSGBOX_ERROR_TITLE, MSG_H3CCC_RUNNING)
+                self.quit_app(exit_code=1)
+            else:
+                logger.info("Official H3C Control Center not running, so continue.")
+        elif name == "language":
+            if result is None:
+                _startup_cache.invalidate(name)
+            else:
+                _startup_cache.put(name, *result)
+        elif name == "h3c_sound":
+            self.h3c_action.setEnabled(bool(result))
+
+    def on_warmup_task_failed(self, name, error, seconds):
+        if name == "conflict_check":
+            # Not knowing is treated like finding it running.
+            logger.error(f"Official H3C Control Center check failed: {error}")
+            show_startup_blocking_error(MSGBOX_ERROR_TITLE, MSG_H3CCC_CHECK_FAILED_TEMPLATE.format(error=error))
+            self.quit_app(exit_code=1)
+        elif name == "language":
+            _startup_cache.invalidate(name)
+        elif name == "h3c_sound":
+            self.h3c_action.setEnabled(False)
+
+    def on_warmup_finished(self):
+        timings = ", ".join(f"{name}={seconds * 1000:.0f}ms" for name, seconds in self.warmup.timings.items())
+        logger.info(f"Startup warm-up done: {timings}")
+        _startup_cache.save()
+        hook_watchdog.reduce_gc_pauses(GC_THRESHOLDS)
+        self.memory_budget.started()
+        # --audit-wakeups: from here on the app should be idle
+        wakeup_audit.start_from_argv(sys.argv, os.path.dirname(log_setup.default_log_dir()))
+
+    def prefetch_megaos_entry(self):
+        store = efivars.default_store() if IS_USE_NATIVE_UEFI_BACKEND else None
+        return switch_to_megaos.prefetch_entry(store=store)
+
+    def check_cached_language(self):
+        """Full language detection; a change applies from the next launch."""
+        return get_language_cache_key(), get_language_module_name()
+
+    def open_mic_endpoint(self):
+        self.audio.call(self.open_capture_devices).result()
+
+    def open_capture_devices(self):
+        """Audio thread: open the endpoints ahead of the first key press."""
+        mic_state.start()
+        if is_mute_all():
+            get_capture_endpoints()
+
     def on_tray_activated(self, reason):
         if reason == QSystemTrayIcon.ActivationReason.Trigger:
             # Ensure the menu is on top
@@ -199,25 +423,208 @@ class OpenH3CControlCenter:
 
     def setup_hotkeys(self):
         """
-        Hooks global hotkeys using the keyboard library.
+        Hooks the global hotkeys from HOTKEY_BINDINGS with one keyboard hook.
         We use callbacks to emit signals to keep the Qt Loop happy.
+        Raw events pass through the dispatcher first, which drops
+        auto-repeats and bounces and coalesces presses during an action.
         """
+        # Recent hotkey events, for --dump-trace and crash reports
+        self.hotkey_trace = trace_recorder.TraceRecorder(HOTKEY_TRACE_EVENTS) if HOTKEY_TRACE_EVENTS else None
+        if self.hotkey_trace is not None:
+            trace_recorder.dump_on_crash(self.hotkey_trace)
+        self.hotkeys = HotkeyDispatcher(self.deliver_hotkey, recorder=self.hotkey_trace)
+        self.keyboard_hook = None
+        self.hook_watchdog = None
+        bindings = keyboard_hook.action_bindings(HOTKEY_BINDINGS)
+        # Key name -> action, e.g. "f20" -> "toggle_mic"
+        self.hotkey_actions = {keyboard_hook.key_name(key): action for key, action in bindings.items()}
+        for key, action in self.hotkey_actions.items():
+            # Mic toggles coalesce; MegaOS opens a dialog, extra presses are dropped
+            self.hotkeys.bind(key, coalesce=keyboard_hook.ACTION_COALESCE[action])
         try:
-            # F20: Microphone Toggle
-            keyboard.on_press_key("f20", lambda _: self.signals.mic_key_pressed.emit())
-            
-            # F21: MegaOS Switch
-            keyboard.on_press_key("f21", lambda _: self.signals.megaos_key_pressed.emit())
-            
+            self.keyboard_hook = keyboard_hook.KeyboardHook(bindings, self.hotkeys.on_key_event)
+            # Installs the hook, and re-installs it if Windows drops it
+            self.hook_watchdog = hook_watchdog.HookWatchdog(
+                self.keyboard_hook, interval_seconds=HOOK_WATCHDOG_INTERVAL_SECONDS)
+            self.hook_watchdog.start()
+
+            startup_profiler.mark("hotkeys_hooked")
             logger.info("Global hotkeys hooked!")
         except ImportError:
             logger.error("Error: 'keyboard' library not found. Global keys won't work.")
         except Exception as e:
             logger.error(f"Failed to hook keys (Run as Admin?): {e}")
 
+    def on_mute_all_toggled(self, checked):
+        set_mute_all(checked)
+        if checked:
+            # Shown once the devices have been asked.
+            self.request_audio(OP_QUERY)
+        else:
+            self.show_mic_state()
+
+    def on_mic_state_changed(self, is_muted):
+        """The default device changed state, maybe from another app."""
+        if is_mute_all():
+            # The other devices may not follow it; ask them all.
+            self.request_audio(OP_QUERY)
+        else:
+            self.show_mic_state()
+
+    def shown_mute_state(self):
+        """Default device state, or all devices together in mute-all mode."""
+        return self.capture_muted if is_mute_all() else mic_state.muted
+
+    def show_mic_state(self):
+        """Refresh the tray tooltip, menu text and icon from the mute state."""
+        is_muted = self.shown_mute_state()
+        if is_muted is None:
+            self.tray_icon.setToolTip(MENU_TRAY_TOOLTIP)
+            self.mic_action.setText(MENU_TOGGLE_MIC)
+            self.update_tray_icon()
+            return
+        if is_muted:
+            state_text = MSG_MICROPHONE_TOGGLED_OFF
+            menu_state = MENU_MIC_STATE_MUTED
+        else:
+            state_text = MSG_MICROPHONE_TOGGLED_ON
+            menu_state = MENU_MIC_STATE_UNMUTED
+        self.tray_icon.setToolTip(f"{MENU_TRAY_TOOLTIP}\n{state_text}")
+        self.mic_action.setText(f"{MENU_TOGGLE_MIC} - {menu_state}")
+        self.update_tray_icon()
+
+    def update_tray_icon(self):
+        """Show the cached icon for the current state: busy, error or mic state."""
+        if self.megaos_job is not None and self.megaos_job.is_running():
+            state = STATE_BUSY
+        elif self.tray_error:
+            state = STATE_ERROR
+        elif self.shown_mute_state() is None:
+            state = STATE_IDLE
+        else:
+            state = STATE_MUTED if self.shown_mute_state() else STATE_UNMUTED
+        if state != self.tray_state:
+            self.tray_state = state
+            self.tray_icon.setIcon(self.icon_atlas.icon(state))
+
+    def deliver_hotkey(self, event):
+        """Called by the dispatcher (on the hook thread) for accepted presses."""
+        action = self.hotkey_actions.get(event.key)
+        if action == keyboard_hook.ACTION_TOGGLE_MIC:
+            self.signals.mic_key_pressed.emit(event)
+        elif action == keyboard_hook.ACTION_SWITCH_MEGAOS:
+            self.signals.megaos_key_pressed.emit(event)
+
+    def run_hotkey_action(self, event, action):
+        """Run action() and report start/finish to the dispatcher when it
+        came from a hotkey rather than the tray menu.
+
+        If action() returns True it only queued the work (a mic request);
+        the press stays in flight, so further presses coalesce, until
+        finish_hotkey_action() is called with the result.
+        """
+        with logger.contextualize(action=log_setup.action_id(event.key if event is not None else "menu")):
+            if event is not None:
+                self.hotkeys.action_started(event)
+                metrics.observe_hotkey_stage(event.key, "delivered", event.t_hook)
+                logger.debug(f"{event.key} queue delay: {event.queue_delay * 1000:.1f} ms")
+            self.current_hotkey_event = event
+            queued = False
+            try:
+                queued = action()
+            finally:
+                self.current_hotkey_event = None
+                if event is not None and not queued:
+                    self.finish_hotkey_action(event)
+                self.memory_budget.activity()
+
+    def finish_hotkey_action(self, event):
+        self.hotkeys.action_finished(event)
+        metrics.observe_hotkey_stage(event.key, "finished", event.t_hook)
+
+    def handle_ipc_command(self, command):
+        """Called on the IPC thread; runs the command on the UI thread."""
+        future = Future()
+        self.ipc_signals.command_received.emit(command, future)
+        return future.result(timeout=IPC_COMMAND_TIMEOUT_SECONDS)
+
+    def on_ipc_command(self, command, future):
+        with logger.contextualize(action=log_setup.action_id("ipc")):
+            self.run_ipc_command(command, future)
+        self.memory_budget.activity()
+
+    def run_ipc_command(self, command, future):
+        try:
+            if command == "toggle-mic":
+                # Answered with the status once the audio thread is done.
+                self.request_audio(OP_TOGGLE, reply=future)
+                return
+            elif command == "mute":
+                self.request_audio(OP_MUTE, reply=future)
+                return
+            elif command == "unmute":
+                self.request_audio(OP_UNMUTE, reply=future)
+                return
+            elif command == "dump-trace":
+                future.set_result(self.dump_hotkey_trace())
+                return
+            elif command == "switch-megaos":
+                # The confirmation dialog is modal; answer the caller first.
+                QTimer.singleShot(0, self.handle_megaos_key)
+                future.set_result({"ok": True, "result": "confirmation requested"})
+                return
+            elif command != "status":
+                future.set_result({"ok": False, "error": f"unknown command: {command}"})
+                return
+            self.reply_status(future)
+        except Exception as e:
+            future.set_result({"ok": False, "error": str(e)})
+
+    def dump_hotkey_trace(self):
+        if self.hotkey_trace is None:
+            return {"ok": False, "error": "hotkey trace is turned off (HOTKEY_TRACE_EVENTS = 0)"}
+        path = trace_recorder.default_dump_path()
+        return {"ok": True, "path": path, "events": self.hotkey_trace.dump(path)}
+
+    def reply_status(self, future):
+        future.set_result({
+            "ok": True,
+            "muted": self.shown_mute_state(),
+            "megaos_switch_running": self.megaos_job is not None and self.megaos_job.is_running(),
+            "version": __version__,
+        })
+
     def handle_h3c_sound(self):
         """Starts or stops the H3CSound Settings app."""
-        start_h3c_sound()
+        start_h3c_sound(idle_timeout=H3C_SOUND_IDLE_TIMEOUT_SECONDS)
+
+    def handle_diagnostics(self):
+        """Shows the latency metrics collected since startup."""
+        table = metrics.format_table(metrics.get_registry().snapshot()) or MSG_DIAGNOSTICS_EMPTY
+        stats = self.hotkeys.stats
+        lines = [
+            table,
+            "",
+            MSG_DIAGNOSTICS_HOTKEYS_TEMPLATE.format(
+                delivered=stats.delivered, coalesced=stats.coalesced,
+                repeats_dropped=stats.repeats_dropped, bounces_dropped=stats.bounces_dropped),
+            MSG_DIAGNOSTICS_LOG_DROPPED_TEMPLATE.format(count=log_setup.dropped_records()),
+        ]
+        if self.hook_watchdog is not None:
+            lines.append(self.hook_watchdog.format_line())
+        lines.append(f"{MSG_DIAGNOSTICS_NOTIFICATIONS}: "
+                     + ", ".join(f"{key}={value}" for key, value in self.notifications.stats.items()))
+        lines += ["", f"{MSG_DIAGNOSTICS_MEMORY}:"] + self.memory_budget.format_lines()
+        text = "\n".join(lines)
+        msg_box = QMessageBox(self.menu)
+        msg_box.setWindowTitle(MSG_DIAGNOSTICS_TITLE)
+        msg_box.setText(text)
+        msg_box.setIcon(QMessageBox.Icon.Information)
+        msg_box.setStandardButtons(QMessageBox.StandardButton.Ok)
+        msg_box.setWindowFlags(msg_box.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
+        msg_box.activateWindow()
+        msg_box.raise_()
+        msg_box.exec()
 
     def handle_about(self):
         """Shows the About dialog."""
@@ -234,37 +641,80 @@ class OpenH3CControlCenter:
         msg_box.raise_()
         msg_box.exec()
 
-    def handle_mic_key(self):
+    def handle_mic_key(self, event=None):
         """Logic when F20 is pressed."""
         logger.info("Microphone Toggle Triggered")
-        self.toggle_mic()
+        self.run_hotkey_action(event, self.toggle_mic)
 
     def toggle_mic(self):
         """Toggle microphone on/off"""
-        try:
-            toggle_microphone()
-            is_muted = is_microphone_mute()
-            if is_muted:
-                # Show notification
-                self.tray_icon.showMessage(
-                    MSG_MICROPHONE_TOGGLED_OFF,
-                    MSG_MICROPHONE_TOGGLE,
-                    QSystemTrayIcon.MessageIcon.Information,
-                    2000
-                )
+        return self.request_audio(OP_TOGGLE)
+
+    def set_mic_muted(self, muted):
+        """Mute or unmute the microphone; the result is shown when it's done."""
+        self.request_audio(OP_MUTE if muted else OP_UNMUTE)
+
+    def request_audio(self, op, reply=None):
+        """Queue a request for the audio thread; never waits for COM.
+        The tag carries the hotkey press (if any) and the IPC reply.
+        Returns False if it was refused, in which case no result follows."""
+        request = self.audio.submit(op, tag=(self.current_hotkey_event, reply))
+        if request.done():
+            # Refused outright (we are shutting down).
+            if reply is not None:
+                reply.set_result({"ok": False, "error": str(request.exception())})
+            return False
+        return True
+
+    def on_audio_done(self, result):
+        """Called on the audio thread after every request."""
+        event = result.tag[0]
+        if event is not None:
+            metrics.observe_hotkey_stage(event.key, "com_done", event.t_hook)
+        self.audio_signals.finished.emit(result)
+
+    def on_audio_result(self, result):
+        """Show the outcome of an audio request."""
+        event, reply = result.tag
+        if result.ok and is_mute_all():
+            self.capture_muted = result.muted
+        if not result.ok:
+            self.tray_error = True
+            self.update_tray_icon()
+        elif result.op == OP_QUERY:
+            self.show_mic_state()
+        else:
+            self.tray_error = False
+            self.show_mic_state()
+            # Show notification; fast toggles are merged into one toast
+            self.notifications.notify(
+                "mic",
+                MSG_MICROPHONE_TOGGLED_OFF if result.muted else MSG_MICROPHONE_TOGGLED_ON,
+                MSG_MICROPHONE_TOGGLE,
+                QSystemTrayIcon.MessageIcon.Information,
+                2000
+            )
+            if event is not None:
+                metrics.observe_hotkey_stage(event.key, "notified", event.t_hook)
+        if reply is not None:
+            if result.ok:
+                self.reply_status(reply)
             else:
-                self.tray_icon.showMessage(
-                    MSG_MICROPHONE_TOGGLED_ON,
-                    MSG_MICROPHONE_TOGGLE,
-                    QSystemTrayIcon.MessageIcon.Information,
-                    2000
-                )
-        except Exception as e:
-            print(f"Error toggling microphone: {e}")
+                reply.set_result({"ok": False, "error": result.error})
+        if event is not None:
+            # The press was in flight until now; delivers a coalesced one.
+            self.finish_hotkey_action(event)
 
-    def handle_megaos_key(self):
+    def handle_megaos_key(self, event=None):
         """Logic when F21 is pressed."""
         logger.info("MegaOS Switch Triggered!")
+        self.run_hotkey_action(event, self.confirm_megaos_switch)
+
+    def confirm_megaos_switch(self):
+        """Ask for confirmation, then start the switch job."""
+        if self.megaos_job is not None and self.megaos_job.is_running():
+            logger.info("MegaOS switch already in progress, ignoring.")
+            return
         msg_box = QMessageBox()
         
         # Set it to be always on top
@@ -286,31 +736,65 @@ class OpenH3CControlCenter:
         
         if reply == QMessageBox.StandardButton.Yes:
             logger.info("User confirmed MegaOS switch.")
-            boot_order_change_result = change_boot_order()
-            if boot_order_change_result == 0:
-                logger.info("Boot order changed successfully, rebooting...")
-            else:
-                logger.error(f"Failed to change boot order, error code: {boot_order_change_result}.")
-                # Pop up an error message box
-                error_box = QMessageBox()
-                error_box.setWindowFlags(error_box.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
-                error_box.setWindowTitle(MSGBOX_ERROR_TITLE)
-                error_box.setText(MSG_FAILED_TO_SWITCH_MEGAOS + f"\nError code: {boot_order_change_result}")
-                error_box.setIcon(QMessageBox.Icon.Critical)
-                error_box.exec()
-                return
-            os.system("shutdown /r /t 0")
+            # The switch runs on a worker thread, results come back as signals.
+            self.megaos_job = MegaOSSwitchJob(
+                timeout_seconds=MEGAOS_SWITCH_TIMEOUT_SECONDS,
+                use_native_uefi=IS_USE_NATIVE_UEFI_BACKEND,
+            )
+            self.megaos_job.stage_changed.connect(self.on_megaos_stage_changed)
+            self.megaos_job.succeeded.connect(self.on_megaos_switch_succeeded)
+            self.megaos_job.failed.connect(self.on_megaos_switch_failed)
+            self.megaos_job.timed_out.connect(lambda: self.on_megaos_switch_failed(-1))
+            self.megaos_job.cancelled.connect(self.on_megaos_switch_finished)
+            self.mega_action.setEnabled(False)
+            self.tray_error = False
+            self.megaos_job.start()
+            self.update_tray_icon()
         else:
             logger.info("User canceled MegaOS switch.")
 
-    def quit_app(self):
+    def on_megaos_stage_changed(self, stage):
+        logger.info(f"MegaOS switch stage: {stage}")
+
+    def on_megaos_switch_succeeded(self):
+        logger.info("Boot order changed successfully, rebooting...")
+        self.on_megaos_switch_finished()
+
+    def on_megaos_switch_failed(self, boot_order_change_result):
+        self.tray_error = True
+        self.on_megaos_switch_finished()
+        logger.error(f"Failed to change boot order, error code: {boot_order_change_result}.")
+        # Pop up an error message box
+        error_box = QMessageBox()
+        error_box.setWindowFlags(error_box.windowFlags() | Qt.WindowType.WindowStaysOnTopHint)
+        error_box.setWindowTitle(MSGBOX_ERROR_TITLE)
+        error_box.setText(MSG_FAILED_TO_SWITCH_MEGAOS + f"\nError code: {boot_order_change_result}")
+        error_box.setIcon(QMessageBox.Icon.Critical)
+        error_box.exec()
+
+    def on_megaos_switch_finished(self):
+        # The switch may have found (or dropped) the cached MegaOS entry.
+        _startup_cache.save()
+        self.mega_action.setEnabled(True)
+        self.update_tray_icon()
+
+    def quit_app(self, exit_code=0):
         """Clean up and exit."""
         logger.info("Exiting application...")
+        if self.megaos_job is not None and self.megaos_job.is_running():
+            self.megaos_job.cancel()
         try:
-            keyboard.unhook_all()
+            if self.hook_watchdog is not None:
+                self.hook_watchdog.stop()
         except Exception as e:
             logger.error(f"Error unhooking keyboard: {e}")
 
+        if self.ipc_server is not None:
+            self.ipc_server.stop()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        self.audio.stop()
+
         # Kill the sound app
         try:
             stop_h3c_sound()
@@ -319,11 +803,18 @@ class OpenH3CControlCenter:
         
         # Hide icon immediately so it doesn't linger in tray until mouseover
         self.tray_icon.hide() 
-        self.app.quit()
+        self.app.exit(exit_code)
 
     def run(self):
+        if startup_profiler.is_enabled():
+            # First event loop iteration: the tray is up and responsive.
+            QTimer.singleShot(0, self.finish_startup_profile)
         sys.exit(self.app.exec())
 
+    def finish_startup_profile(self):
+        startup_profiler.mark("event_loop_started")
+        startup_profiler.finish()
+
 if __name__ == "__main__":
     try:
         logger.info("Open H3C System Control starting...")
@@ -331,7 +822,7 @@ if __name__ == "__main__":
         _set_safe_working_directory()
 
         # Prevent multiple instances.
-        _single_instance_lock = SingleInstance("OpenH3CSystemControl")
+        _single_instance_lock = SingleInstance(APP_ID)
         if not _single_instance_lock.acquire():
             logger.warning("Another instance is already running; exiting.")
             try:
@@ -340,7 +831,7 @@ if __name__ == "__main__":
                 if sys.platform == "win32":
                     ctypes.windll.user32.MessageBoxW(0, msg, title, 0x00000040)  # MB_ICONINFORMATION
                 else:
-                    print(msg)
+                    logger.info(msg)
             except Exception:
                 pass
             sys.exit(0)
@@ -0,0 +1,218 @@
+"""Audio actor: one thread that owns COM and every endpoint object.
+
+Microphone calls used to run on whichever thread asked: the UI thread for
+a key press, a warm-up thread for the first endpoint, a short-lived thread
+after a device change. Each of them initialized COM on its own and never
+uninitialized it, and an endpoint activated on one thread was then used
+from another.
+
+AudioWorker runs a single long-lived thread instead. It initializes COM
+once, opens and caches every endpoint, and serves a FIFO queue of
+requests (mute, unmute, toggle, query, or any callable that must run
+there). `submit()` returns right away with a Future, so the caller never
+waits for COM. Requests run one at a time, in the order they were
+submitted. A toggle reads the state when it runs, not when it was queued,
+so two quick presses end up where they started. Each result also goes to
+`on_result`, which runs on the worker thread. The tray app turns it into
+a Qt signal; headless mode posts it to its event loop.
+
+When stopped, the thread drops every endpoint and uninitializes COM.
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from loguru import logger
+
+from modules import metrics
+from modules import microphone_control
+from modules.microphone_state import state as mic_state
+
+OP_MUTE = "mute"
+OP_UNMUTE = "unmute"
+OP_TOGGLE = "toggle"
+OP_QUERY = "query"
+_OP_CALL = "call"
+
+# Action names for metrics.timer(); toggle_mic keeps its old name.
+_TIMER_NAMES = {
+    OP_MUTE: "set_mic_muted",
+    OP_UNMUTE: "set_mic_muted",
+    OP_TOGGLE: "toggle_mic",
+    OP_QUERY: "query_mic",
+}
+
+
+@dataclass
+class AudioResult:
+    op: str
+    # False if the request raised or, for mute/unmute/toggle, the mute
+    # call failed; `error` says why.
+    ok: bool
+    # Mute state after the request (None if unknown). In mute-all mode,
+    # that of every capture device together (None if mixed).
+    muted: Optional[bool] = None
+    # The mute call reported success (mute/unmute/toggle only).
+    changed: bool = False
+    error: str = ""
+    # Whatever the caller passed to submit(), e.g. the hotkey event.
+    tag: Any = None
+    # Seconds the request waited in the queue.
+    queued: float = 0.0
+
+
+@dataclass
+class _Request:
+    op: str
+    future: Future
+    tag: Any = None
+    func: Optional[Callable[[], Any]] = None
+    submitted: float = 0.0
+
+
+class AudioWorker:
+    def __init__(self, on_result: Optional[Callable[[AudioResult], None]] = None) -> None:
+        """`on_result(result)` is called on the worker thread after every
+        mute/unmute/toggle/query request."""
+        self.on_result = on_result
+        self._queue: "queue.Queue[Optional[_Request]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._stopping = False
+        # Device notifications invalidate the endpoints here, not on COM's thread.
+        microphone_control.set_notification_runner(self.post)
+        self._thread = threading.Thread(target=self._run, name="audio", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Finish the queued requests, release the endpoints and end the thread."""
+        if self._stopping:
+            return
+        self._stopping = True
+        self._queue.put(None)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def submit(self, op: str, tag: Any = None) -> Future:
+        """Queue a mute/unmute/toggle/query request. The Future resolves to
+        an AudioResult."""
+        if op not in _TIMER_NAMES:
+            raise ValueError(f"Unknown audio request: {op}")
+        return self._put(_Request(op, Future(), tag=tag))
+
+    def call(self, func: Callable[[], Any]) -> Future:
+        """Run func() on the audio thread; the Future resolves to its result."""
+        return self._put(_Request(_OP_CALL, Future(), func=func))
+
+    def post(self, func: Callable[[], None]) -> None:
+        """Like call(), for when nobody waits for the result."""
+        self.call(func)
+
+    def _put(self, request: _Request) -> Future:
+        if self._stopping:
+            request.future.set_exception(RuntimeError("audio worker stopped"))
+            return request.future
+        request.submitted = time.perf_counter()
+        self._queue.put(request)
+        return request.future
+
+    def _run(self) -> None:
+        try:
+            microphone_control.enter_audio_thread()
+        except Exception as e:
+            logger.error(f"Cannot initialize the audio thread: {e}")
+        try:
+            while True:
+                request = self._queue.get()
+                if request is None:
+                    break
+                self._serve(request)
+        finally:
+            self._drain()
+            try:
+                microphone_control.leave_audio_thread()
+            except Exception as e:
+                logger.error(f"Cannot release the audio thread: {e}")
+            microphone_control.set_notification_runner(None)
+
+    def _drain(self) -> None:
+        # Anything queued behind the stop request is not served.
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if request is not None:
+                request.future.cancel()
+
+    def _serve(self, request: _Request) -> None:
+        if not request.future.set_running_or_notify_cancel():
+            return
+        if request.op == _OP_CALL:
+            try:
+                request.future.set_result(request.func())
+            except Exception as e:
+                request.future.set_exception(e)
+            return
+        result = self._execute(request)
+        request.future.set_result(result)
+        if self.on_result is not None:
+            try:
+                self.on_result(result)
+            except Exception as e:
+                logger.error(f"Audio result handler failed: {e}")
+
+    def _execute(self, request: _Request) -> AudioResult:
+        result = AudioResult(request.op, ok=False, tag=request.tag,
+                             queued=time.perf_counter() - request.submitted)
+        try:
+            with metrics.timer(_TIMER_NAMES[request.op]):
+                if request.op == OP_QUERY:
+                    result.muted = _current_state()
+                else:
+                    if request.op == OP_TOGGLE:
+                        muted = not _current_state()
+                    else:
+                        muted = request.op == OP_MUTE
+                    if muted:
+                        result.changed = microphone_control.disable_microphone()
+                    else:
+                        result.changed = microphone_control.enable_microphone()
+                    if result.changed:
+                        # Don't wait for the endpoint callback to report it.
+                        mic_state.set_muted(muted)
+                    else:
+                        # disable/enable_microphone() logged the reason.
+                        result.error = f"Cannot {'mute' if muted else 'unmute'} the microphone."
+                    result.muted = mic_state.muted
+                if microphone_control.is_mute_all():
+                    # mic_state only follows the default device.
+                    result.muted = microphone_control.aggregate_mute_state(
+                        microphone_control.get_capture_mute_states())
+            result.ok = not result.error
+        except Exception as e:
+            logger.error(f"Audio request {request.op} failed: {e}")
+            result.error = str(e)
+        return result
+
+
+def _current_state() -> bool:
+    muted = mic_state.muted
+    if muted is None or microphone_control.is_mute_all():
+        # No endpoint callback yet, or the default device is only one of
+        # several: ask the devices.
+        muted = microphone_control.is_microphone_mute()
+    return muted
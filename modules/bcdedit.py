@@ -0,0 +1,123 @@
+"""In-process bcdedit access for UEFI firmware boot entries.
+
+Runs `bcdedit /enum firmware /v` directly (no PowerShell) and parses its
+output into FirmwareEntry records.
+
+bcdedit localizes the block headers and the "identifier" label, but not
+the element names (description, device, path, displayorder, ...), and the
+identifier is always the first element of a block. The parser relies only
+on that layout, so it works for every display language.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+# bcdedit writes in the OEM code page when its output is redirected.
+_OUTPUT_ENCODING = "oem" if os.name == "nt" else None
+
+_DASH_LINE = re.compile(r"^-{3,}\s*$")
+_ELEMENT_LINE = re.compile(r"^(\S+)\s+(.*?)\s*$")
+
+FWBOOTMGR = "{fwbootmgr}"
+
+
+@dataclass
+class FirmwareEntry:
+    # Block header as printed, e.g. "Firmware Application (101fffff)".
+    header: str
+    identifier: str
+    description: Optional[str] = None
+    device: Optional[str] = None
+    path: Optional[str] = None
+    # Every element of the block; multi-line values become several items.
+    elements: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def parse_firmware_entries(text: str) -> List[FirmwareEntry]:
+    """Parse `bcdedit /enum firmware /v` output."""
+    entries: List[FirmwareEntry] = []
+    lines = text.splitlines()
+
+    current: Optional[FirmwareEntry] = None
+    last_key: Optional[str] = None
+    index = 0
+    while index < len(lines):
+        line = lines[index].rstrip()
+        next_line = lines[index + 1] if index + 1 < len(lines) else ""
+        index += 1
+
+        if line and _DASH_LINE.match(next_line):
+            current = FirmwareEntry(header=line.strip(), identifier="")
+            entries.append(current)
+            last_key = None
+            index += 1
+            continue
+
+        if not line.strip() or current is None:
+            continue
+
+        if line[0].isspace():
+            # Continuation of a multi-valued element such as displayorder.
+            if last_key is not None:
+                current.elements[last_key].append(line.strip())
+            continue
+
+        match = _ELEMENT_LINE.match(line)
+        if not match:
+            continue
+        key, value = match.group(1), match.group(2)
+        if not current.elements and not current.identifier:
+            # First element is the (localized) identifier.
+            current.identifier = value
+            key = "identifier"
+        current.elements.setdefault(key, []).append(value)
+        last_key = key
+
+    for entry in entries:
+        entry.description = _first(entry.elements.get("description"))
+        entry.device = _first(entry.elements.get("device"))
+        entry.path = _first(entry.elements.get("path"))
+    return [entry for entry in entries if entry.identifier]
+
+
+def find_entry(entries: List[FirmwareEntry], description: str) -> Optional[FirmwareEntry]:
+    """First entry whose description starts with `description`, ignoring case."""
+    wanted = description.casefold()
+    for entry in entries:
+        if entry.description and entry.description.casefold().startswith(wanted):
+            return entry
+    return None
+
+
+def enum_firmware(runner=subprocess.run) -> subprocess.CompletedProcess:
+    return runner(
+        ["bcdedit", "/enum", "firmware", "/v"],
+        capture_output=True,
+        text=True,
+        encoding=_OUTPUT_ENCODING,
+        errors="replace",
+        creationflags=_NO_WINDOW,
+    )
+
+
+def set_first_in_display_order(identifier: str, runner=subprocess.run) -> subprocess.CompletedProcess:
+    """Move a firmware entry to the front of the UEFI BootOrder."""
+    return runner(
+        ["bcdedit", "/set", FWBOOTMGR, "displayorder", identifier, "/addfirst"],
+        capture_output=True,
+        text=True,
+        encoding=_OUTPUT_ENCODING,
+        errors="replace",
+        creationflags=_NO_WINDOW,
+    )
+
+
+def _first(values: Optional[List[str]]) -> Optional[str]:
+    return values[0] if values else None
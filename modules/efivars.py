@@ -0,0 +1,264 @@
+"""Native UEFI variable access.
+
+Reads and writes firmware variables (BootOrder, Boot####, the H3C
+BscInstallSystem flag) without starting any child process:
+
+- on Windows through Get/SetFirmwareEnvironmentVariableExW,
+- anywhere else through an efivarfs-style directory, where each variable is
+  a file named "<Name>-<guid>" holding a 4-byte attribute word followed by
+  the data. Pointing it at a temporary directory gives a fake variable store.
+
+EFI_LOAD_OPTION (UEFI spec 3.1.3) is decoded and encoded here as well.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import os
+import struct
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+EFI_GLOBAL_VARIABLE_GUID = "8be4df61-93ca-11d2-aa0d-00e098032b8c"
+H3C_VENDOR_GUID = "e896daf2-380d-4c77-aacb-098efbc05c9d"
+
+EFI_VARIABLE_NON_VOLATILE = 0x1
+EFI_VARIABLE_BOOTSERVICE_ACCESS = 0x2
+EFI_VARIABLE_RUNTIME_ACCESS = 0x4
+DEFAULT_ATTRIBUTES = (EFI_VARIABLE_NON_VOLATILE
+                      | EFI_VARIABLE_BOOTSERVICE_ACCESS
+                      | EFI_VARIABLE_RUNTIME_ACCESS)
+
+LOAD_OPTION_ACTIVE = 0x1
+
+_LOAD_OPTION_HEADER = struct.Struct("<IH")
+
+
+class VariableStore:
+    def read(self, name: str, guid: str) -> Optional[Tuple[int, bytes]]:
+        """Return (attributes, data), or None if the variable does not exist."""
+        raise NotImplementedError
+
+    def write(self, name: str, guid: str, data: bytes, attributes: int = DEFAULT_ATTRIBUTES) -> None:
+        raise NotImplementedError
+
+
+class EfivarfsVariableStore(VariableStore):
+    def __init__(self, root: str = "/sys/firmware/efi/efivars") -> None:
+        self.root = root
+
+    def _path(self, name: str, guid: str) -> str:
+        return os.path.join(self.root, f"{name}-{guid.lower()}")
+
+    def read(self, name: str, guid: str) -> Optional[Tuple[int, bytes]]:
+        try:
+            with open(self._path(name, guid), "rb") as fh:
+                raw = fh.read()
+        except FileNotFoundError:
+            return None
+        if len(raw) < 4:
+            raise OSError(f"Truncated variable {name}-{guid}")
+        return struct.unpack_from("<I", raw)[0], raw[4:]
+
+    def write(self, name: str, guid: str, data: bytes, attributes: int = DEFAULT_ATTRIBUTES) -> None:
+        # efivarfs wants attributes and data in a single write().
+        with open(self._path(name, guid), "wb", buffering=0) as fh:
+            fh.write(struct.pack("<I", attributes) + bytes(data))
+
+
+class WindowsVariableStore(VariableStore):
+    _ERROR_INSUFFICIENT_BUFFER = 122
+    _ERROR_ENVVAR_NOT_FOUND = 203
+    _ERROR_PRIVILEGE_NOT_HELD = 1314
+
+    def __init__(self) -> None:
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._privilege_enabled = False
+
+    def _enable_privilege(self) -> None:
+        """Firmware variable calls need SeSystemEnvironmentPrivilege, which
+        elevated processes hold but have disabled by default."""
+        if self._privilege_enabled:
+            return
+        from ctypes import wintypes
+
+        advapi32 = ctypes.WinDLL("advapi32", use_last_error=True)
+
+        class LUID(ctypes.Structure):
+            _fields_ = [("LowPart", wintypes.DWORD), ("HighPart", wintypes.LONG)]
+
+        class TOKEN_PRIVILEGES(ctypes.Structure):
+            _fields_ = [("PrivilegeCount", wintypes.DWORD),
+                        ("Luid", LUID),
+                        ("Attributes", wintypes.DWORD)]
+
+        TOKEN_ADJUST_PRIVILEGES = 0x20
+        TOKEN_QUERY = 0x8
+        SE_PRIVILEGE_ENABLED = 0x2
+
+        token = wintypes.HANDLE()
+        self._kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+        if not advapi32.OpenProcessToken(self._kernel32.GetCurrentProcess(),
+                                         TOKEN_ADJUST_PRIVILEGES | TOKEN_QUERY,
+                                         ctypes.byref(token)):
+            raise ctypes.WinError(ctypes.get_last_error())
+        try:
+            privileges = TOKEN_PRIVILEGES()
+            privileges.PrivilegeCount = 1
+            privileges.Attributes = SE_PRIVILEGE_ENABLED
+            if not advapi32.LookupPrivilegeValueW(None, "SeSystemEnvironmentPrivilege",
+                                                  ctypes.byref(privileges.Luid)):
+                raise ctypes.WinError(ctypes.get_last_error())
+            advapi32.AdjustTokenPrivileges(token, False, ctypes.byref(privileges), 0, None, None)
+            # AdjustTokenPrivileges "succeeds" even if nothing was assigned.
+            error = ctypes.get_last_error()
+            if error == self._ERROR_PRIVILEGE_NOT_HELD:
+                raise PermissionError("SeSystemEnvironmentPrivilege is not held (run as admin).")
+            if error:
+                raise ctypes.WinError(error)
+        finally:
+            self._kernel32.CloseHandle(token)
+        self._privilege_enabled = True
+
+    @staticmethod
+    def _guid(guid: str) -> str:
+        return "{" + guid.upper() + "}"
+
+    def _raise_last_error(self) -> None:
+        error = ctypes.get_last_error()
+        if error == self._ERROR_PRIVILEGE_NOT_HELD:
+            raise PermissionError("SeSystemEnvironmentPrivilege is not held (run as admin).")
+        raise ctypes.WinError(error)
+
+    def read(self, name: str, guid: str) -> Optional[Tuple[int, bytes]]:
+        from ctypes import wintypes
+
+        self._enable_privilege()
+        size = 256
+        while True:
+            buffer = ctypes.create_string_buffer(size)
+            attributes = wintypes.DWORD(0)
+            length = self._kernel32.GetFirmwareEnvironmentVariableExW(
+                name, self._guid(guid), buffer, size, ctypes.byref(attributes))
+            if length:
+                return attributes.value, buffer.raw[:length]
+            error = ctypes.get_last_error()
+            if error == self._ERROR_ENVVAR_NOT_FOUND:
+                return None
+            if error == self._ERROR_INSUFFICIENT_BUFFER and size < 1 << 16:
+                size *= 4
+                continue
+            self._raise_last_error()
+
+    def write(self, name: str, guid: str, data: bytes, attributes: int = DEFAULT_ATTRIBUTES) -> None:
+        self._enable_privilege()
+        buffer = ctypes.create_string_buffer(bytes(data), len(data))
+        if not self._kernel32.SetFirmwareEnvironmentVariableExW(
+                name, self._guid(guid), buffer, len(data), attributes):
+            self._raise_last_error()
+
+
+def default_store() -> VariableStore:
+    if os.name == "nt":
+        return WindowsVariableStore()
+    return EfivarfsVariableStore()
+
+
+@dataclass
+class LoadOption:
+    number: int
+    attributes: int
+    description: str
+    # Raw EFI_DEVICE_PATH_PROTOCOL list; kept opaque, it is written back as-is.
+    file_path_list: bytes
+    optional_data: bytes = b""
+
+    @property
+    def active(self) -> bool:
+        return bool(self.attributes & LOAD_OPTION_ACTIVE)
+
+
+def decode_load_option(number: int, data: bytes) -> LoadOption:
+    """Decode an EFI_LOAD_OPTION:
+
+    UINT32 Attributes, UINT16 FilePathListLength, CHAR16 Description[] (NUL
+    terminated), EFI_DEVICE_PATH FilePathList[FilePathListLength bytes],
+    UINT8 OptionalData[rest].
+    """
+    if len(data) < _LOAD_OPTION_HEADER.size + 2:
+        raise ValueError(f"Boot{number:04X} is too short ({len(data)} bytes)")
+    attributes, path_length = _LOAD_OPTION_HEADER.unpack_from(data)
+
+    offset = _LOAD_OPTION_HEADER.size
+    end = offset
+    while True:
+        if end + 2 > len(data):
+            raise ValueError(f"Boot{number:04X} description is not terminated")
+        if data[end:end + 2] == b"\x00\x00":
+            break
+        end += 2
+    description = data[offset:end].decode("utf-16-le", errors="replace")
+
+    path_start = end + 2
+    path_end = path_start + path_length
+    if path_end > len(data):
+        raise ValueError(f"Boot{number:04X} file path list overruns the variable")
+    return LoadOption(
+        number=number,
+        attributes=attributes,
+        description=description,
+        file_path_list=bytes(data[path_start:path_end]),
+        optional_data=bytes(data[path_end:]),
+    )
+
+
+def encode_load_option(option: LoadOption) -> bytes:
+    return (_LOAD_OPTION_HEADER.pack(option.attributes, len(option.file_path_list))
+            + option.description.encode("utf-16-le") + b"\x00\x00"
+            + option.file_path_list
+            + option.optional_data)
+
+
+def read_boot_order(store: VariableStore) -> List[int]:
+    return _decode_boot_order(store.read("BootOrder", EFI_GLOBAL_VARIABLE_GUID))
+
+
+def _decode_boot_order(value: Optional[Tuple[int, bytes]]) -> List[int]:
+    if value is None:
+        return []
+    data = value[1]
+    return list(struct.unpack(f"<{len(data) // 2}H", data[: len(data) // 2 * 2]))
+
+
+def write_boot_order(store: VariableStore, order: List[int], attributes: int = DEFAULT_ATTRIBUTES) -> None:
+    store.write("BootOrder", EFI_GLOBAL_VARIABLE_GUID, struct.pack(f"<{len(order)}H", *order), attributes)
+
+
+def read_load_option(store: VariableStore, number: int) -> Optional[LoadOption]:
+    value = store.read(f"Boot{number:04X}", EFI_GLOBAL_VARIABLE_GUID)
+    if value is None:
+        return None
+    return decode_load_option(number, value[1])
+
+
+def find_boot_entry(store: VariableStore, description: str) -> Optional[LoadOption]:
+    """First BootOrder entry whose description starts with `description`,
+    ignoring case (same rule as the bcdedit path)."""
+    wanted = description.casefold()
+    for number in read_boot_order(store):
+        option = read_load_option(store, number)
+        if option is not None and option.description.casefold().startswith(wanted):
+            return option
+    return None
+
+
+def move_to_first(store: VariableStore, number: int) -> List[int]:
+    """Put Boot#### `number` at the front of BootOrder; returns the new order.
+
+    BootOrder is written back with the attributes it was read with.
+    """
+    value = store.read("BootOrder", EFI_GLOBAL_VARIABLE_GUID)
+    order = [n for n in _decode_boot_order(value) if n != number]
+    order.insert(0, number)
+    write_boot_order(store, order, value[0] if value is not None else DEFAULT_ATTRIBUTES)
+    return order
@@ -1,55 +1,525 @@
+"""H3CSound settings UI lifecycle.
+
+H3CLauncher.exe starts H3CApoSetting.exe (the settings window), and the
+processes tend to stay around after the window is closed. Instead of
+finding them by name and killing them a fixed 60 s after launch, the
+session started by start_h3c_sound() tracks its own process tree:
+
+- the launcher is known from its Popen handle; every tracked process has
+  a background thread blocked in wait() (a handle wait on Windows, no
+  polling). When a process exits, its direct children are added by
+  parent PID, with their creation time checked so a reused PID is never
+  taken for ours,
+- the idle timer counts from when the last visible top-level window of
+  the tree closes (from launch, until a window has appeared); when it
+  expires, the whole tree is killed at once and reaped,
+- the session ends by itself once every tracked process has exited,
+- a settings app that is already running when a session starts (one we
+  did not launch, or one left from an earlier run) is killed first; it is
+  found through the shared process index.
+
+start_h3c_sound() and stop_h3c_sound() return right away: launching,
+killing and reaping run on one "h3c-sound" worker thread, in call order.
+
+Processes and windows are reached through ProcessTree and WindowWatcher,
+so a fake process tree can stand in for psutil and Win32.
+"""
+
+from __future__ import annotations
+
 import os
 import subprocess
-import psutil
-from PyQt6.QtCore import QTimer
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
 from loguru import logger
 
-# This rarely changes. 
+from modules import metrics
+from modules import wakeup_audit
+from modules.process_index import ProcessIndex, get_process_index
+
+# This rarely changes.
 # But if it does, update this path accordingly.
 H3C_SOUND_PATH = r"C:\Program Files\Megabook\H3CSound\App\H3CLauncher.exe"
 H3C_SOUND_PROCESS_NAME = "H3CApoSetting.exe"
 
-# Store timer reference to avoid garbage collection
-_h3c_sound_timer = None
+DEFAULT_IDLE_TIMEOUT_SECONDS = 60.0
+# Launcher -> settings app -> helpers; deeper chains are not ours.
+_MAX_TREE_DEPTH = 4
+_KILL_WAIT_SECONDS = 3.0
+
+
+@dataclass(frozen=True)
+class ProcInfo:
+    pid: int
+    create_time: float
+    name: str = ""
+    # Popen or psutil.Process, whatever the ProcessTree needs to wait on it.
+    handle: Any = field(default=None, compare=False, repr=False)
+
+
+class ProcessTree:
+    """Process operations the session needs. Replace with a fake for tests."""
 
-def start_h3c_sound():
-    """Starts the H3CSound Settings app, kills if already running, auto-kill after 60s."""
-    global _h3c_sound_timer
-    # Kill if already running
-    for proc in psutil.process_iter(['name']):
-        if proc.info['name'] == H3C_SOUND_PROCESS_NAME:
-            logger.info("H3CSound is already running. Killing it.")
-            stop_h3c_sound()
-            break
+    def spawn(self, args: List[str]) -> ProcInfo:
+        raise NotImplementedError
 
-    if os.path.exists(H3C_SOUND_PATH):
+    def wait(self, proc: ProcInfo) -> None:
+        """Block until the process has exited."""
+        raise NotImplementedError
+
+    def children(self, proc: ProcInfo) -> List[ProcInfo]:
+        """Direct children started after `proc`, also once `proc` has exited."""
+        raise NotImplementedError
+
+    def parent_of(self, pid: int) -> Optional[Tuple[int, float]]:
+        """(parent PID, creation time of `pid`), or None if it is gone."""
+        raise NotImplementedError
+
+    def kill(self, procs: List[ProcInfo]) -> None:
+        """Kill all of them (skipping reused PIDs) and wait for them to go."""
+        raise NotImplementedError
+
+
+class PsutilProcessTree(ProcessTree):
+    def spawn(self, args: List[str]) -> ProcInfo:
+        import psutil
+
+        popen = subprocess.Popen(args)
         try:
-            subprocess.Popen(H3C_SOUND_PATH)
-            logger.info("H3CSound started.")
-
-            # After 60s kill it to avoid orphan processes
-            _h3c_sound_timer = QTimer()
-            _h3c_sound_timer.setSingleShot(True)
-            _h3c_sound_timer.timeout.connect(stop_h3c_sound)
-            _h3c_sound_timer.start(60000)
+            process = psutil.Process(popen.pid)
+            return ProcInfo(popen.pid, process.create_time(), process.name(), popen)
+        except psutil.Error:
+            # Exited already; children() still finds what it started.
+            return ProcInfo(popen.pid, 0.0, os.path.basename(args[0]), popen)
+
+    def wait(self, proc: ProcInfo) -> None:
+        try:
+            proc.handle.wait()
         except Exception as e:
-            logger.warning(f"Failed to start H3CSound: {e}")
-    else:
-        logger.error(f"H3CSound executable not found at {H3C_SOUND_PATH}")
+            logger.debug(f"Waiting for PID {proc.pid} failed: {e}")
 
-def stop_h3c_sound():
-    """Kills the H3CSound app."""
-    global _h3c_sound_timer
-    for proc in psutil.process_iter(['name']):
-        if proc.info['name'] == H3C_SOUND_PROCESS_NAME:
+    def children(self, proc: ProcInfo) -> List[ProcInfo]:
+        import psutil
+
+        # One snapshot of the process table; on Windows a child keeps its
+        # parent's PID after the parent exits.
+        children = []
+        for pid, ppid in psutil.ppid_map().items():
+            if ppid != proc.pid or pid == proc.pid:
+                continue
             try:
-                proc.kill()
-                logger.info("H3CSound process killed.")
+                child = psutil.Process(pid)
+                create_time = child.create_time()
+                if create_time >= proc.create_time:
+                    children.append(ProcInfo(pid, create_time, child.name(), child))
+            except psutil.Error:
+                pass
+        return children
+
+    def parent_of(self, pid: int) -> Optional[Tuple[int, float]]:
+        import psutil
+
+        try:
+            process = psutil.Process(pid)
+            return process.ppid(), process.create_time()
+        except psutil.Error:
+            return None
+
+    def kill(self, procs: List[ProcInfo]) -> None:
+        import psutil
+
+        victims = []
+        for proc in procs:
+            try:
+                process = psutil.Process(proc.pid)
+                if proc.create_time and process.create_time() != proc.create_time:
+                    continue
+                process.kill()
+                victims.append(process)
+                logger.info(f"Killed {proc.name or 'process'} (PID {proc.pid}).")
+            except psutil.NoSuchProcess:
+                pass
             except psutil.AccessDenied:
-                logger.error("Access denied when trying to kill process.")
+                logger.error(f"Access denied when trying to kill PID {proc.pid}.")
+        psutil.wait_procs(victims, timeout=_KILL_WAIT_SECONDS)
+
+
+class WindowWatcher:
+    """Reports whether the session's processes show a top-level window."""
+
+    def start(self, owns_pid: Callable[[int], bool], on_visible_changed: Callable[[bool], None]) -> None:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        raise NotImplementedError
+
+
+class WinEventWindowWatcher(WindowWatcher):
+    """SetWinEventHook on show/hide/destroy, on its own message-loop thread.
+
+    Only window events are delivered, so nothing runs while the windows
+    don't change. The hook is removed when the session ends.
+    """
+
+    _EVENT_OBJECT_DESTROY = 0x8001
+    _EVENT_OBJECT_SHOW = 0x8002
+    _EVENT_OBJECT_HIDE = 0x8003
+    _WINEVENT_OUTOFCONTEXT = 0x0000
+    _WINEVENT_SKIPOWNPROCESS = 0x0002
+    _OBJID_WINDOW = 0
+    _CHILDID_SELF = 0
+    _GA_ROOT = 2
+    _WM_QUIT = 0x0012
+
+    def __init__(self) -> None:
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+        self._windows: Set[int] = set()
+        self._visible = False
+
+    def start(self, owns_pid: Callable[[int], bool], on_visible_changed: Callable[[bool], None]) -> None:
+        self._thread = threading.Thread(target=self._run, args=(owns_pid, on_visible_changed),
+                                        name="h3c-sound-windows", daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+
+    def _run(self, owns_pid: Callable[[int], bool], on_visible_changed: Callable[[bool], None]) -> None:
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        WinEventProc = ctypes.WINFUNCTYPE(None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+                                          wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD)
+        user32.GetAncestor.restype = wintypes.HWND
+
+        def report() -> None:
+            visible = any(user32.IsWindowVisible(hwnd) for hwnd in self._windows)
+            if visible != self._visible:
+                self._visible = visible
+                on_visible_changed(visible)
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, time_ms) -> None:
+            if id_object != self._OBJID_WINDOW or id_child != self._CHILDID_SELF or not hwnd:
+                return
+            try:
+                if event == self._EVENT_OBJECT_SHOW and hwnd not in self._windows:
+                    if user32.GetAncestor(hwnd, self._GA_ROOT) != hwnd:
+                        return
+                    pid = wintypes.DWORD()
+                    user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+                    if not owns_pid(pid.value):
+                        return
+                    self._windows.add(hwnd)
+                elif hwnd not in self._windows:
+                    return
+                elif event == self._EVENT_OBJECT_DESTROY:
+                    self._windows.discard(hwnd)
+                report()
             except Exception as e:
-                logger.error(f"Error killing process: {e}")
-    # Stop timer if running
-    if _h3c_sound_timer is not None:
-        _h3c_sound_timer.stop()
-        _h3c_sound_timer = None
+                logger.error(f"H3CSound window event failed: {e}")
+
+        # Keep a reference, or the callback is freed under the hook.
+        self._callback = WinEventProc(callback)
+        hook = user32.SetWinEventHook(
+            self._EVENT_OBJECT_DESTROY, self._EVENT_OBJECT_HIDE, 0, self._callback, 0, 0,
+            self._WINEVENT_OUTOFCONTEXT | self._WINEVENT_SKIPOWNPROCESS,
+        )
+        self._thread_id = ctypes.windll.kernel32.GetCurrentThreadId()
+        self._ready.set()
+        if not hook:
+            logger.warning("SetWinEventHook failed; H3CSound idle time counts from launch.")
+            return
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWinEvent(hook)
+
+    def stop(self) -> None:
+        if self._thread_id:
+            import ctypes
+
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self._WM_QUIT, 0, 0)
+            self._thread_id = 0
+
+
+def _default_window_watcher() -> Optional[WindowWatcher]:
+    return WinEventWindowWatcher() if os.name == "nt" else None
+
+
+class H3CSoundSession:
+    """One launch of the settings UI and every process it started."""
+
+    def __init__(self, tree: ProcessTree, idle_timeout: float,
+                 window_watcher: Optional[WindowWatcher] = None,
+                 timer_factory: Callable[[float, Callable[[], None]], Any] = threading.Timer,
+                 on_ended: Optional[Callable[["H3CSoundSession"], None]] = None) -> None:
+        self.tree = tree
+        self.idle_timeout = idle_timeout
+        self.window_watcher = window_watcher
+        self.timer_factory = timer_factory
+        self.on_ended = on_ended
+        self._lock = threading.Lock()
+        self._running: Dict[int, ProcInfo] = {}
+        # Everything tracked in this session, also after it exited: window
+        # owners are matched against it.
+        self._family: Dict[int, ProcInfo] = {}
+        self._owned: Dict[int, bool] = {}
+        self._timer: Any = None
+        self._ended = False
+
+    @property
+    def ended(self) -> bool:
+        return self._ended
+
+    def running(self) -> List[ProcInfo]:
+        with self._lock:
+            return list(self._running.values())
+
+    def start(self, args: List[str]) -> None:
+        if self.window_watcher is not None:
+            # Before the launch, so the first window's show event is seen.
+            self.window_watcher.start(self._owns_pid, self._on_window_visible)
+        try:
+            launcher = self.tree.spawn(args)
+        except Exception:
+            self._end()
+            raise
+        logger.info(f"H3CSound started (PID {launcher.pid}).")
+        with self._lock:
+            # Counts from launch until a window has been seen.
+            self._arm_timer()
+            self._track(launcher)
+
+    def _track(self, proc: ProcInfo) -> None:
+        # Called with the lock held.
+        self._running[proc.pid] = proc
+        self._family[proc.pid] = proc
+        self._owned.pop(proc.pid, None)
+        threading.Thread(target=self._wait, args=(proc,), name=f"h3c-sound-wait-{proc.pid}",
+                         daemon=True).start()
+
+    def _wait(self, proc: ProcInfo) -> None:
+        self.tree.wait(proc)
+        children = self.tree.children(proc)
+        with self._lock:
+            if self._ended:
+                return
+            self._running.pop(proc.pid, None)
+            for child in children:
+                if child.pid not in self._family:
+                    logger.debug(f"H3CSound: tracking {child.name} (PID {child.pid}).")
+                    self._track(child)
+            if self._running:
+                return
+        logger.info("H3CSound exited.")
+        self._end()
+
+    def _owns_pid(self, pid: int) -> bool:
+        """Whether `pid` is in the tree: tracked, or a descendant of a tracked one."""
+        with self._lock:
+            cached = self._owned.get(pid)
+            family = dict(self._family)
+        if cached is not None:
+            return cached
+        owned = False
+        current, created = pid, None
+        for _ in range(_MAX_TREE_DEPTH):
+            known = family.get(current)
+            if known is not None:
+                # A child can't be older than its parent; if it is, the
+                # parent PID was reused.
+                owned = created is None or created >= known.create_time
+                break
+            lineage = self.tree.parent_of(current)
+            if lineage is None:
+                break
+            current, created = lineage
+        with self._lock:
+            self._owned[pid] = owned
+        return owned
+
+    def _on_window_visible(self, visible: bool) -> None:
+        with self._lock:
+            if self._ended:
+                return
+            if visible:
+                logger.debug("H3CSound window shown.")
+                self._cancel_timer()
+            else:
+                logger.debug(f"H3CSound window closed; closing it in {self.idle_timeout:g} s.")
+                self._arm_timer()
+
+    def _arm_timer(self) -> None:
+        # Called with the lock held.
+        self._cancel_timer()
+        self._timer = self.timer_factory(self.idle_timeout, wakeup_audit.counted("h3c_sound", self._on_idle))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _on_idle(self) -> None:
+        logger.info("H3CSound idle timeout; closing it.")
+        self.stop()
+
+    def stop(self) -> None:
+        """Kill the whole tree at once: tracked processes and their children."""
+        with self._lock:
+            if self._ended:
+                return
+            targets = dict(self._running)
+        # Children of running processes haven't been added yet.
+        pending = list(targets.values())
+        for _ in range(_MAX_TREE_DEPTH):
+            found = []
+            for proc in pending:
+                for child in self.tree.children(proc):
+                    if child.pid not in targets:
+                        targets[child.pid] = child
+                        found.append(child)
+            if not found:
+                break
+            pending = found
+        self._end()
+        if targets:
+            self.tree.kill(list(targets.values()))
+
+    def _end(self) -> None:
+        with self._lock:
+            if self._ended:
+                return
+            self._ended = True
+            self._cancel_timer()
+        if self.window_watcher is not None:
+            self.window_watcher.stop()
+        if self.on_ended is not None:
+            self.on_ended(self)
+
+
+class H3CSoundManager:
+    """At most one session at a time; starting again replaces the old one."""
+
+    def __init__(self, tree: Optional[ProcessTree] = None,
+                 window_watcher_factory: Callable[[], Optional[WindowWatcher]] = _default_window_watcher,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT_SECONDS,
+                 process_index: Optional[ProcessIndex] = None,
+                 timer_factory: Callable[[float, Callable[[], None]], Any] = threading.Timer) -> None:
+        self.tree = tree or PsutilProcessTree()
+        self.window_watcher_factory = window_watcher_factory
+        self.idle_timeout = idle_timeout
+        # None: the shared index from get_process_index().
+        self.process_index = process_index
+        self.timer_factory = timer_factory
+        self._lock = threading.Lock()
+        self._session: Optional[H3CSoundSession] = None
+
+    @property
+    def session(self) -> Optional[H3CSoundSession]:
+        return self._session
+
+    def start(self, path: str = H3C_SOUND_PATH) -> H3CSoundSession:
+        self.stop()
+        self.kill_strays()
+        session = H3CSoundSession(self.tree, self.idle_timeout, self.window_watcher_factory(),
+                                  timer_factory=self.timer_factory, on_ended=self._on_session_ended)
+        with self._lock:
+            self._session = session
+        session.start([path])
+        return session
+
+    def kill_strays(self) -> None:
+        """Kill settings apps that are not part of a session of ours."""
+        index = self.process_index or get_process_index()
+        pids = index.pids_of(H3C_SOUND_PROCESS_NAME)
+        if not pids:
+            return
+        logger.info("H3CSound is already running. Killing it.")
+        self.tree.kill([ProcInfo(pid, 0.0, H3C_SOUND_PROCESS_NAME) for pid in pids])
+        for pid in pids:
+            index.forget(pid)
+
+    def stop(self) -> None:
+        with self._lock:
+            session = self._session
+        if session is not None:
+            session.stop()
+
+    def _on_session_ended(self, session: H3CSoundSession) -> None:
+        with self._lock:
+            if self._session is session:
+                self._session = None
+
+
+_manager: Optional[H3CSoundManager] = None
+_manager_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_manager() -> H3CSoundManager:
+    """Process-wide manager."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = H3CSoundManager()
+        return _manager
+
+
+def set_manager(manager: H3CSoundManager) -> None:
+    """Install a different manager, e.g. one backed by a fake process tree."""
+    global _manager
+    with _manager_lock:
+        _manager = manager
+
+
+def _submit(func: Callable[..., Any], *args: Any) -> Future:
+    global _executor
+    with _manager_lock:
+        if _executor is None:
+            # One thread, so a start and a following stop run in order.
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="h3c-sound")
+        return _executor.submit(func, *args)
+
+
+def is_h3c_sound_installed():
+    """Whether the H3CSound launcher exists (used to enable the menu entry)."""
+    return os.path.exists(H3C_SOUND_PATH)
+
+def start_h3c_sound(idle_timeout: Optional[float] = None) -> Optional[Future]:
+    """Starts the H3CSound Settings app, replacing any running one, on the
+    h3c-sound thread.
+
+    It is closed `idle_timeout` seconds after its window closes.
+    """
+    if not os.path.exists(H3C_SOUND_PATH):
+        logger.error(f"H3CSound executable not found at {H3C_SOUND_PATH}")
+        return None
+    return _submit(_start, idle_timeout)
+
+def stop_h3c_sound() -> Future:
+    """Kills the H3CSound app we started, with everything it spawned, on
+    the h3c-sound thread."""
+    return _submit(_stop)
+
+@metrics.timed("start_h3c_sound")
+def _start(idle_timeout: Optional[float]) -> None:
+    manager = get_manager()
+    if idle_timeout is not None:
+        manager.idle_timeout = idle_timeout
+    try:
+        manager.start(H3C_SOUND_PATH)
+    except Exception as e:
+        logger.warning(f"Failed to start H3CSound: {e}")
+
+@metrics.timed("stop_h3c_sound")
+def _stop() -> None:
+    get_manager().stop()
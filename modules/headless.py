@@ -0,0 +1,416 @@
+"""Headless mode (`--headless`): hotkeys, microphone and MegaOS switch
+without Qt.
+
+Meant for machines without an interactive shell (servers, kiosk images),
+where building a QApplication, tray icon and menu only costs memory and
+startup time. PyQt6 is never imported here; a small queue-based event loop
+on the main thread takes the place of the Qt loop, and tray notifications
+become log lines plus events that `--status` returns over IPC.
+
+There is no confirmation dialog either: F21 (or `--switch-megaos`) arms the
+MegaOS switch, and a second press within HEADLESS_MEGAOS_CONFIRM_SECONDS
+starts it.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import heapq
+import itertools
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+import config
+from _version import __version__
+from modules import hook_watchdog
+from modules import ipc
+from modules import keyboard_hook
+from modules import log_setup
+from modules import memory_budget
+from modules import metrics
+from modules import startup_profiler
+from modules import switch_to_megaos
+from modules import trace_recorder
+from modules import wakeup_audit
+from modules.audio_worker import OP_MUTE, OP_TOGGLE, OP_UNMUTE, AudioResult, AudioWorker
+from modules.check_official_h3ccc import is_official_h3c_control_center_running
+from modules.hotkey_dispatch import HotkeyDispatcher
+from modules.megaos_switch_worker import OUTCOME_SUCCEEDED, MegaOSSwitchWorker
+from modules.microphone_control import get_capture_endpoints, is_mute_all, set_mute_all
+from modules.microphone_state import state as mic_state
+from modules.process_index import get_process_index
+from modules.startup_cache import get_startup_cache
+
+# Notifications kept for `--status`.
+_MAX_EVENTS = 32
+
+
+class EventLoop:
+    """Runs callbacks on the thread that calls run().
+
+    call_soon() may be used from any thread. The loop sleeps until a
+    callback is posted or the next call_later() timer is due, so it does not
+    wake up periodically while idle.
+    """
+
+    def __init__(self) -> None:
+        self._queue: "queue.Queue[Tuple[Callable[..., Any], tuple]]" = queue.Queue()
+        self._timers: List[Tuple[float, int, Callable[..., Any], tuple]] = []
+        self._timer_ids = itertools.count()
+        self._running = False
+        self.exit_code = 0
+
+    def call_soon(self, callback: Callable[..., Any], *args: Any) -> None:
+        self._queue.put((callback, args))
+
+    def call_later(self, delay: float, callback: Callable[..., Any], *args: Any) -> None:
+        """Loop thread only."""
+        heapq.heappush(self._timers, (time.monotonic() + delay, next(self._timer_ids), callback, args))
+
+    def stop(self, exit_code: int = 0) -> None:
+        self.exit_code = exit_code
+        self.call_soon(self._stop)
+
+    def _stop(self) -> None:
+        self._running = False
+
+    def run(self) -> int:
+        self._running = True
+        while self._running:
+            timeout = None
+            if self._timers:
+                timeout = max(0.0, self._timers[0][0] - time.monotonic())
+            try:
+                callback, args = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                _, _, callback, args = heapq.heappop(self._timers)
+            try:
+                callback(*args)
+            except Exception as e:
+                logger.exception(f"Event loop callback failed: {e}")
+        return self.exit_code
+
+
+class HeadlessControlCenter:
+    def __init__(self, app_id: str) -> None:
+        logger.info("Initializing (headless)...")
+        self.app_id = app_id
+        self.loop = EventLoop()
+        self.events: Deque[Dict[str, Any]] = deque(maxlen=_MAX_EVENTS)
+        self.megaos_worker: Optional[MegaOSSwitchWorker] = None
+        self.megaos_armed_until = 0.0
+        self.ipc_server: Optional[ipc.IpcServer] = None
+        self.metrics_exporter: Optional[metrics.MetricsExporter] = None
+        self.current_hotkey_event = None
+        self.memory_budget = memory_budget.MemoryBudget(
+            config.MEMORY_BUDGET_IDLE_SECONDS,
+            schedule=wakeup_audit.counted_scheduler("memory_budget", self.loop.call_later),
+            enabled=config.IS_ENABLE_MEMORY_BUDGET,
+        )
+        self.memory_budget.add_releaser("process names", get_process_index().clear)
+        self.memory_budget.add_releaser("stdlib caches", memory_budget.release_common_caches)
+        self.startup_cache = get_startup_cache()
+        switch_to_megaos.set_entry_cache(self.startup_cache)
+
+        # COM callbacks and the hook thread hop onto the loop.
+        mic_state.subscribe(lambda muted: self.loop.call_soon(self.on_mic_state_changed, muted))
+        set_mute_all(config.IS_MUTE_ALL_MICROPHONES)
+        # Every microphone (COM) call runs on the audio worker thread.
+        self.audio = AudioWorker(on_result=self.on_audio_done)
+        mic_state.set_reopen_runner(self.audio.post)
+        self.audio.start()
+        self.setup_hotkeys()
+
+        self.ipc_server = ipc.IpcServer(app_id, self.handle_ipc_command)
+        try:
+            self.ipc_server.start()
+        except Exception as e:
+            logger.error(f"Failed to start IPC server: {e}")
+
+        if config.IS_ENABLE_METRICS_EXPORTER:
+            self.metrics_exporter = metrics.MetricsExporter(config.METRICS_EXPORTER_PORT)
+            try:
+                self.metrics_exporter.start()
+            except Exception as e:
+                logger.error(f"Failed to start metrics exporter: {e}")
+                self.metrics_exporter = None
+
+        threading.Thread(target=self.warm_up, name="warmup", daemon=True).start()
+
+    def notify(self, event: str, message: str, **fields: Any) -> None:
+        """Stands in for the tray balloon: log it and keep it for IPC."""
+        logger.info(f"[{event}] {message}")
+        self.events.append({"event": event, "message": message, "time": time.time(), **fields})
+
+    def warm_up(self) -> None:
+        """Worker thread: conflict check, mic endpoint, MegaOS entry lookup."""
+        if not config.IS_SKIP_H3CCC_CHECK:
+            try:
+                if is_official_h3c_control_center_running():
+                    logger.error("Official H3C Control Center is running; exiting.")
+                    self.loop.call_soon(self.quit_app, 1)
+                    return
+            except Exception as e:
+                # Not knowing is treated like finding it running.
+                logger.error(f"Official H3C Control Center check failed: {e}; exiting. "
+                             f"Set IS_SKIP_H3CCC_CHECK = True in config.py to skip it.")
+                self.loop.call_soon(self.quit_app, 1)
+                return
+        try:
+            self.audio.call(self.open_capture_devices).result()
+        except Exception as e:
+            logger.warning(f"Cannot open microphone endpoint: {e}")
+        try:
+            from modules import efivars
+
+            store = efivars.default_store() if config.IS_USE_NATIVE_UEFI_BACKEND else None
+            switch_to_megaos.prefetch_entry(store=store)
+        except Exception as e:
+            logger.warning(f"MegaOS entry lookup failed: {e}")
+        self.loop.call_soon(self.startup_cache.save)
+        self.loop.call_soon(hook_watchdog.reduce_gc_pauses, config.GC_THRESHOLDS)
+        self.loop.call_soon(self.memory_budget.started)
+        self.loop.call_soon(wakeup_audit.start_from_argv, sys.argv, os.path.dirname(log_setup.default_log_dir()))
+
+    def open_capture_devices(self) -> None:
+        """Audio thread: open the endpoints ahead of the first key press."""
+        mic_state.start()
+        if is_mute_all():
+            get_capture_endpoints()
+
+    def setup_hotkeys(self) -> None:
+        self.hotkey_trace: Optional[trace_recorder.TraceRecorder] = None
+        if config.HOTKEY_TRACE_EVENTS:
+            self.hotkey_trace = trace_recorder.TraceRecorder(config.HOTKEY_TRACE_EVENTS)
+            trace_recorder.dump_on_crash(self.hotkey_trace)
+        self.hotkeys = HotkeyDispatcher(lambda event: self.loop.call_soon(self.on_hotkey, event),
+                                        recorder=self.hotkey_trace)
+        self.keyboard_hook: Optional[keyboard_hook.KeyboardHook] = None
+        self.hook_watchdog: Optional[hook_watchdog.HookWatchdog] = None
+        bindings = keyboard_hook.action_bindings(config.HOTKEY_BINDINGS)
+        self.hotkey_actions = {keyboard_hook.key_name(key): action for key, action in bindings.items()}
+        for key, action in self.hotkey_actions.items():
+            self.hotkeys.bind(key, coalesce=keyboard_hook.ACTION_COALESCE[action])
+        try:
+            self.keyboard_hook = keyboard_hook.KeyboardHook(bindings, self.hotkeys.on_key_event)
+            self.hook_watchdog = hook_watchdog.HookWatchdog(
+                self.keyboard_hook, interval_seconds=config.HOOK_WATCHDOG_INTERVAL_SECONDS)
+            self.hook_watchdog.start()
+
+            startup_profiler.mark("hotkeys_hooked")
+            logger.info("Global hotkeys hooked!")
+        except ImportError:
+            logger.error("Error: 'keyboard' library not found. Global keys won't work.")
+        except Exception as e:
+            logger.error(f"Failed to hook keys (Run as Admin?): {e}")
+
+    def on_hotkey(self, event) -> None:
+        with logger.contextualize(action=log_setup.action_id(event.key)):
+            self.hotkeys.action_started(event)
+            metrics.observe_hotkey_stage(event.key, "delivered", event.t_hook)
+            self.current_hotkey_event = event
+            # A mic request stays in flight (later presses coalesce) until
+            # its result arrives, see on_audio_result().
+            queued = False
+            try:
+                action = self.hotkey_actions.get(event.key)
+                if action == keyboard_hook.ACTION_TOGGLE_MIC:
+                    logger.info("Microphone Toggle Triggered")
+                    queued = self.toggle_mic()
+                elif action == keyboard_hook.ACTION_SWITCH_MEGAOS:
+                    logger.info("MegaOS Switch Triggered!")
+                    self.request_megaos_switch()
+            finally:
+                self.current_hotkey_event = None
+                if not queued:
+                    self.finish_hotkey(event)
+                self.memory_budget.activity()
+
+    def finish_hotkey(self, event) -> None:
+        self.hotkeys.action_finished(event)
+        metrics.observe_hotkey_stage(event.key, "finished", event.t_hook)
+
+    def toggle_mic(self, reply: Optional[Future] = None) -> bool:
+        return self.request_audio(OP_TOGGLE, reply)
+
+    def set_mic_muted(self, muted: bool, reply: Optional[Future] = None) -> None:
+        self.request_audio(OP_MUTE if muted else OP_UNMUTE, reply)
+
+    def request_audio(self, op: str, reply: Optional[Future] = None) -> bool:
+        """Queue a request for the audio thread. The tag carries the hotkey
+        press (if any) and the IPC reply. Returns False if it was refused,
+        in which case no result follows."""
+        request = self.audio.submit(op, tag=(self.current_hotkey_event, reply))
+        if request.done():
+            if reply is not None:
+                reply.set_result({"ok": False, "error": str(request.exception())})
+            return False
+        return True
+
+    def on_audio_done(self, result: AudioResult) -> None:
+        # Audio thread.
+        event = result.tag[0]
+        if event is not None:
+            metrics.observe_hotkey_stage(event.key, "com_done", event.t_hook)
+        self.loop.call_soon(self.on_audio_result, result)
+
+    def on_audio_result(self, result: AudioResult) -> None:
+        event, reply = result.tag
+        if result.ok and event is not None:
+            # The log line stands in for the tray notification.
+            metrics.observe_hotkey_stage(event.key, "notified", event.t_hook)
+        if reply is not None:
+            if result.ok:
+                self.reply_status(reply)
+            else:
+                reply.set_result({"ok": False, "error": result.error})
+        if event is not None:
+            self.finish_hotkey(event)
+
+    def on_mic_state_changed(self, muted: Optional[bool]) -> None:
+        if muted is None:
+            self.notify("mic_unknown", "Microphone state unknown", muted=None)
+        elif muted:
+            self.notify("mic_muted", "Microphone muted", muted=True)
+        else:
+            self.notify("mic_unmuted", "Microphone unmuted", muted=False)
+
+    def request_megaos_switch(self) -> str:
+        """First call arms the switch, a second one in time starts it."""
+        if self.megaos_worker is not None and self.megaos_worker.is_running():
+            logger.info("MegaOS switch already in progress, ignoring.")
+            return "already running"
+        now = time.monotonic()
+        if now > self.megaos_armed_until:
+            self.megaos_armed_until = now + config.HEADLESS_MEGAOS_CONFIRM_SECONDS
+            self.notify("megaos_armed",
+                        f"Press F21 or run --switch-megaos again within "
+                        f"{config.HEADLESS_MEGAOS_CONFIRM_SECONDS}s to reboot into MegaOS")
+            return "armed"
+        self.megaos_armed_until = 0.0
+        self.notify("megaos_switch_started", "Switching to MegaOS")
+        self.megaos_worker = MegaOSSwitchWorker(
+            on_stage=lambda stage: self.loop.call_soon(logger.info, f"MegaOS switch stage: {stage}"),
+            on_done=lambda outcome, code: self.loop.call_soon(self.on_megaos_done, outcome, code),
+            timeout_seconds=config.MEGAOS_SWITCH_TIMEOUT_SECONDS,
+            use_native_uefi=config.IS_USE_NATIVE_UEFI_BACKEND,
+        )
+        self.megaos_worker.start()
+        return "started"
+
+    def on_megaos_done(self, outcome: str, code: int) -> None:
+        # The switch may have found (or dropped) the cached MegaOS entry.
+        self.startup_cache.save()
+        if outcome == OUTCOME_SUCCEEDED:
+            self.notify("megaos_switch_succeeded", "Boot order changed successfully, rebooting...")
+        else:
+            self.notify("megaos_switch_failed", f"MegaOS switch {outcome}, error code: {code}",
+                        outcome=outcome, code=code)
+
+    def handle_ipc_command(self, command: str) -> Dict[str, Any]:
+        """Called on the IPC thread; runs the command on the loop."""
+        future: Future = Future()
+        self.loop.call_soon(self.on_ipc_command, command, future)
+        return future.result(timeout=config.IPC_COMMAND_TIMEOUT_SECONDS)
+
+    def on_ipc_command(self, command: str, future: Future) -> None:
+        with logger.contextualize(action=log_setup.action_id("ipc")):
+            self.run_ipc_command(command, future)
+        self.memory_budget.activity()
+
+    def run_ipc_command(self, command: str, future: Future) -> None:
+        try:
+            if command == "toggle-mic":
+                # Answered with the status once the audio thread is done.
+                self.toggle_mic(reply=future)
+                return
+            elif command == "mute":
+                self.set_mic_muted(True, reply=future)
+                return
+            elif command == "unmute":
+                self.set_mic_muted(False, reply=future)
+                return
+            elif command == "dump-trace":
+                future.set_result(self.dump_hotkey_trace())
+                return
+            elif command == "switch-megaos":
+                future.set_result({"ok": True, "result": self.request_megaos_switch()})
+                return
+            elif command != "status":
+                future.set_result({"ok": False, "error": f"unknown command: {command}"})
+                return
+            self.reply_status(future)
+        except Exception as e:
+            future.set_result({"ok": False, "error": str(e)})
+
+    def dump_hotkey_trace(self) -> Dict[str, Any]:
+        if self.hotkey_trace is None:
+            return {"ok": False, "error": "hotkey trace is turned off (HOTKEY_TRACE_EVENTS = 0)"}
+        path = trace_recorder.default_dump_path()
+        return {"ok": True, "path": path, "events": self.hotkey_trace.dump(path)}
+
+    def reply_status(self, future: Future) -> None:
+        future.set_result({
+            "ok": True,
+            "mode": "headless",
+            "muted": mic_state.muted,
+            "mute_all": is_mute_all(),
+            "megaos_switch_running": self.megaos_worker is not None and self.megaos_worker.is_running(),
+            "version": __version__,
+            "events": list(self.events),
+            "memory": self.memory_budget.samples,
+            "keyboard_hook": (dataclasses.asdict(self.hook_watchdog.stats)
+                              if self.hook_watchdog is not None else None),
+        })
+
+    def quit_app(self, exit_code: int = 0) -> None:
+        logger.info("Exiting application...")
+        if self.megaos_worker is not None and self.megaos_worker.is_running():
+            self.megaos_worker.cancel()
+        try:
+            if self.hook_watchdog is not None:
+                self.hook_watchdog.stop()
+        except Exception as e:
+            logger.error(f"Error unhooking keyboard: {e}")
+        if self.ipc_server is not None:
+            self.ipc_server.stop()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+        self.audio.stop()
+        self.loop.stop(exit_code)
+
+    def run(self) -> int:
+        if startup_profiler.is_enabled():
+            self.loop.call_soon(self.finish_startup_profile)
+        try:
+            return self.loop.run()
+        except KeyboardInterrupt:
+            self.quit_app()
+            return 0
+
+    def finish_startup_profile(self) -> None:
+        startup_profiler.mark("event_loop_started")
+        startup_profiler.finish()
+
+
+def main(app_id: str) -> int:
+    """Entry point for `--headless`; returns the process exit code."""
+    from modules.single_instance import SingleInstance
+
+    startup_profiler.mark("imports_done")
+    lock = SingleInstance(app_id)
+    if not lock.acquire():
+        logger.warning("Another instance is already running; exiting.")
+        return 0
+    try:
+        return HeadlessControlCenter(app_id).run()
+    finally:
+        lock.release()
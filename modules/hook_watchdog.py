@@ -0,0 +1,194 @@
+"""Keyboard hook health: callback timing, self-test and re-hooking.
+
+Windows silently removes a low-level keyboard hook whose callback does not
+return within LowLevelHooksTimeout (HKCU\\Control Panel\\Desktop). In this
+app the callback needs the GIL, so a long garbage collection or the UI
+thread holding the GIL is enough, and F20/F21 would stay dead until a
+restart. HookWatchdog:
+
+- times every hook callback: how long it ran, and how late it ran
+  compared to the keystroke's own timestamp. Bound keys always go into
+  histograms; other keys only when slow,
+- runs a self-test (a marked keystroke the hook must see and swallow)
+  when a callback ran close to the timeout, on request, and optionally
+  every `interval_seconds`,
+- re-hooks when the self-test fails.
+
+The late callback of a hook that timed out still runs once the GIL is
+free, which is what makes the removal detectable without polling. GC
+pauses are recorded as well, for diagnosis.
+
+reduce_gc_pauses() cuts the pause risk itself: after startup every
+long-lived object is moved out of the collector's reach with gc.freeze(),
+and the thresholds can be raised so young collections run less often.
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Optional, Tuple
+
+from loguru import logger
+
+from modules import metrics
+from modules import wakeup_audit
+
+_DEFAULT_HOOK_TIMEOUT_MS = 300
+# Callbacks of unbound keys are only recorded when at least this slow.
+_SLOW_CALLBACK_SECONDS = 0.005
+
+
+def low_level_hooks_timeout_ms() -> int:
+    """LowLevelHooksTimeout from the registry, or the usual default."""
+    if os.name != "nt":
+        return _DEFAULT_HOOK_TIMEOUT_MS
+    try:
+        import winreg
+
+        with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Control Panel\Desktop") as key:
+            value, _ = winreg.QueryValueEx(key, "LowLevelHooksTimeout")
+            return max(1, int(value))
+    except (OSError, ValueError):
+        return _DEFAULT_HOOK_TIMEOUT_MS
+
+
+def _tick_count() -> int:
+    """Milliseconds on the same clock as KBDLLHOOKSTRUCT.time."""
+    if os.name == "nt":
+        import ctypes
+
+        return ctypes.windll.kernel32.GetTickCount()
+    return int(time.monotonic() * 1000) & 0xFFFFFFFF
+
+
+@dataclass
+class WatchdogStats:
+    self_tests: int = 0
+    failures: int = 0
+    rehooks: int = 0
+    stalls: int = 0
+    last_check: str = ""
+
+
+class HookWatchdog:
+    def __init__(self, hook, interval_seconds: float = 0.0, self_test_timeout: float = 1.0,
+                 hook_timeout_ms: Optional[int] = None) -> None:
+        self.hook = hook
+        self.interval_seconds = interval_seconds
+        self.self_test_timeout = self_test_timeout
+        self.hook_timeout_ms = hook_timeout_ms or low_level_hooks_timeout_ms()
+        # Half the timeout: near misses are worth a check as well.
+        self.stall_seconds = self.hook_timeout_ms / 2000.0
+        self.stats = WatchdogStats()
+        self._wake = threading.Event()
+        self._reason = ""
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self._gc_started = 0.0
+        # Filled inside gc callbacks, where taking the metrics lock could
+        # deadlock; moved into the registry when it is read.
+        self._gc_pauses: Deque[Tuple[int, float]] = deque(maxlen=256)
+
+    def start(self) -> None:
+        """Install the hook and start watching it."""
+        self.hook.on_timing = self._on_timing
+        self.hook.install()
+        gc.callbacks.append(self._on_gc)
+        metrics.get_registry().add_collector(self._flush_gc_pauses)
+        self._thread = threading.Thread(target=self._run, name="hook-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping = True
+        self._wake.set()
+        try:
+            gc.callbacks.remove(self._on_gc)
+        except ValueError:
+            pass
+        self.hook.uninstall()
+
+    def request_check(self, reason: str) -> None:
+        self._reason = reason
+        self._wake.set()
+
+    def _run(self) -> None:
+        while True:
+            # Sleeps until a check is requested, unless a periodic one is set.
+            woken = self._wake.wait(self.interval_seconds or None)
+            self._wake.clear()
+            if self._stopping:
+                return
+            if not woken:
+                wakeup_audit.fired("hook_watchdog")
+            self.check(self._reason if woken else "periodic")
+
+    def check(self, reason: str) -> Optional[bool]:
+        """Self-test the hook, re-hooking if it's gone. Not on the hook thread."""
+        result = self.hook.self_test(self.self_test_timeout)
+        if result is None:
+            return None
+        self.stats.self_tests += 1
+        self.stats.last_check = time.strftime("%H:%M:%S")
+        if result:
+            logger.debug(f"Keyboard hook self-test passed ({reason}).")
+            return True
+        self.stats.failures += 1
+        logger.warning(f"Keyboard hook is not receiving keys ({reason}); hooking again.")
+        try:
+            self.hook.reinstall()
+            self.stats.rehooks += 1
+        except Exception as e:
+            logger.error(f"Re-hooking the keyboard failed: {e}")
+            return False
+        if not self.hook.self_test(self.self_test_timeout):
+            logger.error("Keyboard hook re-installed, but the self-test still fails.")
+            return False
+        logger.info("Keyboard hook re-installed.")
+        return True
+
+    def _on_timing(self, key: Optional[str], event_tick: int, started: float) -> None:
+        # Hook thread, after every callback.
+        elapsed = time.perf_counter() - started
+        lag = ((_tick_count() - event_tick) & 0xFFFFFFFF) / 1000.0
+        if key is not None or elapsed >= _SLOW_CALLBACK_SECONDS:
+            label = key if key is not None else "other"
+            metrics.observe(metrics.HOOK_CALLBACK_SECONDS, elapsed, key=label)
+            metrics.observe(metrics.HOOK_LAG_SECONDS, lag, key=label)
+        if lag + elapsed >= self.stall_seconds:
+            self.stats.stalls += 1
+            self.request_check(f"callback ran {(lag + elapsed) * 1000:.0f} ms after the keystroke")
+
+    def _on_gc(self, phase: str, info: dict) -> None:
+        # Keep this to an append: no locks, nothing that can block.
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        else:
+            self._gc_pauses.append((info.get("generation", -1), time.perf_counter() - self._gc_started))
+
+    def _flush_gc_pauses(self) -> None:
+        while self._gc_pauses:
+            generation, pause = self._gc_pauses.popleft()
+            metrics.observe(metrics.GC_PAUSE_SECONDS, pause, generation=str(generation))
+
+    def format_line(self) -> str:
+        s = self.stats
+        return (f"Keyboard hook: self-tests={s.self_tests}, failures={s.failures}, re-hooks={s.rehooks}, "
+                f"stalls={s.stalls}, timeout={self.hook_timeout_ms} ms"
+                + (f", last check {s.last_check}" if s.last_check else ""))
+
+
+def reduce_gc_pauses(thresholds: Optional[Tuple[int, int, int]] = None) -> None:
+    """Call once startup is done: collect, freeze what survived, and
+    optionally set new collection thresholds."""
+    started = time.perf_counter()
+    gc.collect()
+    gc.freeze()
+    if thresholds:
+        gc.set_threshold(*thresholds)
+    logger.info(f"GC: froze {gc.get_freeze_count()} startup objects, thresholds {gc.get_threshold()}, "
+                f"{(time.perf_counter() - started) * 1000:.1f} ms")
@@ -0,0 +1,189 @@
+"""Hotkey dispatch stage between the keyboard hook thread and the app.
+
+Raw key events from the hook go through here before they become actions:
+
+- auto-repeat downs (key held) are dropped,
+- presses closer together than the debounce window are dropped,
+- presses arriving while the key's action is still running are coalesced
+  into at most one follow-up action (or dropped, per key),
+- every delivered event carries monotonic timestamps, so queueing delay
+  (hook -> action start) and action time can be measured.
+
+This module has no Qt dependency; the caller decides how `deliver` reaches
+the thread that runs the action. With a `recorder`, every raw event and
+what became of it goes into the trace ring buffer (modules.trace_recorder).
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from modules import trace_recorder
+
+# A down event for a key that is already down counts as auto-repeat only if
+# it follows the previous down this closely; otherwise we assume the up event
+# was lost and treat it as a new press.
+_REPEAT_WINDOW_SECONDS = 0.6
+
+
+@dataclass
+class HotkeyEvent:
+    key: str
+    # time.monotonic() when the hook callback saw the press.
+    t_hook: float
+    t_delivered: float = 0.0
+    t_started: float = 0.0
+    t_finished: float = 0.0
+    # Number of extra presses merged into this event.
+    coalesced: int = 0
+
+    @property
+    def queue_delay(self) -> float:
+        """Seconds from the hook callback to the action starting."""
+        start = self.t_started or self.t_delivered
+        return max(0.0, start - self.t_hook) if start else 0.0
+
+
+@dataclass
+class _KeyState:
+    coalesce: bool = True
+    down: bool = False
+    last_down: float = float("-inf")
+    last_accepted: float = float("-inf")
+    in_flight: Optional[HotkeyEvent] = None
+    pending: Optional[HotkeyEvent] = None
+
+
+@dataclass
+class DispatchStats:
+    delivered: int = 0
+    repeats_dropped: int = 0
+    bounces_dropped: int = 0
+    busy_dropped: int = 0
+    coalesced: int = 0
+    queue_delays: List[float] = field(default_factory=list)
+
+
+class HotkeyDispatcher:
+    def __init__(
+        self,
+        deliver: Callable[[HotkeyEvent], None],
+        debounce_seconds: float = 0.15,
+        clock: Callable[[], float] = time.monotonic,
+        max_recorded_delays: int = 256,
+        recorder: Optional[trace_recorder.TraceRecorder] = None,
+    ) -> None:
+        self.deliver = deliver
+        self.recorder = recorder
+        self.debounce_seconds = debounce_seconds
+        self.clock = clock
+        self.stats = DispatchStats()
+        self._max_recorded_delays = max_recorded_delays
+        self._keys: Dict[str, _KeyState] = {}
+        self._lock = threading.Lock()
+
+    def bind(self, key: str, coalesce: bool = True) -> None:
+        """Start dispatching `key`.
+
+        With coalesce=True, presses during a running action turn into one
+        follow-up action. With coalesce=False they are dropped, which suits
+        actions that open a dialog.
+        """
+        with self._lock:
+            self._keys[key] = _KeyState(coalesce=coalesce)
+
+    def on_key_event(self, key: str, is_down: bool, t: Optional[float] = None) -> bool:
+        """Feed one raw hook event. Returns True if it was delivered."""
+        now = self.clock() if t is None else t
+        recorder = self.recorder
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None:
+                return False
+            if recorder is not None:
+                recorder.record(trace_recorder.KIND_KEY_DOWN if is_down else trace_recorder.KIND_KEY_UP,
+                                key, t=now)
+
+            if not is_down:
+                state.down = False
+                return False
+
+            is_repeat = state.down and now - state.last_down < _REPEAT_WINDOW_SECONDS
+            state.down = True
+            state.last_down = now
+            if is_repeat:
+                self.stats.repeats_dropped += 1
+                if recorder is not None:
+                    recorder.record(trace_recorder.KIND_REPEAT_DROPPED, key, t=now)
+                return False
+
+            if now - state.last_accepted < self.debounce_seconds:
+                self.stats.bounces_dropped += 1
+                if recorder is not None:
+                    recorder.record(trace_recorder.KIND_BOUNCE_DROPPED, key, t=now)
+                return False
+            state.last_accepted = now
+
+            event = HotkeyEvent(key=key, t_hook=now)
+            if state.in_flight is not None:
+                if not state.coalesce:
+                    self.stats.busy_dropped += 1
+                    if recorder is not None:
+                        recorder.record(trace_recorder.KIND_BUSY_DROPPED, key, t=now)
+                elif state.pending is None:
+                    state.pending = event
+                else:
+                    state.pending.coalesced += 1
+                    self.stats.coalesced += 1
+                    if recorder is not None:
+                        recorder.record(trace_recorder.KIND_COALESCED, key, state.pending.coalesced, t=now)
+                return False
+
+            state.in_flight = event
+            event.t_delivered = self.clock()
+            self.stats.delivered += 1
+            if recorder is not None:
+                recorder.record(trace_recorder.KIND_DELIVERED, key, t=event.t_delivered)
+
+        self.deliver(event)
+        return True
+
+    def action_started(self, event: HotkeyEvent) -> None:
+        event.t_started = self.clock()
+        if self.recorder is not None:
+            self.recorder.record(trace_recorder.KIND_ACTION_STARTED, event.key, event.coalesced,
+                                 t=event.t_started)
+
+    def action_finished(self, event: HotkeyEvent) -> None:
+        """Mark the key's action as done; delivers a coalesced press, if any.
+
+        The follow-up is delivered on the calling thread, so `deliver` must
+        post it to the action thread's event loop rather than run it inline.
+        """
+        event.t_finished = self.clock()
+        if self.recorder is not None:
+            self.recorder.record(trace_recorder.KIND_ACTION_FINISHED, event.key, t=event.t_finished)
+        with self._lock:
+            delays = self.stats.queue_delays
+            delays.append(event.queue_delay)
+            if len(delays) > self._max_recorded_delays:
+                del delays[: len(delays) - self._max_recorded_delays]
+
+            state = self._keys.get(event.key)
+            if state is None or state.in_flight is not event:
+                return
+            state.in_flight = state.pending
+            state.pending = None
+            follow_up = state.in_flight
+            if follow_up is None:
+                return
+            follow_up.t_delivered = self.clock()
+            self.stats.delivered += 1
+            if self.recorder is not None:
+                self.recorder.record(trace_recorder.KIND_DELIVERED, follow_up.key, follow_up.coalesced,
+                                     t=follow_up.t_delivered)
+
+        self.deliver(follow_up)
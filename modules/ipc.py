@@ -0,0 +1,187 @@
+"""Local command channel to the running instance.
+
+The instance holding the single-instance lock listens on a loopback TCP
+socket and publishes "<port> <token>" in an endpoint file next to the lock
+file (the per-user temp directory). A second launch such as
+`OpenH3CSystemControl --toggle-mic` reads that file, sends one JSON line
+and prints the JSON reply, without starting Qt.
+
+Loopback TCP rather than a named pipe because the app runs elevated, and a
+pipe created by an elevated process can't be opened by the same user's
+non-elevated macro tools. The token keeps other local users out.
+
+The client side only uses the standard library (socket, json) so it starts
+fast enough to be fired from macros and Stream Deck buttons.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# CLI flag -> command name sent to the running instance.
+COMMAND_FLAGS = {
+    "--toggle-mic": "toggle-mic",
+    "--mute": "mute",
+    "--unmute": "unmute",
+    "--status": "status",
+    "--switch-megaos": "switch-megaos",
+    "--dump-trace": "dump-trace",
+}
+
+EXIT_OK = 0
+EXIT_COMMAND_FAILED = 1
+EXIT_NOT_RUNNING = 2
+
+_CLIENT_TIMEOUT_SECONDS = 5.0
+_MAX_MESSAGE_BYTES = 64 * 1024
+
+
+def endpoint_path(app_id: str, lock_dir: Optional[str] = None) -> str:
+    return os.path.join(lock_dir or tempfile.gettempdir(), f"{app_id}.ipc")
+
+
+def command_from_argv(argv: List[str]) -> Optional[str]:
+    for arg in argv[1:]:
+        if arg in COMMAND_FLAGS:
+            return COMMAND_FLAGS[arg]
+    return None
+
+
+def _read_line(conn: socket.socket) -> bytes:
+    data = b""
+    while not data.endswith(b"\n"):
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        data += chunk
+        if len(data) > _MAX_MESSAGE_BYTES:
+            raise ValueError("IPC message too large")
+    return data
+
+
+def send_command(app_id: str, command: str, lock_dir: Optional[str] = None,
+                 timeout: float = _CLIENT_TIMEOUT_SECONDS) -> Optional[Dict[str, Any]]:
+    """Send a command to the running instance.
+
+    Returns the reply dict, or None if no instance is listening.
+    """
+    try:
+        with open(endpoint_path(app_id, lock_dir), "r", encoding="ascii") as fh:
+            port_text, token = fh.read().split()
+        port = int(port_text)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        with socket.create_connection(("127.0.0.1", port), timeout=timeout) as conn:
+            conn.sendall(json.dumps({"token": token, "command": command}).encode("utf-8") + b"\n")
+            reply = _read_line(conn)
+    except OSError:
+        return None
+    if not reply:
+        return None
+    return json.loads(reply)
+
+
+def run_client(app_id: str, command: str) -> int:
+    """Entry point for `--toggle-mic` and friends; returns the exit code."""
+    try:
+        reply = send_command(app_id, command)
+    except ValueError:
+        reply = {"ok": False, "error": "invalid reply"}
+    if reply is None:
+        reply = {"ok": False, "error": "not running"}
+        code = EXIT_NOT_RUNNING
+    else:
+        code = EXIT_OK if reply.get("ok") else EXIT_COMMAND_FAILED
+    # Windowed builds have no stdout; the exit code is the answer then.
+    if sys.stdout is not None:
+        try:
+            sys.stdout.write(json.dumps(reply, ensure_ascii=False) + "\n")
+            sys.stdout.flush()
+        except Exception:
+            pass
+    return code
+
+
+class IpcServer:
+    def __init__(self, app_id: str, handler: Callable[[str], Dict[str, Any]],
+                 lock_dir: Optional[str] = None) -> None:
+        """`handler(command)` runs on the listener thread and returns the
+        reply dict; it must hop to another thread itself if needed."""
+        self.app_id = app_id
+        self.handler = handler
+        self.path = endpoint_path(app_id, lock_dir)
+        self._socket: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._token = ""
+
+    def start(self) -> None:
+        import secrets
+
+        self._token = secrets.token_hex(16)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.bind(("127.0.0.1", 0))
+        sock.listen(8)
+        self._socket = sock
+
+        # Only the current user may read the token.
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="ascii") as fh:
+            fh.write(f"{sock.getsockname()[1]} {self._token}")
+
+        self._thread = threading.Thread(target=self._serve, name="ipc-server", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        sock, self._socket = self._socket, None
+        if sock is not None:
+            try:
+                # Wakes up accept() on POSIX, where close() alone does not.
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                sock.close()
+            except OSError:
+                pass
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _serve(self) -> None:
+        import hmac
+
+        from loguru import logger
+
+        logger.info(f"IPC server listening, endpoint file {self.path}")
+        while self._socket is not None:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                # Socket closed by stop().
+                break
+            with conn:
+                try:
+                    conn.settimeout(_CLIENT_TIMEOUT_SECONDS)
+                    request = json.loads(_read_line(conn) or b"{}")
+                    if not hmac.compare_digest(str(request.get("token", "")), self._token):
+                        reply = {"ok": False, "error": "unauthorized"}
+                    else:
+                        command = str(request.get("command", ""))
+                        logger.info(f"IPC command: {command}")
+                        reply = self.handler(command)
+                except Exception as e:
+                    logger.warning(f"IPC request failed: {e}")
+                    reply = {"ok": False, "error": str(e)}
+                try:
+                    conn.sendall(json.dumps(reply, ensure_ascii=False).encode("utf-8") + b"\n")
+                except OSError:
+                    pass
@@ -0,0 +1,271 @@
+"""One system-wide keyboard hook with a scan-code dispatch table.
+
+Any keyboard hook runs for every keystroke on the system, releases
+included. With the `keyboard` library each of them goes through its own
+bookkeeping (KeyboardEvent objects, pressed-key tables, a queue to a
+second thread, per-key handler lists) before our handler sees it. Here
+there is exactly one callback, and the first thing it does is look the
+scan code up in a table built at startup; unbound keys return right away.
+
+- On Windows the hook is our own WH_KEYBOARD_LL hook, on a thread with a
+  message loop. The `keyboard` library is not imported at all when every
+  bound key is a function key.
+- Elsewhere a single `keyboard.hook()` callback does the same lookup.
+
+Bindings come from config (HOTKEY_BINDINGS, key name -> action), so the
+actions are no longer tied to F20/F21. Key names are resolved to scan
+codes once; integers are taken as scan codes.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+from loguru import logger
+
+ACTION_TOGGLE_MIC = "toggle_mic"
+ACTION_SWITCH_MEGAOS = "switch_megaos"
+
+# Whether presses during a running action become one follow-up action
+# (True) or are dropped (False, for actions that open a dialog).
+ACTION_COALESCE = {
+    ACTION_TOGGLE_MIC: True,
+    ACTION_SWITCH_MEGAOS: False,
+}
+
+# Set 1 scan codes of the function keys, as Windows reports them.
+_WINDOWS_FUNCTION_KEYS = {f"f{n}": 0x3B + n - 1 for n in range(1, 11)}
+_WINDOWS_FUNCTION_KEYS.update({"f11": 0x57, "f12": 0x58})
+_WINDOWS_FUNCTION_KEYS.update({f"f{n}": 0x64 + n - 13 for n in range(13, 24)})
+_WINDOWS_FUNCTION_KEYS["f24"] = 0x76
+
+KeyOnEvent = Callable[[str, bool], None]
+# on_timing(key or None, event tick count, perf_counter() at callback entry)
+TimingFunc = Callable[[Optional[str], int, float], None]
+
+# dwExtraInfo of the keystroke self_test() injects; the hook swallows it.
+_SELF_TEST_MARKER = 0x4F48_3343
+# Reserved virtual-key code, in case the hook is gone and it gets through.
+_SELF_TEST_VK = 0xFF
+
+
+def resolve_scan_codes(key: Union[str, int]) -> List[int]:
+    """Scan codes for a key name (or a scan code as is)."""
+    if isinstance(key, int):
+        return [key]
+    name = key_name(key)
+    if os.name == "nt" and name in _WINDOWS_FUNCTION_KEYS:
+        return [_WINDOWS_FUNCTION_KEYS[name]]
+    import keyboard
+
+    return list(keyboard.key_to_scan_codes(name))
+
+
+def build_scan_code_table(keys: Iterable[Union[str, int]],
+                          resolve: Callable[[Union[str, int]], List[int]] = resolve_scan_codes) -> Dict[int, str]:
+    """Map every scan code of the given keys to the key's name."""
+    table: Dict[int, str] = {}
+    for key in keys:
+        name = key_name(key)
+        for scan_code in resolve(key):
+            if table.get(scan_code, name) != name:
+                logger.warning(f"Keys {table[scan_code]!r} and {name!r} share scan code {scan_code}; "
+                               f"using {name!r}.")
+            table[scan_code] = name
+    return table
+
+
+class KeyboardHook:
+    def __init__(self, keys: Iterable[Union[str, int]], on_key: KeyOnEvent,
+                 resolve: Callable[[Union[str, int]], List[int]] = resolve_scan_codes,
+                 on_timing: Optional[TimingFunc] = None) -> None:
+        self.table = build_scan_code_table(keys, resolve)
+        self.on_key = on_key
+        # Called on the hook thread after every callback (Windows hook only).
+        self.on_timing = on_timing
+        self._backend: Optional[object] = None
+
+    def handle_scan_code(self, scan_code: int, is_down: bool) -> None:
+        """The per-keystroke path: one dict lookup for unbound keys."""
+        key = self.table.get(scan_code)
+        if key is not None:
+            self.on_key(key, is_down)
+
+    def install(self) -> None:
+        """Start receiving keys. Raises if no hook could be installed."""
+        if os.name == "nt":
+            backend = _WindowsLowLevelHook(self.table, self.on_key, self.on_timing)
+        else:
+            backend = _KeyboardLibraryHook(self.handle_scan_code)
+        backend.install()
+        self._backend = backend
+
+    def uninstall(self) -> None:
+        if self._backend is not None:
+            self._backend.uninstall()
+            self._backend = None
+
+    def reinstall(self) -> None:
+        """Remove the hook (if the OS hasn't already) and install a new one."""
+        self.uninstall()
+        self.install()
+
+    def self_test(self, timeout: float = 1.0) -> Optional[bool]:
+        """Inject a marked keystroke and check that the hook sees it.
+
+        Returns None if the backend can't be tested this way.
+        """
+        self_test = getattr(self._backend, "self_test", None)
+        if self_test is None:
+            return None
+        return self_test(timeout)
+
+
+class _KeyboardLibraryHook:
+    """Fallback: one `keyboard.hook()` handler instead of one per key."""
+
+    def __init__(self, handle_scan_code: Callable[[int, bool], None]) -> None:
+        self.handle_scan_code = handle_scan_code
+        self._remove: Optional[Callable[[], None]] = None
+
+    def install(self) -> None:
+        import keyboard
+
+        handle, key_down = self.handle_scan_code, keyboard.KEY_DOWN
+        self._remove = keyboard.hook(lambda e: handle(e.scan_code, e.event_type == key_down))
+
+    def uninstall(self) -> None:
+        if self._remove is not None:
+            self._remove()
+            self._remove = None
+
+
+class _WindowsLowLevelHook:
+    """WH_KEYBOARD_LL on a dedicated thread running a message loop."""
+
+    _WH_KEYBOARD_LL = 13
+    _HC_ACTION = 0
+    _WM_QUIT = 0x0012
+    _WM_KEYDOWN = 0x0100
+    _WM_SYSKEYDOWN = 0x0104
+
+    def __init__(self, table: Dict[int, str], on_key: KeyOnEvent, on_timing: Optional[TimingFunc] = None) -> None:
+        self.table = table
+        self.on_key = on_key
+        self.on_timing = on_timing
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+        self._error: Optional[str] = None
+        self._self_test_seen = threading.Event()
+
+    def install(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="keyboard-hook", daemon=True)
+        self._thread.start()
+        self._ready.wait(5.0)
+        if self._error is not None:
+            raise OSError(self._error)
+
+    def _run(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+
+        class KBDLLHOOKSTRUCT(ctypes.Structure):
+            _fields_ = [("vkCode", wintypes.DWORD),
+                        ("scanCode", wintypes.DWORD),
+                        ("flags", wintypes.DWORD),
+                        ("time", wintypes.DWORD),
+                        ("dwExtraInfo", ctypes.c_size_t)]
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        HOOKPROC = ctypes.WINFUNCTYPE(ctypes.c_ssize_t, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+        user32.SetWindowsHookExW.argtypes = (ctypes.c_int, HOOKPROC, wintypes.HINSTANCE, wintypes.DWORD)
+        user32.SetWindowsHookExW.restype = wintypes.HHOOK
+        user32.CallNextHookEx.argtypes = (wintypes.HHOOK, ctypes.c_int, wintypes.WPARAM, wintypes.LPARAM)
+        user32.CallNextHookEx.restype = ctypes.c_ssize_t
+        kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+
+        table_get = self.table.get
+        on_key = self.on_key
+        on_timing = self.on_timing
+        call_next = user32.CallNextHookEx
+        hook_struct = ctypes.POINTER(KBDLLHOOKSTRUCT)
+        down_messages = (self._WM_KEYDOWN, self._WM_SYSKEYDOWN)
+        self_test_seen = self._self_test_seen
+        perf_counter = time.perf_counter
+
+        def proc(n_code, w_param, l_param):
+            # Runs for every keystroke on the system: for unbound keys this
+            # is one struct read, one dict lookup and the timing hook.
+            if n_code == self._HC_ACTION:
+                started = perf_counter()
+                data = ctypes.cast(l_param, hook_struct).contents
+                if data.dwExtraInfo == _SELF_TEST_MARKER:
+                    self_test_seen.set()
+                    # Swallow it; no window needs to see the test key.
+                    return 1
+                key = table_get(data.scanCode)
+                if key is not None:
+                    try:
+                        on_key(key, w_param in down_messages)
+                    except Exception as e:
+                        logger.error(f"Hotkey handler failed: {e}")
+                if on_timing is not None:
+                    on_timing(key, data.time, started)
+            return call_next(None, n_code, w_param, l_param)
+
+        # Keep a reference, or the callback is freed under the hook.
+        self._proc = HOOKPROC(proc)
+        hook = user32.SetWindowsHookExW(self._WH_KEYBOARD_LL, self._proc, kernel32.GetModuleHandleW(None), 0)
+        self._thread_id = kernel32.GetCurrentThreadId()
+        if not hook:
+            self._error = f"SetWindowsHookEx failed (error {ctypes.GetLastError()})"
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            msg = wintypes.MSG()
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+        finally:
+            user32.UnhookWindowsHookEx(hook)
+
+    def uninstall(self) -> None:
+        if self._thread_id:
+            import ctypes
+
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self._WM_QUIT, 0, 0)
+            self._thread_id = 0
+            if self._thread is not None:
+                self._thread.join(1.0)
+
+    def self_test(self, timeout: float) -> bool:
+        import ctypes
+
+        KEYEVENTF_KEYUP = 0x0002
+        self._self_test_seen.clear()
+        keybd_event = ctypes.windll.user32.keybd_event
+        keybd_event(_SELF_TEST_VK, 0, 0, ctypes.c_size_t(_SELF_TEST_MARKER))
+        keybd_event(_SELF_TEST_VK, 0, KEYEVENTF_KEYUP, ctypes.c_size_t(_SELF_TEST_MARKER))
+        return self._self_test_seen.wait(timeout)
+
+
+def key_name(key: Union[str, int]) -> str:
+    """Name a key goes by in hotkey events, metrics and logs."""
+    return str(key).strip().lower()
+
+
+def action_bindings(bindings: Dict[Union[str, int], str]) -> Dict[Union[str, int], str]:
+    """Config bindings (key -> action) with unknown actions dropped."""
+    valid: Dict[Union[str, int], str] = {}
+    for key, action in bindings.items():
+        if action not in ACTION_COALESCE:
+            logger.warning(f"Unknown hotkey action {action!r} for key {key!r}; ignored.")
+            continue
+        valid[key] = action
+    return valid
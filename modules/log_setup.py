@@ -0,0 +1,258 @@
+"""Process-wide logging setup.
+
+loguru's default sink writes to stderr synchronously, inside the caller.
+On the F20/F21 path that caller is the keyboard hook or the UI thread, so
+a slow disk (or a full console pipe) would stall the hotkey. Here every
+record is instead handed to a bounded in-memory queue and written by one
+background thread:
+
+- as compact JSON lines to `logs/OpenH3CSystemControl.jsonl` next to the
+  app, rotated by size and by age, keeping a few old files,
+- as readable text to stderr, when there is one (the windowed build has
+  none, which is why nothing in the app uses print()).
+
+If the queue is full, records are dropped and counted rather than making
+the caller wait. loguru's own `enqueue=True` is not used because it writes
+to a pipe, which blocks the caller once the pipe buffer is full.
+
+Each JSON line carries the wall-clock time, a monotonic timestamp for
+measuring intervals, and the ID of the action (hotkey press, menu click,
+IPC command) it was logged under, see action_id().
+"""
+
+from __future__ import annotations
+
+import atexit
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO, Tuple
+
+from loguru import logger
+
+LOG_DIR_NAME = "logs"
+LOG_FILE_NAME = "OpenH3CSystemControl.jsonl"
+
+_QUEUE_SIZE = 4096
+_STOP = object()
+_action_ids = itertools.count(1)
+
+
+def default_log_dir() -> str:
+    if getattr(sys, "frozen", False):
+        app_dir = os.path.dirname(sys.executable)
+    else:
+        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(app_dir, LOG_DIR_NAME)
+
+
+def action_id(source: str) -> str:
+    """New ID for one user action, e.g. "f20-12" or "ipc-3".
+
+    Use as `with logger.contextualize(action=action_id("f20")):` so that
+    every record logged while handling the action carries it.
+    """
+    return f"{source}-{next(_action_ids)}"
+
+
+class _RotatingFile:
+    def __init__(self, path: str, max_bytes: int, max_age_seconds: float, backup_count: int) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.backup_count = backup_count
+        self._fh: Optional[TextIO] = None
+        self._opened_at = 0.0
+
+    def _open(self) -> TextIO:
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8")
+        if not self._opened_at:
+            self._opened_at = time.time()
+            if os.name == "nt" and self._fh.tell():
+                # st_ctime is the creation time there, so age survives
+                # restarts. Only trusted for a file this process did not
+                # create: one created right after a rotation inherits the
+                # old file's creation time (NTFS tunneling).
+                try:
+                    self._opened_at = os.stat(self.path).st_ctime
+                except OSError:
+                    pass
+        return self._fh
+
+    def _should_rotate(self, fh: TextIO) -> bool:
+        if fh.tell() >= self.max_bytes:
+            return True
+        return self.max_age_seconds > 0 and time.time() - self._opened_at >= self.max_age_seconds
+
+    def _rotate(self) -> None:
+        self.close()
+        root, ext = os.path.splitext(self.path)
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{root}.{index}{ext}"
+            if os.path.exists(source):
+                os.replace(source, f"{root}.{index + 1}{ext}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{root}.1{ext}")
+        else:
+            os.remove(self.path)
+        self._opened_at = time.time()
+
+    def write(self, line: str) -> None:
+        fh = self._fh or self._open()
+        if fh.tell() and self._should_rotate(fh):
+            self._rotate()
+            fh = self._open()
+        fh.write(line)
+
+    def flush(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+
+class AsyncLogSink:
+    """loguru sink that only enqueues; a daemon thread does the I/O."""
+
+    def __init__(self, log_file: Optional[_RotatingFile], console: Optional[TextIO],
+                 queue_size: int = _QUEUE_SIZE) -> None:
+        self.log_file = log_file
+        self.console = console
+        self.dropped = 0
+        self._reported_dropped = 0
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message) -> None:
+        # Runs in the logging thread: take what is needed, never block.
+        record = message.record
+        item = (
+            time.monotonic(),
+            record["time"].timestamp(),
+            record["level"].name,
+            record["name"],
+            record["function"],
+            record["line"],
+            record["thread"].name,
+            record["message"],
+            record["extra"].get("action"),
+            record["exception"],
+        )
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                if self.dropped != self._reported_dropped:
+                    self._report_dropped()
+                break
+            self._write(item)
+            if self._queue.empty():
+                if self.dropped != self._reported_dropped:
+                    self._report_dropped()
+                self._flush()
+        self._flush()
+        if self.log_file is not None:
+            self.log_file.close()
+
+    def _write(self, item: Tuple[Any, ...]) -> None:
+        mono, ts, level, name, function, line, thread, text, action, exception = item
+        if exception is not None:
+            import traceback
+
+            text += "\n" + "".join(traceback.format_exception(exception.type, exception.value,
+                                                              exception.traceback)).rstrip()
+        if self.log_file is not None:
+            entry: Dict[str, Any] = {"ts": round(ts, 6), "mono": round(mono, 6), "level": level,
+                                     "src": f"{name}:{function}:{line}", "thread": thread, "msg": text}
+            if action is not None:
+                entry["action"] = action
+            try:
+                self.log_file.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            except Exception:
+                self.dropped += 1
+        if self.console is not None:
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ts)) + f".{int(ts * 1000) % 1000:03d}"
+            prefix = f"[{action}] " if action is not None else ""
+            try:
+                self.console.write(f"{stamp} | {level:<8} | {name}:{function}:{line} - {prefix}{text}\n")
+            except Exception:
+                pass
+
+    def _report_dropped(self) -> None:
+        count, self._reported_dropped = self.dropped - self._reported_dropped, self.dropped
+        now = time.time()
+        self._write((time.monotonic(), now, "WARNING", __name__, "_run", 0,
+                     threading.current_thread().name, f"{count} log records dropped (queue full)",
+                     None, None))
+
+    def _flush(self) -> None:
+        for output in (self.log_file, self.console):
+            if output is not None:
+                try:
+                    output.flush()
+                except Exception:
+                    pass
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """Write out what is queued, then close the file."""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+_sink: Optional[AsyncLogSink] = None
+
+
+def setup_logging(log_dir: Optional[str] = None, level: str = "DEBUG",
+                  max_bytes: int = 1024 * 1024, rotate_hours: float = 24.0,
+                  backup_count: int = 5) -> AsyncLogSink:
+    """Replace loguru's default sink with the asynchronous one. Idempotent."""
+    global _sink
+    if _sink is not None:
+        return _sink
+
+    log_file: Optional[_RotatingFile] = _RotatingFile(
+        os.path.join(log_dir or default_log_dir(), LOG_FILE_NAME),
+        max_bytes=max_bytes,
+        max_age_seconds=rotate_hours * 3600.0,
+        backup_count=backup_count,
+    )
+    try:
+        os.makedirs(os.path.dirname(log_file.path), exist_ok=True)
+    except OSError:
+        log_file = None
+
+    _sink = AsyncLogSink(log_file, sys.stderr)
+    logger.remove()
+    logger.add(_sink, level=level, format="{message}", backtrace=False, diagnose=False, catch=True)
+    atexit.register(shutdown_logging)
+    return _sink
+
+
+def dropped_records() -> int:
+    return _sink.dropped if _sink is not None else 0
+
+
+def shutdown_logging() -> None:
+    """Flush and close the log file. Registered with atexit."""
+    global _sink
+    if _sink is not None:
+        logger.remove()
+        _sink.stop()
+        _sink = None
@@ -0,0 +1,70 @@
+"""Asynchronous MegaOS switch.
+
+Runs the boot order change and the reboot on a worker thread so the Qt
+event loop keeps serving the tray and hotkeys while bcdedit runs.
+Progress and results are reported through Qt signals, which are delivered
+on the UI thread. The thread itself lives in modules.megaos_switch_worker,
+which headless mode uses without Qt.
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from modules.megaos_switch_worker import (OUTCOME_CANCELLED, OUTCOME_SUCCEEDED,
+                                          OUTCOME_TIMED_OUT, CancellableRunner,
+                                          JobCancelled, MegaOSSwitchWorker)
+
+__all__ = ["CancellableRunner", "JobCancelled", "MegaOSSwitchJob"]
+
+
+class MegaOSSwitchJob(QObject):
+    stage_changed = pyqtSignal(str)
+    # Boot order was changed (and the reboot was requested, if enabled).
+    succeeded = pyqtSignal()
+    # change_boot_order()/reboot exit code.
+    failed = pyqtSignal(int)
+    cancelled = pyqtSignal()
+    timed_out = pyqtSignal()
+
+    def __init__(self, timeout_seconds: float = 60.0, reboot: bool = True,
+                 use_native_uefi: bool = False, parent=None) -> None:
+        super().__init__(parent)
+        self.timeout_seconds = timeout_seconds
+        self.reboot = reboot
+        self.use_native_uefi = use_native_uefi
+        self._worker: Optional[MegaOSSwitchWorker] = None
+
+    def is_running(self) -> bool:
+        return self._worker is not None and self._worker.is_running()
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._worker = MegaOSSwitchWorker(
+            on_stage=self.stage_changed.emit,
+            on_done=self._on_done,
+            timeout_seconds=self.timeout_seconds,
+            reboot=self.reboot,
+            use_native_uefi=self.use_native_uefi,
+        )
+        self._worker.start()
+
+    def cancel(self) -> None:
+        """Stop the job; a running child process is killed. The reboot
+        itself cannot be taken back once shutdown.exe was started."""
+        if self._worker is not None:
+            self._worker.cancel()
+
+    def _on_done(self, outcome: str, code: int) -> None:
+        # Worker thread; the signals are queued to the UI thread.
+        if outcome == OUTCOME_CANCELLED:
+            self.cancelled.emit()
+        elif outcome == OUTCOME_TIMED_OUT:
+            self.timed_out.emit()
+        elif outcome == OUTCOME_SUCCEEDED:
+            self.succeeded.emit()
+        else:
+            self.failed.emit(code)
@@ -0,0 +1,151 @@
+"""MegaOS switch on a worker thread, without Qt.
+
+Runs the boot order change and the reboot on a background thread and
+reports progress through plain callbacks, which are called on that worker
+thread. modules.megaos_switch_job wraps this for the tray app and turns the
+callbacks into Qt signals; headless mode posts them to its own event loop.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import threading
+import time
+from typing import Callable, Optional
+
+from loguru import logger
+
+from modules import efivars
+from modules import switch_to_megaos
+
+# Outcomes passed to on_done, together with the exit code.
+OUTCOME_SUCCEEDED = "succeeded"
+OUTCOME_FAILED = "failed"
+OUTCOME_CANCELLED = "cancelled"
+OUTCOME_TIMED_OUT = "timed_out"
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class CancellableRunner:
+    """Drop-in for subprocess.run that can be killed from another thread and
+    shares one deadline across every process it starts."""
+
+    def __init__(self, timeout_seconds: float) -> None:
+        self.deadline = time.monotonic() + timeout_seconds
+        self._lock = threading.Lock()
+        self._proc: Optional[subprocess.Popen] = None
+        self.cancelled = False
+        self.timed_out = False
+
+    def __call__(self, args, capture_output=False, text=False, **kwargs):
+        if capture_output:
+            kwargs["stdout"] = subprocess.PIPE
+            kwargs["stderr"] = subprocess.PIPE
+
+        with self._lock:
+            if self.cancelled:
+                raise JobCancelled()
+            proc = subprocess.Popen(args, text=text, **kwargs)
+            self._proc = proc
+
+        try:
+            remaining = max(0.0, self.deadline - time.monotonic())
+            stdout, stderr = proc.communicate(timeout=remaining)
+        except subprocess.TimeoutExpired:
+            self.timed_out = True
+            proc.kill()
+            proc.communicate()
+            raise
+        finally:
+            with self._lock:
+                self._proc = None
+
+        if self.cancelled:
+            raise JobCancelled()
+        return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            if self._proc is not None:
+                try:
+                    self._proc.kill()
+                except OSError:
+                    pass
+
+
+class MegaOSSwitchWorker:
+    def __init__(
+        self,
+        on_stage: Callable[[str], None],
+        on_done: Callable[[str, int], None],
+        timeout_seconds: float = 60.0,
+        reboot: bool = True,
+        use_native_uefi: bool = False,
+    ) -> None:
+        """`on_stage(stage)` and `on_done(outcome, code)` run on the worker
+        thread; `outcome` is one of the OUTCOME_* names."""
+        self.on_stage = on_stage
+        self.on_done = on_done
+        self.timeout_seconds = timeout_seconds
+        self.reboot = reboot
+        self.use_native_uefi = use_native_uefi
+        self._runner: Optional[CancellableRunner] = None
+        self._thread: Optional[threading.Thread] = None
+        # Set before on_done, which the thread outlives for a moment.
+        self._finished = False
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and not self._finished
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        self._runner = CancellableRunner(self.timeout_seconds)
+        self._finished = False
+        self._thread = threading.Thread(target=self._run, name="megaos-switch", daemon=True)
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Stop the job; a running child process is killed. The reboot
+        itself cannot be taken back once shutdown.exe was started."""
+        if self._runner is not None:
+            logger.info("Cancelling MegaOS switch...")
+            self._runner.cancel()
+
+    def _run(self) -> None:
+        runner = self._runner
+        started = time.monotonic()
+        code = switch_to_megaos.EXIT_EXCEPTION
+        try:
+            store = efivars.default_store() if self.use_native_uefi else None
+            code = switch_to_megaos.change_boot_order(
+                runner=runner, on_stage=self.on_stage, store=store)
+            if not self._finished_early(runner) and code == 0 and self.reboot:
+                self.on_stage(switch_to_megaos.STAGE_REBOOT)
+                code = switch_to_megaos.reboot_now(runner=runner)
+        except JobCancelled:
+            pass
+        except subprocess.TimeoutExpired:
+            pass
+        except Exception as e:
+            logger.error(f"MegaOS switch failed: {e}")
+            code = switch_to_megaos.EXIT_EXCEPTION
+
+        logger.info(f"MegaOS switch job finished in {time.monotonic() - started:.2f}s")
+        self._finished = True
+        if runner.cancelled:
+            self.on_done(OUTCOME_CANCELLED, code)
+        elif runner.timed_out:
+            self.on_done(OUTCOME_TIMED_OUT, code)
+        elif code == 0:
+            self.on_done(OUTCOME_SUCCEEDED, code)
+        else:
+            self.on_done(OUTCOME_FAILED, code)
+
+    @staticmethod
+    def _finished_early(runner: CancellableRunner) -> bool:
+        return runner.cancelled or runner.timed_out
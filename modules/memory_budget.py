@@ -0,0 +1,207 @@
+"""Idle memory trimming and memory counters.
+
+The app spends nearly all day waiting for a key press, so most of what it
+keeps resident (Qt, comtypes, pycaw, psutil) is overhead. MemoryBudget
+watches for activity and, once nothing has happened for `idle_seconds`:
+
+1. runs the registered releasers, which drop caches that are cheap to
+   rebuild (process names, Qt pixmap cache, regex and line caches),
+2. runs a full garbage collection,
+3. trims the working set (SetProcessWorkingSetSize(-1, -1) on Windows,
+   malloc_trim(0) with glibc), so untouched pages leave physical memory.
+
+The next press may soft-fault a few pages back in; that is the price of
+the smaller idle footprint.
+
+RSS and private bytes are recorded at startup, after the first action,
+and before/after each trim, and shown in Diagnostics. Activity only sets a
+timestamp, and after a trim no timer is pending until the next action.
+All methods must be called from one thread (the UI or loop thread).
+"""
+
+from __future__ import annotations
+
+import gc
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+ScheduleFunc = Callable[[float, Callable[[], None]], None]
+
+SAMPLE_STARTUP = "startup"
+SAMPLE_FIRST_USE = "first_use"
+SAMPLE_BEFORE_TRIM = "before_trim"
+SAMPLE_AFTER_TRIM = "after_trim"
+_SAMPLE_ORDER = (SAMPLE_STARTUP, SAMPLE_FIRST_USE, SAMPLE_BEFORE_TRIM, SAMPLE_AFTER_TRIM)
+
+
+def memory_counters() -> Dict[str, Optional[int]]:
+    """Resident set size and private (non-shared) bytes, in KiB."""
+    rss_kb = private_kb = None
+    try:
+        if os.name == "nt":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS_EX(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD),
+                            ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t),
+                            ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t),
+                            ("PeakPagefileUsage", ctypes.c_size_t),
+                            ("PrivateUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS_EX()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            if ctypes.windll.psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                                        ctypes.byref(counters), counters.cb):
+                rss_kb = counters.WorkingSetSize // 1024
+                private_kb = counters.PrivateUsage // 1024
+        else:
+            with open("/proc/self/status", "r") as fh:
+                for line in fh:
+                    if line.startswith("VmRSS:"):
+                        rss_kb = int(line.split()[1])
+                    elif line.startswith("RssAnon:"):
+                        private_kb = int(line.split()[1])
+    except Exception:
+        pass
+    return {"rss_kb": rss_kb, "private_kb": private_kb}
+
+
+def trim_working_set() -> bool:
+    """Ask the OS to drop this process's unused resident pages."""
+    try:
+        if os.name == "nt":
+            import ctypes
+            from ctypes import wintypes
+
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            kernel32.SetProcessWorkingSetSize.argtypes = (wintypes.HANDLE, ctypes.c_size_t, ctypes.c_size_t)
+            # (SIZE_T)-1 for both: remove as many pages as possible.
+            return bool(kernel32.SetProcessWorkingSetSize(kernel32.GetCurrentProcess(),
+                                                          ctypes.c_size_t(-1), ctypes.c_size_t(-1)))
+        import ctypes
+        import ctypes.util
+
+        libc_name = ctypes.util.find_library("c")
+        if libc_name is None:
+            return False
+        libc = ctypes.CDLL(libc_name)
+        if not hasattr(libc, "malloc_trim"):
+            return False
+        return bool(libc.malloc_trim(0))
+    except Exception as e:
+        logger.debug(f"Working set trim failed: {e}")
+        return False
+
+
+class MemoryBudget:
+    def __init__(self, idle_seconds: float, schedule: ScheduleFunc, enabled: bool = True,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.idle_seconds = idle_seconds
+        self.enabled = enabled
+        self._schedule = schedule
+        self._clock = clock
+        self._releasers: List[Tuple[str, Callable[[], None]]] = []
+        self._last_activity = clock()
+        self._check_pending = False
+        self._trimmed = False
+        self.trims = 0
+        self.samples: Dict[str, Dict[str, Optional[float]]] = {}
+
+    def add_releaser(self, name: str, release: Callable[[], None]) -> None:
+        """Register a cache to drop when idle. It must be safe to rebuild later."""
+        self._releasers.append((name, release))
+
+    def record(self, label: str) -> Dict[str, Optional[float]]:
+        sample: Dict[str, Optional[float]] = dict(memory_counters())
+        sample["time"] = time.time()
+        self.samples[label] = sample
+        return sample
+
+    def started(self) -> None:
+        """Call once startup has finished; starts the first idle period."""
+        self.record(SAMPLE_STARTUP)
+        self._touch()
+
+    def activity(self) -> None:
+        """Call after each user action (hotkey, menu, IPC command)."""
+        if SAMPLE_FIRST_USE not in self.samples:
+            self.record(SAMPLE_FIRST_USE)
+        self._touch()
+
+    def _touch(self) -> None:
+        self._last_activity = self._clock()
+        self._trimmed = False
+        if self.enabled and not self._check_pending:
+            self._check_pending = True
+            self._schedule(self.idle_seconds, self._check)
+
+    def _check(self) -> None:
+        self._check_pending = False
+        if not self.enabled or self._trimmed:
+            return
+        idle_for = self._clock() - self._last_activity
+        if idle_for < self.idle_seconds:
+            self._check_pending = True
+            self._schedule(self.idle_seconds - idle_for, self._check)
+            return
+        self.trim()
+
+    def trim(self) -> None:
+        """Release caches, collect and trim the working set now."""
+        before = self.record(SAMPLE_BEFORE_TRIM)
+        started = time.perf_counter()
+        for name, release in self._releasers:
+            try:
+                release()
+            except Exception as e:
+                logger.warning(f"Releasing {name} failed: {e}")
+        collected = gc.collect()
+        trimmed = trim_working_set()
+        after = self.record(SAMPLE_AFTER_TRIM)
+        self._trimmed = True
+        self.trims += 1
+        logger.info(
+            f"Idle memory trim: RSS {_kb(before['rss_kb'])} -> {_kb(after['rss_kb'])}, "
+            f"private {_kb(before['private_kb'])} -> {_kb(after['private_kb'])}, "
+            f"{collected} objects collected, working set trimmed={trimmed}, "
+            f"{(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+
+    def format_lines(self) -> List[str]:
+        """One line per recorded sample, for the Diagnostics dialog."""
+        lines = []
+        for label in _SAMPLE_ORDER:
+            sample = self.samples.get(label)
+            if sample is not None:
+                lines.append(f"{label.replace('_', ' ')}: RSS {_kb(sample['rss_kb'])}, "
+                             f"private {_kb(sample['private_kb'])}")
+        now = memory_counters()
+        lines.append(f"now: RSS {_kb(now['rss_kb'])}, private {_kb(now['private_kb'])} "
+                     f"(trims: {self.trims})")
+        return lines
+
+
+def _kb(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value / 1024:.1f} MB"
+
+
+def release_common_caches() -> None:
+    """Standard library caches that are rebuilt on demand."""
+    import linecache
+    import re
+
+    re.purge()
+    linecache.clearcache()
@@ -0,0 +1,284 @@
+"""Latency metrics.
+
+A small in-process registry of histograms, one per (metric, labels):
+
+- `openh3c_action_seconds{action=...}`: how long toggle_mic,
+  change_boot_order, start/stop_h3c_sound and the process checks take,
+- `openh3c_hotkey_stage_seconds{key=..., stage=...}`: for each F20/F21
+  press, the time from the keyboard hook to the signal being delivered, the
+  COM call being done and the notification being shown,
+- `openh3c_keyboard_hook_callback_seconds` / `_lag_seconds{key=...}` and
+  `openh3c_gc_pause_seconds{generation=...}`: keyboard hook health, see
+  modules.hook_watchdog.
+
+Every histogram keeps Prometheus-style cumulative buckets plus the last few
+hundred samples, from which p50/p99 are computed. The data is shown by the
+tray's Diagnostics entry and, if enabled in config, served as Prometheus
+text on a loopback-only HTTP endpoint (MetricsExporter).
+
+Only the standard library is used, and observe() is a lock plus a few list
+operations, so it is safe to call on the hotkey path.
+"""
+
+from __future__ import annotations
+
+import functools
+import math
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+ACTION_SECONDS = "openh3c_action_seconds"
+HOTKEY_STAGE_SECONDS = "openh3c_hotkey_stage_seconds"
+HOOK_CALLBACK_SECONDS = "openh3c_keyboard_hook_callback_seconds"
+HOOK_LAG_SECONDS = "openh3c_keyboard_hook_lag_seconds"
+GC_PAUSE_SECONDS = "openh3c_gc_pause_seconds"
+
+_HELP = {
+    ACTION_SECONDS: "Duration of app actions.",
+    HOTKEY_STAGE_SECONDS: "Time from the keyboard hook to each stage of a hotkey action.",
+    HOOK_CALLBACK_SECONDS: "Time spent in the low-level keyboard hook callback.",
+    HOOK_LAG_SECONDS: "Time from a keystroke to the keyboard hook callback running.",
+    GC_PAUSE_SECONDS: "Duration of garbage collections.",
+}
+
+# Upper bounds in seconds; +Inf is implied.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_RECENT_SAMPLES = 512
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.recent: Deque[float] = deque(maxlen=_RECENT_SAMPLES)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Quantile of the recent samples (nearest rank), or None."""
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        rank = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+        return ordered[rank]
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Call collect() before every read, to move buffered samples in."""
+        self._collectors.append(collect)
+
+    def _collect(self) -> None:
+        for collect in list(self._collectors):
+            try:
+                collect()
+            except Exception:
+                pass
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """One dict per histogram: name, labels, count, sum, p50, p99."""
+        self._collect()
+        with self._lock:
+            items = sorted(self._histograms.items())
+            return [{
+                "name": name,
+                "labels": dict(labels),
+                "count": histogram.count,
+                "sum": histogram.total,
+                "p50": histogram.quantile(0.5),
+                "p99": histogram.quantile(0.99),
+            } for (name, labels), histogram in items]
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        self._collect()
+        lines: List[str] = []
+        with self._lock:
+            items = sorted(self._histograms.items())
+            seen = set()
+            for (name, labels), histogram in items:
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# HELP {name} {_HELP.get(name, name)}")
+                    lines.append(f"# TYPE {name} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, le=repr(bound))} {cumulative}")
+                lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total!r}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            # Quantiles of the recent samples, for tools that can't do
+            # histogram_quantile() across scrapes.
+            for quantile, suffix in ((0.5, "p50"), (0.99, "p99")):
+                for family in sorted(seen):
+                    lines.append(f"# TYPE {family}_recent_{suffix} gauge")
+                    for (name, labels), histogram in items:
+                        value = histogram.quantile(quantile)
+                        if name == family and value is not None:
+                            lines.append(f"{name}_recent_{suffix}{_format_labels(labels)} {value!r}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def observe(name: str, seconds: float, **labels: str) -> None:
+    _registry.observe(name, seconds, **labels)
+
+
+@contextmanager
+def timer(action: str) -> Iterator[None]:
+    """Record the duration of the block under openh3c_action_seconds."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _registry.observe(ACTION_SECONDS, time.perf_counter() - started, action=action)
+
+
+def timed(action: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator form of timer()."""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with timer(action):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_hotkey_stage(key: str, stage: str, t_hook: float) -> None:
+    """Record time.monotonic() - t_hook for one stage of a hotkey press."""
+    _registry.observe(HOTKEY_STAGE_SECONDS, max(0.0, time.monotonic() - t_hook), key=key, stage=stage)
+
+
+def format_table(snapshot: List[Dict[str, Any]]) -> str:
+    """Plain-text table of a snapshot() for the Diagnostics dialog."""
+    def ms(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value * 1000:.1f}"
+
+    rows = []
+    for item in snapshot:
+        labels = item["labels"]
+        if item["name"] == HOTKEY_STAGE_SECONDS:
+            what = f"{labels.get('key')} → {labels.get('stage')}"
+        elif item["name"] == HOOK_CALLBACK_SECONDS:
+            what = f"hook callback ({labels.get('key')})"
+        elif item["name"] == HOOK_LAG_SECONDS:
+            what = f"hook lag ({labels.get('key')})"
+        elif item["name"] == GC_PAUSE_SECONDS:
+            what = f"GC pause (gen {labels.get('generation')})"
+        else:
+            what = ", ".join(str(value) for value in labels.values()) or item["name"]
+        rows.append(f"{what}: n={item['count']}, p50={ms(item['p50'])} ms, p99={ms(item['p99'])} ms")
+    return "\n".join(rows)
+
+
+class MetricsExporter:
+    """Serves `GET /metrics` on 127.0.0.1 only, from a daemon thread.
+
+    The thread blocks in handle_request() with no timeout, so it does not
+    wake up while nobody scrapes; serve_forever() would poll for
+    shutdown() every 0.5 s.
+    """
+
+    def __init__(self, port: int, registry: Optional[MetricsRegistry] = None) -> None:
+        self.port = port
+        self.registry = registry or _registry
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> None:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                # Scrapes would otherwise go to stderr on every request.
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        self._server.daemon_threads = True
+        self._stopping = False
+        self._thread = threading.Thread(target=self._serve, args=(self._server,), name="metrics-exporter",
+                                        daemon=True)
+        self._thread.start()
+
+    def _serve(self, server) -> None:
+        while not self._stopping:
+            server.handle_request()
+
+    def stop(self) -> None:
+        if self._server is None:
+            return
+        self._stopping = True
+        # Wake the blocked handle_request() with a connection of our own.
+        try:
+            socket.create_connection(self._server.server_address[:2], timeout=1.0).close()
+        except OSError:
+            pass
+        self._thread.join(1.0)
+        self._server.server_close()
+        self._server = None
+        self._thread = None
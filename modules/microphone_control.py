@@ -1,46 +1,480 @@
-import keyboard
-import comtypes
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
-from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+import threading
+
 from loguru import logger
 
+# comtypes/pycaw are imported on first use: loading them (and the COM type
+# libraries they generate) is only needed once the mic key is pressed.
+
+
+class MicrophoneBackend:
+    """Where microphone endpoints come from.
+
+    The default implementation talks to Windows Core Audio through pycaw.
+    Anything with the same two methods can be installed with set_backend(),
+    which is how the endpoint cache is exercised without real hardware.
+    """
+
+    def open_default_endpoint(self):
+        """Return (device_id, endpoint) for the default capture device.
+
+        The endpoint must provide GetMute() and SetMute(mute, context).
+        """
+        raise NotImplementedError
+
+    def watch_default_device(self, on_change) -> None:
+        """Call on_change() whenever the default capture device changes,
+        is removed or stops being active."""
+        raise NotImplementedError
+
+    def watch_endpoint_volume(self, endpoint, on_mute):
+        """Call on_mute(bool) whenever the endpoint's mute state changes,
+        no matter which application changed it.
+
+        Returns a callable that removes the subscription.
+        """
+        raise NotImplementedError
+
+    def open_capture_endpoints(self):
+        """Return [(device_id, endpoint), ...] for every active capture
+        device, from a single enumeration."""
+        raise NotImplementedError
+
+    def watch_capture_devices(self, on_change) -> None:
+        """Call on_change() whenever a capture device is added, removed or
+        changes state."""
+        raise NotImplementedError
+
+    def enter_thread(self) -> None:
+        """Prepare the calling thread (the audio worker) for endpoint calls."""
+
+    def leave_thread(self) -> None:
+        """Undo enter_thread(). Every endpoint must be released by now."""
+
+
+class PycawMicrophoneBackend(MicrophoneBackend):
+    def __init__(self) -> None:
+        self._com_initialized = threading.local()
+        # Keep the notification client and its enumerator alive, COM only
+        # holds a raw pointer to the client.
+        self._notification_client = None
+        self._enumerator = None
+        self._capture_client = None
+        self._capture_enumerator = None
+
+    def _ensure_com(self) -> None:
+        if not getattr(self._com_initialized, "done", False):
+            import comtypes
+
+            comtypes.CoInitialize()
+            self._com_initialized.done = True
+
+    def enter_thread(self) -> None:
+        self._ensure_com()
+
+    def leave_thread(self) -> None:
+        import gc
+        import comtypes
+
+        for enumerator, client in ((self._enumerator, self._notification_client),
+                                   (self._capture_enumerator, self._capture_client)):
+            if enumerator is not None:
+                try:
+                    enumerator.UnregisterEndpointNotificationCallback(client)
+                except Exception as e:
+                    logger.debug(f"Unregistering device notifications failed: {e}")
+        self._notification_client = self._enumerator = None
+        self._capture_client = self._capture_enumerator = None
+        # Release the interface pointers while COM is still initialized.
+        gc.collect()
+        if getattr(self._com_initialized, "done", False):
+            comtypes.CoUninitialize()
+            self._com_initialized.done = False
+
+    def open_default_endpoint(self):
+        from ctypes import cast, POINTER
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        self._ensure_com()
+        device = AudioUtilities.GetMicrophone()
+        if device is None:
+            raise RuntimeError("No default capture device.")
+        interface = device.Activate(
+            IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        return device.GetId(), cast(interface, POINTER(IAudioEndpointVolume))
+
+    def watch_default_device(self, on_change) -> None:
+        from pycaw.callbacks import MMNotificationClient
+        from pycaw.pycaw import AudioUtilities
+
+        # eCapture / DEVICE_STATE_ACTIVE from mmdeviceapi.h
+        e_capture = 1
+        device_state_active = 0x1
+
+        class _Client(MMNotificationClient):
+            def on_default_device_changed(self, flow, flow_id, role, role_id, default_device_id):
+                if flow_id == e_capture:
+                    on_change()
+
+            def on_device_removed(self, removed_device_id):
+                on_change()
+
+            def on_device_state_changed(self, device_id, new_state, new_state_id):
+                if new_state_id != device_state_active:
+                    on_change()
+
+        self._ensure_com()
+        client = _Client()
+        enumerator = AudioUtilities.GetDeviceEnumerator()
+        enumerator.RegisterEndpointNotificationCallback(client)
+        self._notification_client = client
+        self._enumerator = enumerator
+
+    def open_capture_endpoints(self):
+        from ctypes import cast, POINTER
+        from comtypes import CLSCTX_ALL
+        from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
+
+        # eCapture / DEVICE_STATE_ACTIVE from mmdeviceapi.h
+        e_capture = 1
+        device_state_active = 0x1
+
+        self._ensure_com()
+        enumerator = AudioUtilities.GetDeviceEnumerator()
+        collection = enumerator.EnumAudioEndpoints(e_capture, device_state_active)
+        endpoints = []
+        for index in range(collection.GetCount()):
+            device = collection.Item(index)
+            interface = device.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+            endpoints.append((device.GetId(), cast(interface, POINTER(IAudioEndpointVolume))))
+        return endpoints
+
+    def watch_capture_devices(self, on_change) -> None:
+        from pycaw.callbacks import MMNotificationClient
+        from pycaw.pycaw import AudioUtilities
+
+        class _Client(MMNotificationClient):
+            def on_device_added(self, added_device_id):
+                on_change()
+
+            def on_device_removed(self, removed_device_id):
+                on_change()
+
+            def on_device_state_changed(self, device_id, new_state, new_state_id):
+                on_change()
+
+        self._ensure_com()
+        client = _Client()
+        enumerator = AudioUtilities.GetDeviceEnumerator()
+        enumerator.RegisterEndpointNotificationCallback(client)
+        self._capture_client = client
+        self._capture_enumerator = enumerator
+
+    def watch_endpoint_volume(self, endpoint, on_mute):
+        from pycaw.callbacks import AudioEndpointVolumeCallback
+
+        class _Callback(AudioEndpointVolumeCallback):
+            def on_notify(self, new_volume, new_mute, event_context, channels, channel_volumes):
+                on_mute(bool(new_mute))
+
+        callback = _Callback()
+        endpoint.RegisterControlChangeNotify(callback)
+
+        def unsubscribe():
+            # The closure also keeps the COM callback object alive.
+            endpoint.UnregisterControlChangeNotify(callback)
+
+        return unsubscribe
+
+
+# One cached IAudioEndpointVolume per process. Opening it means enumerating
+# the default device and activating an interface, which is the slow part of
+# every mic key press, so it is only redone after an invalidation.
+_backend: MicrophoneBackend = PycawMicrophoneBackend()
+_lock = threading.RLock()
+_cached_endpoint = None
+_cached_device_id = None
+_watching = False
+_endpoint_listeners = []
+
+
+def _run_now(func) -> None:
+    func()
+
+
+# Device notifications arrive on a COM thread that must not call into the
+# endpoints, nor wait for _lock while the audio thread holds it during an
+# endpoint call. They only hand the invalidation to this runner, which is
+# the audio worker's post() while it runs.
+_run_notification = _run_now
+
+# "Mute all" mode: every active capture device (headset, webcam, internal
+# array) is muted and unmuted together. Their endpoints are enumerated and
+# activated once, in one pass, and cached like the default one until a
+# capture device is added, removed or changes state.
+_mute_all = False
+_cached_capture_endpoints = None
+_watching_capture = False
+
+
+def set_backend(backend: MicrophoneBackend) -> None:
+    """Replace the endpoint backend (e.g. with a fake) and drop the cache."""
+    global _backend, _watching, _watching_capture
+    with _lock:
+        _backend = backend
+        _watching = False
+        _watching_capture = False
+        invalidate_mic_endpoint("backend replaced")
+        invalidate_capture_endpoints("backend replaced")
+
+
+def set_notification_runner(run) -> None:
+    """Where device-change notifications are handled, e.g. the audio
+    worker's post(). None runs them on the notifying thread."""
+    global _run_notification
+    _run_notification = run or _run_now
+
+
+def _on_default_device_changed() -> None:
+    _run_notification(lambda: invalidate_mic_endpoint("default capture device changed"))
+
+
+def _on_capture_devices_changed() -> None:
+    _run_notification(lambda: invalidate_capture_endpoints("capture devices changed"))
+
+
+def set_mute_all(enabled: bool) -> None:
+    """Make disable/enable_microphone() and is_microphone_mute() act on
+    every active capture device instead of only the default one."""
+    global _mute_all
+    _mute_all = bool(enabled)
+    logger.info(f"Mute all capture devices: {_mute_all}")
+
+
+def is_mute_all() -> bool:
+    return _mute_all
+
+
+def invalidate_mic_endpoint(reason: str = "") -> None:
+    """Forget the cached endpoint; the next call opens a fresh one."""
+    global _cached_endpoint, _cached_device_id
+    with _lock:
+        if _cached_endpoint is None:
+            return
+        logger.info(f"Microphone endpoint cache invalidated: {reason}")
+        _cached_endpoint = None
+        _cached_device_id = None
+        _notify_endpoint_listeners(None, None)
+
+
+def add_endpoint_listener(listener) -> None:
+    """Call listener(device_id, endpoint) whenever the cached endpoint is
+    replaced. Both arguments are None after an invalidation.
+
+    If an endpoint is already cached the listener is called right away.
+    """
+    with _lock:
+        _endpoint_listeners.append(listener)
+        if _cached_endpoint is not None:
+            listener(_cached_device_id, _cached_endpoint)
+
+
+def watch_endpoint_volume(endpoint, on_mute):
+    """Subscribe to mute changes of an endpoint through the current backend."""
+    return _backend.watch_endpoint_volume(endpoint, on_mute)
+
+
+def _notify_endpoint_listeners(device_id, endpoint) -> None:
+    for listener in list(_endpoint_listeners):
+        try:
+            listener(device_id, endpoint)
+        except Exception as e:
+            logger.error(f"Endpoint listener failed: {e}")
+
+
+def get_mic_device_id():
+    """Device ID of the cached endpoint, or None if nothing is cached."""
+    return _cached_device_id
+
 
 def get_mic_endpoint():
-    comtypes.CoInitialize() 
+    global _cached_endpoint, _cached_device_id, _watching
+    with _lock:
+        if _cached_endpoint is not None:
+            return _cached_endpoint
+
+        if not _watching:
+            try:
+                _backend.watch_default_device(_on_default_device_changed)
+                _watching = True
+            except Exception as e:
+                # Without notifications we still recover through the retry
+                # in _call_endpoint, just one failed call later.
+                logger.warning(f"Cannot watch capture device changes: {e}")
+
+        device_id, endpoint = _backend.open_default_endpoint()
+        _cached_device_id = device_id
+        _cached_endpoint = endpoint
+        logger.info(f"Microphone endpoint opened: {device_id}")
+        _notify_endpoint_listeners(device_id, endpoint)
+        return endpoint
+
+
+def enter_audio_thread() -> None:
+    """Called once by the audio worker before it serves any request."""
+    _backend.enter_thread()
+
+
+def leave_audio_thread() -> None:
+    """Called by the audio worker when it stops: drops every cached
+    endpoint, then lets the backend uninitialize the thread."""
+    global _watching, _watching_capture
+    with _lock:
+        invalidate_mic_endpoint("audio thread stopping")
+        invalidate_capture_endpoints("audio thread stopping")
+        _watching = False
+        _watching_capture = False
+        _backend.leave_thread()
+
+
+def invalidate_capture_endpoints(reason: str = "") -> None:
+    """Forget the cached capture endpoint set."""
+    global _cached_capture_endpoints
+    with _lock:
+        if _cached_capture_endpoints is None:
+            return
+        logger.info(f"Capture endpoint cache invalidated: {reason}")
+        _cached_capture_endpoints = None
+
+
+def get_capture_endpoints():
+    """[(device_id, endpoint), ...] for every active capture device, cached."""
+    global _cached_capture_endpoints, _watching_capture
+    with _lock:
+        if _cached_capture_endpoints is not None:
+            return _cached_capture_endpoints
+
+        if not _watching_capture:
+            try:
+                _backend.watch_capture_devices(_on_capture_devices_changed)
+                _watching_capture = True
+            except Exception as e:
+                logger.warning(f"Cannot watch capture devices: {e}")
+
+        endpoints = _backend.open_capture_endpoints()
+        if not endpoints:
+            raise RuntimeError("No active capture devices.")
+        _cached_capture_endpoints = endpoints
+        logger.info(f"Capture endpoints opened: {len(endpoints)}")
+        return endpoints
+
+
+def set_capture_mute(mute: bool) -> int:
+    """Mute or unmute every active capture device in one pass.
+
+    A device that fails is retried once after re-enumerating, since it
+    usually means the set changed. Returns the number of devices set;
+    raises if none could be.
+    """
+    value = 1 if mute else 0
+    with _lock:
+        failed = _set_mute_each(get_capture_endpoints(), value)
+        if failed:
+            invalidate_capture_endpoints(f"endpoint call failed: {failed[0][1]}")
+            retry = set(device_id for device_id, _ in failed)
+            endpoints = [(device_id, endpoint) for device_id, endpoint in get_capture_endpoints()
+                         if device_id in retry]
+            failed = _set_mute_each(endpoints, value)
+        total = len(_cached_capture_endpoints or ())
+    for device_id, error in failed:
+        logger.error(f"Cannot set mute on {device_id}: {error}")
+    if failed and len(failed) >= total:
+        raise RuntimeError("No capture device could be set.")
+    return total - len(failed)
+
+
+def _set_mute_each(endpoints, value):
+    failed = []
+    for device_id, endpoint in endpoints:
+        try:
+            endpoint.SetMute(value, None)
+        except Exception as e:
+            failed.append((device_id, e))
+    return failed
+
+
+def get_capture_mute_states():
+    """{device_id: muted} for every active capture device."""
+    with _lock:
+        try:
+            endpoints = get_capture_endpoints()
+            return {device_id: endpoint.GetMute() == 1 for device_id, endpoint in endpoints}
+        except Exception as e:
+            invalidate_capture_endpoints(f"endpoint call failed: {e}")
+            endpoints = get_capture_endpoints()
+            return {device_id: endpoint.GetMute() == 1 for device_id, endpoint in endpoints}
+
+
+def aggregate_mute_state(states):
+    """True if every device is muted, False if none is, None if mixed or empty."""
+    values = set(states.values())
+    if len(values) != 1:
+        return None
+    return values.pop()
+
+
+def _call_endpoint(action):
+    """Run action(endpoint), reopening the endpoint once if it stopped responding."""
+    try:
+        return action(get_mic_endpoint())
+    except Exception as e:
+        invalidate_mic_endpoint(f"endpoint call failed: {e}")
+        return action(get_mic_endpoint())
 
-    devices = AudioUtilities.GetMicrophone() 
-    interface = devices.Activate(
-        IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
-    return cast(interface, POINTER(IAudioEndpointVolume))
 
 def disable_microphone():
     try:
-        volume = get_mic_endpoint()
-        volume.SetMute(1, None)
+        if _mute_all:
+            count = set_capture_mute(True)
+            logger.info(f"All microphones ({count}) set to Muted!")
+            return True
+        _call_endpoint(lambda volume: volume.SetMute(1, None))
         logger.info("Microphone set to Muted!")
+        return True
     except Exception as e:
         logger.error(f"Disable Error: {e}")
+        return False
 
 def enable_microphone():
     try:
-        volume = get_mic_endpoint()
-        volume.SetMute(0, None)
+        if _mute_all:
+            count = set_capture_mute(False)
+            logger.info(f"All microphones ({count}) set to Unmuted!")
+            return True
+        _call_endpoint(lambda volume: volume.SetMute(0, None))
         logger.info("Microphone set to Unmuted!")
+        return True
     except Exception as e:
         logger.error(f"Enable Error: {e}")
+        return False
 
 def is_microphone_mute():
     try:
-        volume = get_mic_endpoint()
-        mute_state = volume.GetMute()
+        if _mute_all:
+            # Only "all muted" counts as muted, so a toggle from a mixed
+            # state mutes everything.
+            is_muted = aggregate_mute_state(get_capture_mute_states()) is True
+            logger.info(f"All microphones mute state: {is_muted}")
+            return is_muted
+        mute_state = _call_endpoint(lambda volume: volume.GetMute())
         if mute_state == 1:
             is_muted = True
         else:
             is_muted = False
         logger.info(f"Microphone mute state: {is_muted}")
         return is_muted
-    except:
+    except Exception as e:
+        logger.error(f"Mute State Error: {e}")
         return False
 
 def toggle_microphone():
@@ -50,19 +484,27 @@ def toggle_microphone():
         else:
             disable_microphone()
     except Exception as e:
-        print(f"Hotkey Error: {e}")
+        logger.error(f"Hotkey Error: {e}")
     finally:
         pass
 
 if __name__ == "__main__":
-    print("This is a test.")
-    print("Press F4 to toggle, F5 to query, ESC to quit.")
-    
-    comtypes.CoInitialize()
-    
-    keyboard.add_hotkey('f4', toggle_microphone)
-    keyboard.add_hotkey('f5', is_microphone_mute)
+    import keyboard
+
+    from modules.audio_worker import OP_QUERY, OP_TOGGLE, AudioWorker
+
+    logger.info("This is a test.")
+    logger.info("Press F4 to toggle, F5 to query, ESC to quit.")
+
+    # The hook thread only queues requests; COM lives on the audio thread.
+    worker = AudioWorker(on_result=lambda result: logger.info(f"Audio result: {result}"))
+    worker.start()
+
+    keyboard.add_hotkey('f4', lambda: worker.submit(OP_TOGGLE))
+    keyboard.add_hotkey('f5', lambda: worker.submit(OP_QUERY))
     try:
         keyboard.wait('esc')
     except KeyboardInterrupt:
-        pass
\ No newline at end of file
+        pass
+    finally:
+        worker.stop()
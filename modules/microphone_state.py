@@ -0,0 +1,103 @@
+"""Event-driven microphone mute state.
+
+Keeps the last known mute state of the default capture device in memory.
+It is fed by the endpoint's volume-change callback, so changes made by
+other applications (Teams, Zoom, the Windows mixer) show up as well.
+
+Reading `state.muted` never touches COM; only opening a new endpoint does.
+Reopening runs through `set_reopen_runner()`, so the app can keep it on
+the audio worker thread that owns the endpoints.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Callable, List, Optional
+
+from loguru import logger
+
+from modules import microphone_control
+
+
+class MicrophoneState:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._muted: Optional[bool] = None
+        self._listeners: List[Callable[[Optional[bool]], None]] = []
+        self._unsubscribe: Optional[Callable[[], None]] = None
+        self._started = False
+        self._run_reopen: Callable[[Callable[[], None]], None] = _run_on_new_thread
+
+    @property
+    def muted(self) -> Optional[bool]:
+        """Last known mute state, or None while it is unknown."""
+        return self._muted
+
+    def subscribe(self, listener: Callable[[Optional[bool]], None]) -> None:
+        """Call listener(muted) on every change. It may run on a COM thread."""
+        self._listeners.append(listener)
+
+    def set_reopen_runner(self, run: Callable[[Callable[[], None]], None]) -> None:
+        """Where to reopen the endpoint after an invalidation, e.g. the
+        audio worker's post(). By default a short-lived thread is used."""
+        self._run_reopen = run
+
+    def start(self) -> None:
+        """Follow the cached endpoint, opening it now if needed."""
+        if self._started:
+            return
+        self._started = True
+        microphone_control.add_endpoint_listener(self._on_endpoint)
+        self._reopen()
+
+    def set_muted(self, muted: Optional[bool]) -> None:
+        """Record a state change. Duplicate notifications are ignored."""
+        with self._lock:
+            if muted == self._muted:
+                return
+            self._muted = muted
+        logger.info(f"Microphone state changed: muted={muted}")
+        for listener in list(self._listeners):
+            try:
+                listener(muted)
+            except Exception as e:
+                logger.error(f"Microphone state listener failed: {e}")
+
+    def _on_endpoint(self, device_id, endpoint) -> None:
+        if self._unsubscribe is not None:
+            try:
+                self._unsubscribe()
+            except Exception:
+                # The old device may already be gone.
+                pass
+            self._unsubscribe = None
+
+        if endpoint is None:
+            self.set_muted(None)
+            # The endpoint was invalidated by a device notification. Reopen
+            # it after the current request, so the state does not stay
+            # unknown until the next key press.
+            self._run_reopen(self._reopen)
+            return
+
+        try:
+            self._unsubscribe = microphone_control.watch_endpoint_volume(endpoint, self.set_muted)
+        except Exception as e:
+            logger.warning(f"Cannot subscribe to microphone volume changes: {e}")
+        try:
+            self.set_muted(endpoint.GetMute() == 1)
+        except Exception as e:
+            logger.warning(f"Cannot read microphone mute state: {e}")
+
+    def _reopen(self) -> None:
+        try:
+            microphone_control.get_mic_endpoint()
+        except Exception as e:
+            logger.warning(f"No microphone endpoint available: {e}")
+
+
+def _run_on_new_thread(func: Callable[[], None]) -> None:
+    threading.Thread(target=func, name="mic-state-reopen", daemon=True).start()
+
+
+state = MicrophoneState()
@@ -0,0 +1,132 @@
+"""Tray notification coalescing and rate limiting.
+
+QSystemTrayIcon.showMessage() has no way to take back a balloon, and
+Windows queues the toasts: toggling the mic five times in a second used to
+play five toasts one after another, for several seconds after the last
+press. NotificationManager sits in front of showMessage():
+
+- per category (e.g. "mic"), at most one toast is shown per
+  `min_interval` seconds, or per toast duration if that is longer,
+- a message arriving in between replaces the pending one instead of
+  queueing, so only the latest state is shown once the interval is over,
+- nothing is shown if that latest state is the one already on screen,
+  or if it waited longer than `max_age` seconds (e.g. across a sleep),
+- in quiet mode nothing is shown at all.
+
+It knows nothing about Qt: `show(title, message, icon, duration_ms)`,
+`schedule(delay_seconds, callback)` and `clock()` are passed in, so a fake
+tray and a fake clock are enough to drive it. All methods must be called
+from one thread (the UI thread in the tray app).
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+ShowFunc = Callable[[str, str, Any, int], None]
+ScheduleFunc = Callable[[float, Callable[[], None]], None]
+
+
+@dataclass
+class Notification:
+    title: str
+    message: str
+    icon: Any
+    duration_ms: int
+    created: float
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.title, self.message
+
+
+@dataclass
+class _Category:
+    shown: Optional[Notification] = None
+    shown_at: float = float("-inf")
+    pending: Optional[Notification] = None
+    flush_scheduled: bool = False
+
+
+class NotificationManager:
+    def __init__(self, show: ShowFunc, schedule: ScheduleFunc, min_interval: float = 2.0,
+                 max_age: float = 5.0, quiet: bool = False,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self._show = show
+        self._schedule = schedule
+        self.min_interval = min_interval
+        self.max_age = max_age
+        self.quiet = quiet
+        self._clock = clock
+        self._categories: Dict[str, _Category] = {}
+        # For the Diagnostics dialog.
+        self.stats = {"shown": 0, "coalesced": 0, "stale": 0, "duplicate": 0, "quiet": 0}
+
+    def notify(self, category: str, title: str, message: str, icon: Any = None,
+               duration_ms: int = 2000) -> bool:
+        """Show now if the category is free, else keep as its pending toast.
+
+        Returns True if the toast was shown right away.
+        """
+        if self.quiet:
+            self.stats["quiet"] += 1
+            return False
+        now = self._clock()
+        notification = Notification(title, message, icon, duration_ms, now)
+        state = self._categories.setdefault(category, _Category())
+        ready_at = self._ready_at(state)
+        if state.pending is None and now >= ready_at:
+            self._display(state, notification, now)
+            return True
+        if state.pending is not None:
+            self.stats["coalesced"] += 1
+        state.pending = notification
+        if not state.flush_scheduled:
+            state.flush_scheduled = True
+            self._schedule(max(0.0, ready_at - now), lambda: self._flush(category))
+        return False
+
+    def set_quiet(self, quiet: bool) -> None:
+        """Turn quiet mode on or off; turning it on drops pending toasts."""
+        self.quiet = quiet
+        if quiet:
+            for state in self._categories.values():
+                if state.pending is not None:
+                    self.stats["quiet"] += 1
+                    state.pending = None
+
+    def _ready_at(self, state: _Category) -> float:
+        if state.shown is None:
+            return float("-inf")
+        return state.shown_at + max(self.min_interval, state.shown.duration_ms / 1000.0)
+
+    def _flush(self, category: str) -> None:
+        state = self._categories[category]
+        state.flush_scheduled = False
+        notification, state.pending = state.pending, None
+        if notification is None:
+            return
+        now = self._clock()
+        ready_at = self._ready_at(state)
+        if now < ready_at:
+            # The timer fired early; wait for the rest of the interval.
+            state.pending = notification
+            state.flush_scheduled = True
+            self._schedule(ready_at - now, lambda: self._flush(category))
+            return
+        if now - notification.created > self.max_age:
+            self.stats["stale"] += 1
+            return
+        if state.shown is not None and notification.key == state.shown.key:
+            # Toggled back to what the last toast already said.
+            self.stats["duplicate"] += 1
+            return
+        self._display(state, notification, now)
+
+    def _display(self, state: _Category, notification: Notification, now: float) -> None:
+        state.shown = notification
+        state.shown_at = now
+        self.stats["shown"] += 1
+        self._show(notification.title, notification.message, notification.icon, notification.duration_ms)
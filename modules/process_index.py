@@ -0,0 +1,132 @@
+"""Shared, incrementally refreshed process name index.
+
+Goal: answer "is X running?" and "what are X's PIDs?" without walking the
+whole process table every time.
+
+Implementation: listing PIDs is cheap (no per-process handle), resolving a
+name is not. Each refresh diffs the current PID set against the previous
+one and only resolves names for PIDs that appeared since.
+
+Windows reuses PIDs, so a PID can end and be taken by another process
+between two refreshes without ever leaving the set. A lookup therefore
+resolves the names of its hits again; misses, the common case, cost
+nothing extra. (A reused PID can hide a match the same way until clear(),
+which the idle memory trim calls.)
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Dict, Iterable, List, Optional, Set
+
+
+class ProcessTable:
+    """Source of PIDs and names. Replace with a fake to test without psutil."""
+
+    def pids(self) -> Iterable[int]:
+        raise NotImplementedError
+
+    def name(self, pid: int) -> Optional[str]:
+        """Return the process name, or None if it exited or can't be read."""
+        raise NotImplementedError
+
+
+class PsutilProcessTable(ProcessTable):
+    def pids(self) -> Iterable[int]:
+        import psutil
+
+        return psutil.pids()
+
+    def name(self, pid: int) -> Optional[str]:
+        import psutil
+
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+
+
+class ProcessIndex:
+    def __init__(self, table: Optional[ProcessTable] = None) -> None:
+        self.table = table or PsutilProcessTable()
+        self._lock = threading.Lock()
+        self._names_by_pid: Dict[int, Optional[str]] = {}
+        self._pids_by_name: Dict[str, Set[int]] = {}
+
+    def refresh(self) -> None:
+        with self._lock:
+            current = set(self.table.pids())
+            known = self._names_by_pid.keys()
+
+            for pid in known - current:
+                self._drop(pid)
+
+            for pid in current - known:
+                # Unreadable PIDs are remembered as None so they are not
+                # resolved again on every refresh.
+                name = self.table.name(pid)
+                self._names_by_pid[pid] = name
+                if name is not None:
+                    self._pids_by_name.setdefault(name, set()).add(pid)
+
+    def pids_of(self, name: str, refresh: bool = True) -> List[int]:
+        if refresh:
+            self.refresh()
+        with self._lock:
+            pids = sorted(self._pids_by_name.get(name, ()))
+            if refresh:
+                pids = [pid for pid in pids if self._recheck(pid, name)]
+            return pids
+
+    def is_running(self, name: str, refresh: bool = True) -> bool:
+        return bool(self.pids_of(name, refresh=refresh))
+
+    def forget(self, pid: int) -> None:
+        """Drop a PID we know is gone (e.g. after killing it)."""
+        with self._lock:
+            self._drop(pid)
+
+    def clear(self) -> None:
+        """Forget every resolved name; the next refresh resolves them again."""
+        with self._lock:
+            self._names_by_pid.clear()
+            self._pids_by_name.clear()
+
+    def _recheck(self, pid: int, name: str) -> bool:
+        """Resolve a hit again, in case its PID was reused."""
+        current = self.table.name(pid)
+        if current == name:
+            return True
+        self._drop(pid)
+        if current is not None:
+            self._names_by_pid[pid] = current
+            self._pids_by_name.setdefault(current, set()).add(pid)
+        return False
+
+    def _drop(self, pid: int) -> None:
+        name = self._names_by_pid.pop(pid, None)
+        pids = self._pids_by_name.get(name)
+        if pids is not None:
+            pids.discard(pid)
+            if not pids:
+                del self._pids_by_name[name]
+
+
+_index: Optional[ProcessIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_process_index() -> ProcessIndex:
+    """Process-wide shared index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ProcessIndex()
+        return _index
+
+
+def set_process_index(index: ProcessIndex) -> None:
+    """Install a different shared index, e.g. one backed by a fake table."""
+    global _index
+    with _index_lock:
+        _index = index
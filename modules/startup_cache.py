@@ -0,0 +1,113 @@
+"""Persistent startup state cache.
+
+Stores values that are expensive to derive but almost never change (UI
+language module, MegaOS boot entry) in one small JSON file next to the app.
+Each value is stored with a validity key, a cheap fingerprint of what it
+was derived from; get() only returns the value while the current key still
+matches.
+
+The file is read once at startup. Anything unreadable, from another format
+version or otherwise corrupt is silently treated as empty and rebuilt.
+
+get/put/invalidate may be called from any thread; the app only calls
+save() from its UI thread (or event loop).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+CACHE_VERSION = 1
+CACHE_FILE_NAME = "startup_cache.json"
+
+
+def default_cache_path() -> str:
+    if getattr(sys, "frozen", False):
+        app_dir = os.path.dirname(sys.executable)
+    else:
+        app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return os.path.join(app_dir, CACHE_FILE_NAME)
+
+
+class StartupCache:
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path or default_cache_path()
+        self._lock = threading.Lock()
+        # Held for a whole save, so writes of the file never overlap.
+        self._save_lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+
+    def load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                data = json.load(fh)
+            if data.get("version") != CACHE_VERSION or not isinstance(data.get("entries"), dict):
+                raise ValueError("unexpected cache format")
+            entries = {name: entry for name, entry in data["entries"].items()
+                       if isinstance(entry, dict) and "key" in entry and "value" in entry}
+        except FileNotFoundError:
+            entries = {}
+        except Exception as e:
+            logger.info(f"Startup cache unusable, rebuilding: {e}")
+            entries = {}
+            self._dirty = True
+        with self._lock:
+            self._entries = entries
+
+    def get(self, name: str, validity_key: Any) -> Any:
+        """Cached value, or None if missing or derived under another key."""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry["key"] != validity_key:
+            return None
+        return entry["value"]
+
+    def put(self, name: str, validity_key: Any, value: Any) -> None:
+        entry = {"key": validity_key, "value": value}
+        with self._lock:
+            if self._entries.get(name) == entry:
+                return
+            self._entries[name] = entry
+            self._dirty = True
+
+    def invalidate(self, name: str) -> None:
+        with self._lock:
+            if self._entries.pop(name, None) is not None:
+                self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache if anything changed. Failures are only logged."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                payload = {"version": CACHE_VERSION, "entries": dict(self._entries)}
+                self._dirty = False
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as fh:
+                    json.dump(payload, fh, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                logger.debug(f"Cannot write startup cache: {e}")
+                with self._lock:
+                    self._dirty = True
+
+
+_cache: Optional[StartupCache] = None
+
+
+def get_startup_cache() -> StartupCache:
+    """Process-wide cache, loaded on first use."""
+    global _cache
+    if _cache is None:
+        _cache = StartupCache()
+        _cache.load()
+    return _cache
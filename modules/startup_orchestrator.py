@@ -0,0 +1,75 @@
+"""Concurrent startup warm-up.
+
+The tray icon and hotkeys come up first; everything that can wait (the
+official Control Center check, opening the mic endpoint, looking up the
+MegaOS firmware entry, probing H3CSound) then runs in parallel on a small
+worker pool. Each result is delivered to the UI thread through a Qt signal,
+and every task's duration is logged.
+"""
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+from loguru import logger
+
+
+class StartupOrchestrator(QObject):
+    # name, result, seconds
+    task_finished = pyqtSignal(str, object, float)
+    # name, error message, seconds
+    task_failed = pyqtSignal(str, str, float)
+    all_finished = pyqtSignal()
+    # Worker -> UI thread hop: name, result or error message, seconds, ok
+    _task_done = pyqtSignal(str, object, float, bool)
+
+    def __init__(self, max_workers: int = 3, parent=None) -> None:
+        super().__init__(parent)
+        self.max_workers = max_workers
+        self._tasks: Dict[str, Callable[[], Any]] = {}
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.timings: Dict[str, float] = {}
+        self._task_done.connect(self._on_task_done)
+
+    def add(self, name: str, task: Callable[[], Any]) -> None:
+        self._tasks[name] = task
+
+    def start(self) -> None:
+        if not self._tasks:
+            self.all_finished.emit()
+            return
+        self._pending = len(self._tasks)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="warmup")
+        for name, task in self._tasks.items():
+            self._executor.submit(self._run, name, task)
+        # Idle workers exit once the queue is drained.
+        self._executor.shutdown(wait=False)
+
+    def _run(self, name: str, task: Callable[[], Any]) -> None:
+        started = time.perf_counter()
+        try:
+            result = task()
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            logger.warning(f"Startup task '{name}' failed after {elapsed * 1000:.1f} ms: {e}")
+            self._task_done.emit(name, str(e), elapsed, False)
+            return
+        elapsed = time.perf_counter() - started
+        logger.info(f"Startup task '{name}' finished in {elapsed * 1000:.1f} ms")
+        self._task_done.emit(name, result, elapsed, True)
+
+    def _on_task_done(self, name: str, result: Any, elapsed: float, ok: bool) -> None:
+        # Runs on the UI thread (queued connection), so the public signals
+        # below are delivered there and strictly in this order.
+        self.timings[name] = elapsed
+        if ok:
+            self.task_finished.emit(name, result, elapsed)
+        else:
+            self.task_failed.emit(name, result, elapsed)
+        self._pending -= 1
+        if self._pending == 0:
+            self.all_finished.emit()
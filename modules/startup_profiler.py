@@ -0,0 +1,209 @@
+"""Time-to-tray startup profiler (`--profile-startup[=PATH]`).
+
+Records how long each module import takes (inclusive and self time, main
+thread only) and wall-clock milestones such as "qapplication_created" or
+"tray_shown", each with the resident set size at that point, then writes
+everything as one JSON document. Profiling the tray app and `--headless`
+this way gives a like-for-like comparison of startup time and memory.
+
+Only uses the standard library so it can be enabled before any heavy
+import. When profiling is off, mark() is a cheap no-op.
+"""
+
+from __future__ import annotations
+
+import builtins
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+ARG_NAME = "--profile-startup"
+DEFAULT_REPORT_NAME = "startup_profile.json"
+
+
+class StartupProfiler:
+    def __init__(self, report_path: str) -> None:
+        self.report_path = report_path
+        self.t0 = time.perf_counter()
+        self.milestones: List[Dict[str, Any]] = []
+        self.imports: Dict[str, Dict[str, float]] = {}
+        self._main_thread = threading.get_ident()
+        self._stack: List[float] = []
+        self._original_import = None
+
+    def _now_ms(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def install_import_hook(self) -> None:
+        original = builtins.__import__
+        self._original_import = original
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or threading.get_ident() != self._main_thread:
+                return original(name, globals, locals, fromlist, level)
+            module = sys.modules.get(name)
+            if module is not None:
+                # "from package import submodule" still loads something new.
+                missing = [item for item in (fromlist or ()) if item != "*" and not hasattr(module, item)]
+                if not missing:
+                    return original(name, globals, locals, fromlist, level)
+                key = ", ".join(f"{name}.{item}" for item in missing)
+            else:
+                key = name
+
+            start = time.perf_counter()
+            self._stack.append(0.0)
+            try:
+                return original(name, globals, locals, fromlist, level)
+            finally:
+                elapsed = time.perf_counter() - start
+                children = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += elapsed
+                if key not in self.imports:
+                    self.imports[key] = {
+                        "inclusive_ms": round(elapsed * 1000.0, 3),
+                        "self_ms": round((elapsed - children) * 1000.0, 3),
+                    }
+
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def mark(self, name: str) -> None:
+        self.milestones.append({"name": name, "ms": round(self._now_ms(), 3), "rss_kb": _memory_kb()[0]})
+
+    def report(self) -> Dict[str, Any]:
+        imports = sorted(
+            ({"module": name, **times} for name, times in self.imports.items()),
+            key=lambda item: item["inclusive_ms"],
+            reverse=True,
+        )
+        return {
+            "pid": os.getpid(),
+            "python": sys.version.split()[0],
+            "frozen": bool(getattr(sys, "frozen", False)),
+            "argv": sys.argv[1:],
+            "process_start_to_profiler_ms": _process_age_ms(),
+            "peak_rss_kb": _memory_kb()[1],
+            "milestones": self.milestones,
+            "imports": imports,
+        }
+
+    def write(self) -> None:
+        self.remove_import_hook()
+        text = json.dumps(self.report(), indent=2)
+        try:
+            with open(self.report_path, "w", encoding="utf-8") as fh:
+                fh.write(text)
+        except OSError:
+            pass
+        # Windowed builds have no stdout.
+        if sys.stdout is not None:
+            try:
+                sys.stdout.write(text + "\n")
+                sys.stdout.flush()
+            except Exception:
+                pass
+
+
+def _process_age_ms() -> Optional[float]:
+    """Milliseconds since the OS created this process, if available."""
+    try:
+        if os.name == "nt":
+            import ctypes
+            from ctypes import wintypes
+
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            creation, exit_, kernel, user = (wintypes.FILETIME() for _ in range(4))
+            if not kernel32.GetProcessTimes(kernel32.GetCurrentProcess(), ctypes.byref(creation),
+                                            ctypes.byref(exit_), ctypes.byref(kernel), ctypes.byref(user)):
+                return None
+            created = (creation.dwHighDateTime << 32 | creation.dwLowDateTime) / 10_000_000
+            now = time.time() + 11_644_473_600  # FILETIME epoch is 1601-01-01
+            return round((now - created) * 1000.0, 3)
+        with open("/proc/self/stat", "r") as fh:
+            start_ticks = int(fh.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", "r") as fh:
+            uptime = float(fh.read().split()[0])
+        return round((uptime - start_ticks / os.sysconf("SC_CLK_TCK")) * 1000.0, 3)
+    except Exception:
+        return None
+
+
+def _memory_kb() -> Tuple[Optional[int], Optional[int]]:
+    """(current, peak) resident set size in KiB, if available."""
+    try:
+        if os.name == "nt":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD),
+                            ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t),
+                            ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t),
+                            ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            kernel32 = ctypes.windll.kernel32
+            kernel32.GetCurrentProcess.restype = wintypes.HANDLE
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(kernel32.GetCurrentProcess(),
+                                                            ctypes.byref(counters), counters.cb):
+                return None, None
+            return counters.WorkingSetSize // 1024, counters.PeakWorkingSetSize // 1024
+        current = peak = None
+        with open("/proc/self/status", "r") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    current = int(line.split()[1])
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1])
+        return current, peak
+    except Exception:
+        return None, None
+
+
+_profiler: Optional[StartupProfiler] = None
+
+
+def start_from_argv(argv: List[str], default_dir: str) -> Optional[StartupProfiler]:
+    """Enable profiling if `--profile-startup[=PATH]` is in argv."""
+    global _profiler
+    for arg in argv[1:]:
+        if arg == ARG_NAME or arg.startswith(ARG_NAME + "="):
+            path = arg.partition("=")[2] or os.path.join(default_dir, DEFAULT_REPORT_NAME)
+            _profiler = StartupProfiler(path)
+            _profiler.install_import_hook()
+            return _profiler
+    return None
+
+
+def is_enabled() -> bool:
+    return _profiler is not None
+
+
+def mark(name: str) -> None:
+    if _profiler is not None:
+        _profiler.mark(name)
+
+
+def finish() -> None:
+    """Write the report once; later calls do nothing."""
+    global _profiler
+    if _profiler is not None:
+        _profiler.write()
+        _profiler = None
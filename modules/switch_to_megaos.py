@@ -1,77 +1,253 @@
+import ctypes
 import subprocess
 import os
-from pathlib import Path
 
-uefi_var_tool_path = Path(__file__).parent.joinpath("utilities", "UEFIVariableTool.exe").resolve()
+from loguru import logger
 
-bootorder_change_tool_path = Path(__file__).parent.joinpath("utilities", "ChangeBootOrderFirst.ps1").resolve()
+from modules import bcdedit
+from modules import efivars
+from modules import metrics
 
-def change_boot_order(is_run_as_admin:bool=False):
+# Stages of a MegaOS switch, reported through the on_stage callback.
+STAGE_LOCATE = "locate"
+STAGE_SET_ORDER = "set_order"
+STAGE_REBOOT = "reboot"
+
+MEGAOS_BOOT_DESCRIPTION = "MegaOS"
+
+# Exit codes of change_boot_order(), same as the old ChangeBootOrderFirst.ps1
+# plus the two codes this module always added on top.
+EXIT_SUCCESS = 0
+EXIT_ADMIN_REQUIRED = 1
+EXIT_TARGET_NOT_FOUND = 2
+EXIT_SET_ORDER_FAILED = 3
+EXIT_UNKNOWN_ERROR = 4
+EXIT_EXCEPTION = 5
+EXIT_TOOL_NOT_FOUND = 6
+
+_NO_WINDOW = getattr(subprocess, "CREATE_NO_WINDOW", 0)
+
+# Optional StartupCache (see modules.startup_cache) remembering where the
+# MegaOS entry was found, so F21 does not have to enumerate all entries.
+# This module only updates it; the app saves it from its UI thread.
+_entry_cache = None
+
+def set_entry_cache(cache):
+    global _entry_cache
+    _entry_cache = cache
+
+def _cache_get(name, validity_key):
+    return _entry_cache.get(name, validity_key) if _entry_cache is not None else None
+
+def _cache_put(name, validity_key, value):
+    if _entry_cache is not None:
+        _entry_cache.put(name, validity_key, value)
+
+def _cache_invalidate(name):
+    if _entry_cache is not None:
+        _entry_cache.invalidate(name)
+
+def is_admin():
+    if os.name != "nt":
+        # bcdedit only exists on Windows; let the call itself fail elsewhere.
+        return True
+    try:
+        return bool(ctypes.windll.shell32.IsUserAnAdmin())
+    except Exception:
+        return False
+
+@metrics.timed("change_boot_order")
+def change_boot_order(runner=subprocess.run, on_stage=None, target_description=MEGAOS_BOOT_DESCRIPTION, store=None):
     '''
-    Use Powershell script to change the boot order, set MegaOS as the first boot option.
+    Change the boot order, set MegaOS as the first boot option.
+
+    With a firmware variable `store` (see modules.efivars) BootOrder is
+    rewritten directly; if that fails for a reason other than missing
+    rights, bcdedit is used instead. The native path only looks at entries
+    already in BootOrder, so bcdedit may still find one it missed.
+
+    `runner` is called like subprocess.run, so callers can make the child
+    process cancellable or time-limited. `on_stage` receives STAGE_* names.
     '''
-    if not os.path.exists(bootorder_change_tool_path):
-        print(f"Error: {bootorder_change_tool_path} not found.")
-        return 6
+    if store is not None:
+        code = change_boot_order_native(store, on_stage, target_description)
+        if code in (EXIT_SUCCESS, EXIT_ADMIN_REQUIRED):
+            return code
+        logger.warning("Native firmware variable access failed, falling back to bcdedit.")
+
+    if not is_admin():
+        logger.error("Error: Administrator privileges are required.")
+        return EXIT_ADMIN_REQUIRED
 
     try:
-        if is_run_as_admin:
-        # Request admin privileges using Start-Process with -Verb RunAs
-            ps_command = f"Start-Process powershell -ArgumentList '-ExecutionPolicy Bypass -File \"{bootorder_change_tool_path}\"' -Verb RunAs -WindowStyle Hidden -Wait"
-        else:
-            ps_command = f"& '{bootorder_change_tool_path}'"
-        
-        result = subprocess.run(
-            ["powershell", "-Command", ps_command],
-            capture_output=True,
-            text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        
-        # Note: When running with Start-Process, we might not get the script's exit code directly
-        # checking result.returncode checks if the launch was successful.
-        # So it's not recommended you to use is_run_as_admin=True
-        if result.returncode == 0:
-            print("Run Success")
-            print("Output:", result.stdout)
-        else:
-            print("Run Fail")
-            print("Error:", result.stderr)
-
-        return result.returncode
-            
+        if on_stage is not None:
+            on_stage(STAGE_LOCATE)
+
+        # bcdedit identifiers can't be checked without a full enumeration,
+        # so a cached one is simply tried; a stale one makes /set fail.
+        cached_identifier = _cache_get("megaos_bcd_identifier", target_description)
+        if cached_identifier:
+            if on_stage is not None:
+                on_stage(STAGE_SET_ORDER)
+            result = bcdedit.set_first_in_display_order(cached_identifier, runner=runner)
+            if result.returncode == 0:
+                logger.info(f"Success! '{target_description}' is now first boot entry.")
+                return EXIT_SUCCESS
+            logger.warning("Cached MegaOS entry is stale, looking it up again.")
+            _cache_invalidate("megaos_bcd_identifier")
+
+        result = bcdedit.enum_firmware(runner=runner)
+        if result.returncode != 0:
+            logger.error("Failed to enumerate firmware entries.")
+            logger.error(f"Error: {result.stderr}")
+            return EXIT_UNKNOWN_ERROR
+
+        entries = bcdedit.parse_firmware_entries(result.stdout)
+        entry = bcdedit.find_entry(entries, target_description)
+        if entry is None:
+            logger.error(f"Parsed {len(entries)} entries, but '{target_description}' was not found.")
+            return EXIT_TARGET_NOT_FOUND
+        logger.info(f"Found! GUID: {entry.identifier}")
+        _cache_put("megaos_bcd_identifier", target_description, entry.identifier)
+
+        if on_stage is not None:
+            on_stage(STAGE_SET_ORDER)
+        result = bcdedit.set_first_in_display_order(entry.identifier, runner=runner)
+        if result.returncode != 0:
+            logger.error(f"Failed. ExitCode: {result.returncode}")
+            logger.error(f"Error: {result.stderr}")
+            return EXIT_SET_ORDER_FAILED
+
+        logger.info(f"Success! '{target_description}' is now first boot entry.")
+        return EXIT_SUCCESS
+
+    except FileNotFoundError as e:
+        logger.error(f"Error: bcdedit not found: {e}")
+        return EXIT_TOOL_NOT_FOUND
     except Exception as e:
-        print(f"Execution exception: {e}")
-        return 5
+        logger.error(f"Execution exception: {e}")
+        return EXIT_EXCEPTION
 
-def write_h3c_efivar():
+def change_boot_order_native(store, on_stage=None, target_description=MEGAOS_BOOT_DESCRIPTION):
+    '''
+    Put the MegaOS Boot#### first in the UEFI BootOrder variable, without
+    starting any process.
+    '''
+    try:
+        if on_stage is not None:
+            on_stage(STAGE_LOCATE)
+        try:
+            option = locate_native_entry(store, target_description)
+        except PermissionError as e:
+            logger.error(f"Error: {e}")
+            return EXIT_ADMIN_REQUIRED
+        except (OSError, ValueError) as e:
+            logger.error(f"Failed to read boot entries: {e}")
+            return EXIT_UNKNOWN_ERROR
+        if option is None:
+            logger.error(f"'{target_description}' was not found in BootOrder.")
+            return EXIT_TARGET_NOT_FOUND
+        logger.info(f"Found! Boot{option.number:04X}: {option.description}")
+
+        if on_stage is not None:
+            on_stage(STAGE_SET_ORDER)
+        try:
+            efivars.move_to_first(store, option.number)
+        except PermissionError as e:
+            logger.error(f"Error: {e}")
+            return EXIT_ADMIN_REQUIRED
+        except OSError as e:
+            logger.error(f"Failed. {e}")
+            return EXIT_SET_ORDER_FAILED
+
+        logger.info(f"Success! '{target_description}' is now first boot entry.")
+        return EXIT_SUCCESS
+    except Exception as e:
+        logger.error(f"Execution exception: {e}")
+        return EXIT_EXCEPTION
+
+def locate_native_entry(store, target_description=MEGAOS_BOOT_DESCRIPTION):
+    '''
+    Find the MegaOS load option, trying the cached Boot#### first.
+
+    The cache is keyed by the number of BootOrder entries, and the cached
+    option's description is checked, so only two variable reads are needed
+    when nothing changed.
+    '''
+    order = efivars.read_boot_order(store)
+    validity_key = f"{target_description}|{len(order)}"
+    number = _cache_get("megaos_boot_number", validity_key)
+    if number in order:
+        option = efivars.read_load_option(store, number)
+        if option is not None and option.description.casefold().startswith(target_description.casefold()):
+            return option
+
+    option = efivars.find_boot_entry(store, target_description)
+    if option is not None:
+        _cache_put("megaos_boot_number", validity_key, option.number)
+    return option
+
+def prefetch_entry(runner=subprocess.run, store=None, target_description=MEGAOS_BOOT_DESCRIPTION):
+    '''
+    Look the MegaOS entry up ahead of the first F21 press and cache it.
+    Returns the Boot#### number or bcdedit identifier, or None.
+    '''
+    if store is not None:
+        try:
+            option = locate_native_entry(store, target_description)
+            if option is not None:
+                return f"Boot{option.number:04X}"
+        except Exception as e:
+            logger.warning(f"Native firmware lookup failed: {e}")
+
+    cached_identifier = _cache_get("megaos_bcd_identifier", target_description)
+    if cached_identifier:
+        return cached_identifier
+    if not is_admin():
+        return None
+    result = bcdedit.enum_firmware(runner=runner)
+    if result.returncode != 0:
+        return None
+    entry = bcdedit.find_entry(bcdedit.parse_firmware_entries(result.stdout), target_description)
+    if entry is None:
+        return None
+    _cache_put("megaos_bcd_identifier", target_description, entry.identifier)
+    return entry.identifier
+
+def reboot_now(runner=subprocess.run):
+    '''
+    Restart the machine immediately. Returns the exit code of shutdown.exe.
+    '''
+    result = runner(
+        ["shutdown", "/r", "/t", "0"],
+        capture_output=True,
+        text=True,
+        creationflags=_NO_WINDOW
+    )
+    return result.returncode
+
+def write_h3c_efivar(store=None):
     '''
     I have no idea what is it, but original app writes this.
     It's not used for switching to MegaOS, 
     but I will keep it here, just in case someone wants to use it.
-    '''
-    args = "BscInstallSystem@e896daf2-380d-4c77-aacb-098efbc05c9d@01"
-    
-    if not os.path.exists(uefi_var_tool_path):
-        print(f"Error: {uefi_var_tool_path} not found.")
-        return 6
 
+    Used to go through UEFIVariableTool.exe with
+    "BscInstallSystem@e896daf2-380d-4c77-aacb-098efbc05c9d@01";
+    now the same one-byte variable is written directly.
+    '''
     try:
-        result = subprocess.run(
-            [uefi_var_tool_path, args],
-            capture_output=True,
-            text=True,
-            creationflags=subprocess.CREATE_NO_WINDOW
-        )
-        
-        if result.returncode == 0:
-            print("Run Success")
-            print("Output:", result.stdout)
-        else:
-            print("Run Fail")
-            print("Error:", result.stderr)
-        
-        return result.returncode
+        store = store or efivars.default_store()
+        store.write("BscInstallSystem", efivars.H3C_VENDOR_GUID, b"\x01")
+        logger.info("Run Success")
+        return EXIT_SUCCESS
+    except PermissionError as e:
+        logger.error(f"Error: {e}")
+        return EXIT_ADMIN_REQUIRED
+    except OSError as e:
+        logger.error("Run Fail")
+        logger.error(f"Error: {e}")
+        return EXIT_SET_ORDER_FAILED
     except Exception as e:
-        print(f"Execution exception: {e}")
-        return 5
\ No newline at end of file
+        logger.error(f"Execution exception: {e}")
+        return EXIT_EXCEPTION
@@ -0,0 +1,214 @@
+"""Hotkey event trace: a fixed-size ring buffer, dumped to a binary file.
+
+Reports like "the mic ended up in the wrong state after mashing F20" can't
+be reproduced from the log, which has one line per action but nothing about
+the presses that were dropped or merged. TraceRecorder keeps the last
+`capacity` events of the hotkey pipeline in memory:
+
+- raw key downs and ups of bound keys, as the hook delivered them,
+- what HotkeyDispatcher made of each down (delivered, auto-repeat,
+  bounce, busy, coalesced),
+- action start and finish.
+
+Each event is 12 bytes packed into one preallocated bytearray; recording
+one is a counter increment and a struct.pack_into(), without a lock, from
+any thread. Nothing is allocated after startup and old events are simply
+overwritten.
+
+dump() writes the buffer to a file (on request over IPC, `--dump-trace`,
+and on an uncaught exception, see dump_on_crash()); load() reads it back.
+benchmarks/replay.py replays such a file through the hotkey pipeline.
+
+File format (little endian): the 8-byte magic, then a header
+(u16 version, u16 record size, u32 record count, f64 wall-clock time of
+the dump, f64 monotonic time of the dump, u16 key-table length), the key
+table as UTF-8 JSON, and the records (f64 monotonic time, u8 kind,
+u8 key index, u16 detail), oldest first.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+MAGIC = b"OH3CTRC\x00"
+VERSION = 1
+
+KIND_KEY_DOWN = 1
+KIND_KEY_UP = 2
+KIND_DELIVERED = 3
+KIND_REPEAT_DROPPED = 4
+KIND_BOUNCE_DROPPED = 5
+KIND_BUSY_DROPPED = 6
+# A press merged into the pending follow-up; detail is the merged count.
+KIND_COALESCED = 7
+KIND_ACTION_STARTED = 8
+KIND_ACTION_FINISHED = 9
+
+KIND_NAMES = {
+    KIND_KEY_DOWN: "key_down",
+    KIND_KEY_UP: "key_up",
+    KIND_DELIVERED: "delivered",
+    KIND_REPEAT_DROPPED: "repeat_dropped",
+    KIND_BOUNCE_DROPPED: "bounce_dropped",
+    KIND_BUSY_DROPPED: "busy_dropped",
+    KIND_COALESCED: "coalesced",
+    KIND_ACTION_STARTED: "action_started",
+    KIND_ACTION_FINISHED: "action_finished",
+}
+
+_RECORD = struct.Struct("<dBBH")
+_HEADER = struct.Struct("<HHIddH")
+# Key index 255 stands for keys beyond the table's room.
+_MAX_KEYS = 255
+
+
+@dataclass
+class TraceEvent:
+    t: float
+    kind: int
+    key: str
+    detail: int = 0
+
+    @property
+    def kind_name(self) -> str:
+        return KIND_NAMES.get(self.kind, str(self.kind))
+
+
+@dataclass
+class Trace:
+    events: List[TraceEvent]
+    # time.time() / time.monotonic() when it was dumped, to place the
+    # monotonic event times on the wall clock.
+    wall_time: float = 0.0
+    monotonic_time: float = 0.0
+
+
+class TraceRecorder:
+    def __init__(self, capacity: int = 16384, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = max(1, capacity)
+        self.clock = clock
+        self._buffer = bytearray(self.capacity * _RECORD.size)
+        self._counter = itertools.count()
+        # Events recorded so far; only read when dumping.
+        self._written = 0
+        self._keys: List[str] = []
+        self._key_ids: Dict[str, int] = {}
+        self._keys_lock = threading.Lock()
+
+    def record(self, kind: int, key: str, detail: int = 0, t: Optional[float] = None) -> None:
+        """Add one event. Safe from any thread; never blocks on I/O."""
+        key_id = self._key_ids.get(key)
+        if key_id is None:
+            key_id = self._intern(key)
+        index = next(self._counter)
+        _RECORD.pack_into(self._buffer, (index % self.capacity) * _RECORD.size,
+                          self.clock() if t is None else t, kind, key_id, min(detail, 0xFFFF))
+        self._written = index + 1
+
+    def _intern(self, key: str) -> int:
+        with self._keys_lock:
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                key_id = len(self._keys) if len(self._keys) < _MAX_KEYS else _MAX_KEYS
+                if key_id < _MAX_KEYS:
+                    self._keys.append(key)
+                self._key_ids[key] = key_id
+            return key_id
+
+    def __len__(self) -> int:
+        return min(self._written, self.capacity)
+
+    def _records(self) -> bytes:
+        written = self._written
+        buffer = bytes(self._buffer)
+        if written <= self.capacity:
+            return buffer[: written * _RECORD.size]
+        split = (written % self.capacity) * _RECORD.size
+        return buffer[split:] + buffer[:split]
+
+    def snapshot(self) -> Trace:
+        """The buffered events, oldest first."""
+        return _decode(self._records(), list(self._keys), time.time(), self.clock())
+
+    def dump(self, path: str) -> int:
+        """Write the buffer to `path`. Returns the number of events written."""
+        records = self._records()
+        keys = json.dumps(self._keys).encode("utf-8")
+        count = len(records) // _RECORD.size
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as fh:
+            fh.write(MAGIC)
+            fh.write(_HEADER.pack(VERSION, _RECORD.size, count, time.time(), self.clock(), len(keys)))
+            fh.write(keys)
+            fh.write(records)
+        logger.info(f"Hotkey trace written: {path} ({count} events)")
+        return count
+
+
+def load(path: str) -> Trace:
+    """Read a file written by TraceRecorder.dump()."""
+    with open(path, "rb") as fh:
+        data = fh.read()
+    if data[: len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a hotkey trace")
+    offset = len(MAGIC)
+    version, record_size, count, wall_time, monotonic_time, keys_size = _HEADER.unpack_from(data, offset)
+    if version != VERSION or record_size != _RECORD.size:
+        raise ValueError(f"Unsupported trace version {version} (record size {record_size})")
+    offset += _HEADER.size
+    keys = json.loads(data[offset: offset + keys_size].decode("utf-8"))
+    offset += keys_size
+    return _decode(data[offset: offset + count * record_size], keys, wall_time, monotonic_time)
+
+
+def _decode(records: bytes, keys: List[str], wall_time: float, monotonic_time: float) -> Trace:
+    events = []
+    for t, kind, key_id, detail in _RECORD.iter_unpack(records):
+        key = keys[key_id] if key_id < len(keys) else "?"
+        events.append(TraceEvent(t, kind, key, detail))
+    # Threads may have recorded slightly out of order.
+    events.sort(key=lambda event: event.t)
+    return Trace(events, wall_time, monotonic_time)
+
+
+def default_dump_path(log_dir: Optional[str] = None, reason: str = "manual") -> str:
+    from modules import log_setup
+
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    return os.path.join(log_dir or log_setup.default_log_dir(), f"hotkeys-{stamp}-{reason}.trace")
+
+
+def dump_on_crash(recorder: TraceRecorder, log_dir: Optional[str] = None) -> None:
+    """Dump the trace when an exception goes uncaught, in any thread."""
+    previous_hook = sys.excepthook
+    previous_thread_hook = threading.excepthook
+
+    def dump() -> None:
+        try:
+            recorder.dump(default_dump_path(log_dir, "crash"))
+        except Exception as e:
+            logger.error(f"Cannot write the hotkey trace: {e}")
+
+    def excepthook(exc_type, exc, tb) -> None:
+        dump()
+        previous_hook(exc_type, exc, tb)
+
+    def thread_excepthook(args) -> None:
+        if args.exc_type is not SystemExit:
+            dump()
+        previous_thread_hook(args)
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_excepthook
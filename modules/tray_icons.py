@@ -0,0 +1,115 @@
+"""Pre-rendered tray icons, one per app state.
+
+The base image (TrayIcon.png) is decoded once. For every state a small
+badge is painted over it at every tray size and device-pixel ratio in use,
+and the pixmaps are collected into one QIcon per state. Showing a new state
+is then only QSystemTrayIcon.setIcon() with a cached QIcon: no decoding,
+scaling or painting when the mic key is pressed.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from PyQt6.QtCore import QPointF, QRectF, Qt
+from PyQt6.QtGui import QColor, QGuiApplication, QIcon, QImage, QPainter, QPen, QPixmap
+
+STATE_IDLE = "idle"          # mic state unknown
+STATE_UNMUTED = "unmuted"
+STATE_MUTED = "muted"
+STATE_BUSY = "busy"          # MegaOS switch running
+STATE_ERROR = "error"        # last action failed
+
+STATES = (STATE_IDLE, STATE_UNMUTED, STATE_MUTED, STATE_BUSY, STATE_ERROR)
+
+# Logical sizes Windows asks for in the notification area and menus.
+_LOGICAL_SIZES = (16, 20, 24, 32)
+# Always covered, on top of whatever the attached screens report.
+_COMMON_RATIOS = (1.0, 1.25, 1.5, 2.0)
+
+_BADGE_COLORS = {
+    STATE_UNMUTED: QColor(46, 160, 67),
+    STATE_MUTED: QColor(218, 54, 51),
+    STATE_BUSY: QColor(219, 145, 0),
+    STATE_ERROR: QColor(218, 54, 51),
+}
+
+
+def _device_pixel_ratios() -> List[float]:
+    ratios = set(_COMMON_RATIOS)
+    for screen in QGuiApplication.screens():
+        ratios.add(round(screen.devicePixelRatio(), 2))
+    return sorted(ratios)
+
+
+def _paint_badge(painter: QPainter, state: str, size: float) -> None:
+    """Badge in the bottom-right quarter of a `size` x `size` icon."""
+    diameter = size * 0.55
+    rect = QRectF(size - diameter, size - diameter, diameter, diameter)
+    painter.setPen(QPen(QColor(255, 255, 255), max(1.0, size / 16.0)))
+    painter.setBrush(_BADGE_COLORS[state])
+    painter.drawEllipse(rect)
+
+    mark = QPen(QColor(255, 255, 255), max(1.0, diameter / 7.0))
+    mark.setCapStyle(Qt.PenCapStyle.RoundCap)
+    painter.setPen(mark)
+    c = rect.center()
+    r = diameter * 0.24
+    if state == STATE_MUTED:
+        painter.drawLine(QPointF(c.x() - r, c.y() - r), QPointF(c.x() + r, c.y() + r))
+    elif state == STATE_UNMUTED:
+        painter.drawLine(QPointF(c.x() - r, c.y()), QPointF(c.x() - r * 0.2, c.y() + r * 0.8))
+        painter.drawLine(QPointF(c.x() - r * 0.2, c.y() + r * 0.8), QPointF(c.x() + r, c.y() - r * 0.7))
+    elif state == STATE_BUSY:
+        for dx in (-r, 0.0, r):
+            painter.drawPoint(QPointF(c.x() + dx, c.y()))
+    elif state == STATE_ERROR:
+        painter.drawLine(QPointF(c.x(), c.y() - r * 1.1), QPointF(c.x(), c.y() + r * 0.2))
+        painter.drawPoint(QPointF(c.x(), c.y() + r * 1.0))
+
+
+class TrayIconAtlas:
+    def __init__(self, base: QImage, fallback: Optional[QIcon] = None) -> None:
+        self.base = base
+        self.fallback = fallback
+        self._icons: Dict[str, QIcon] = {}
+
+    @classmethod
+    def from_file(cls, path: str, fallback: Optional[QIcon] = None) -> "TrayIconAtlas":
+        return cls(QImage(path), fallback)
+
+    def _base_pixmap(self, pixels: int) -> QPixmap:
+        if not self.base.isNull():
+            return QPixmap.fromImage(self.base.scaled(
+                pixels, pixels,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            ))
+        if self.fallback is not None:
+            return self.fallback.pixmap(pixels, pixels)
+        pixmap = QPixmap(pixels, pixels)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        return pixmap
+
+    def render(self, ratios: Optional[Iterable[float]] = None) -> None:
+        """Render every state at every size; call once after QApplication."""
+        ratios = list(ratios) if ratios is not None else _device_pixel_ratios()
+        pixel_sizes = sorted({int(round(size * ratio)) for size in _LOGICAL_SIZES for ratio in ratios})
+        # Scale the base image once per pixel size, then badge copies of it.
+        bases = {pixels: self._base_pixmap(pixels) for pixels in pixel_sizes}
+        for state in STATES:
+            icon = QIcon()
+            for pixels, base in bases.items():
+                if state == STATE_IDLE:
+                    icon.addPixmap(base)
+                    continue
+                pixmap = QPixmap(base)
+                painter = QPainter(pixmap)
+                painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+                _paint_badge(painter, state, float(pixels))
+                painter.end()
+                icon.addPixmap(pixmap)
+            self._icons[state] = icon
+
+    def icon(self, state: str) -> QIcon:
+        return self._icons.get(state) or self._icons[STATE_IDLE]
@@ -0,0 +1,229 @@
+"""Idle wakeup audit (`--audit-wakeups[=SECONDS]`).
+
+The app runs all day and spends nearly all of it waiting for a key press,
+so while idle it should not wake up at all: every thread should sit in a
+blocking wait (message loop, queue, socket accept) and no timer should
+fire. This module measures that.
+
+- Timers scheduled by the app's own code are wrapped with counted() (or
+  counted_scheduler()). Each fire adds one to its subsystem's counter,
+  whether an audit is running or not.
+- An audit samples every thread of the process at the start and the end
+  of a window: CPU time, and on Linux its context switches (each
+  voluntary one is a wakeup from a wait). Threads are named after the
+  Python thread when there is one (keyboard-hook, audio, ipc-server, ...);
+  other threads (Qt, COM) are named by the OS.
+
+The audit runs on its own thread, which only sleeps through the window
+and is left out of the per-thread list (the process totals include it).
+The report is written as JSON next to the app (`wakeup_audit.json`) and
+summarized in the log. benchmarks/idle_check.py uses it to check that an
+idle instance does not poll.
+
+Only uses the standard library, plus psutil where /proc is not available.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+ARG_NAME = "--audit-wakeups"
+DEFAULT_WINDOW_SECONDS = 60.0
+REPORT_NAME = "wakeup_audit.json"
+_AUDIT_THREAD_NAME = "wakeup-audit"
+
+_timer_fires: Dict[str, int] = {}
+
+
+def fired(subsystem: str) -> None:
+    """Count one timer fire (or periodic wakeup) of `subsystem`."""
+    _timer_fires[subsystem] = _timer_fires.get(subsystem, 0) + 1
+
+
+def counted(subsystem: str, callback: Callable[[], Any]) -> Callable[[], Any]:
+    """Wrap a timer callback so that each fire is counted for `subsystem`."""
+    def fire() -> Any:
+        fired(subsystem)
+        return callback()
+    return fire
+
+
+def counted_scheduler(subsystem: str, schedule: Callable[[float, Callable[[], None]], Any]
+                      ) -> Callable[[float, Callable[[], None]], Any]:
+    """A `schedule(delay, callback)` whose callbacks are counted()."""
+    return lambda delay, callback: schedule(delay, counted(subsystem, callback))
+
+
+def timer_fires() -> Dict[str, int]:
+    return dict(_timer_fires)
+
+
+def thread_samples() -> Dict[int, Dict[str, Any]]:
+    """Per OS thread: name, CPU seconds and (Linux only) context switches."""
+    names = {thread.native_id: thread.name for thread in threading.enumerate()}
+    samples: Dict[int, Dict[str, Any]] = {}
+    if os.path.isdir("/proc/self/task"):
+        ticks = os.sysconf("SC_CLK_TCK")
+        for entry in os.listdir("/proc/self/task"):
+            tid = int(entry)
+            try:
+                with open(f"/proc/self/task/{entry}/stat", "r") as fh:
+                    comm, _, rest = fh.read().rpartition(")")
+                fields = rest.split()
+                sample: Dict[str, Any] = {
+                    "name": names.get(tid) or comm.partition("(")[2],
+                    "python": tid in names,
+                    "cpu_seconds": (int(fields[11]) + int(fields[12])) / ticks,
+                    "wakeups": 0,
+                    "preempted": 0,
+                }
+                with open(f"/proc/self/task/{entry}/status", "r") as fh:
+                    for line in fh:
+                        if line.startswith("voluntary_ctxt_switches:"):
+                            sample["wakeups"] = int(line.split()[1])
+                        elif line.startswith("nonvoluntary_ctxt_switches:"):
+                            sample["preempted"] = int(line.split()[1])
+            except (OSError, ValueError, IndexError):
+                # The thread ended while we looked.
+                continue
+            samples[tid] = sample
+        return samples
+    import psutil
+
+    for thread in psutil.Process().threads():
+        samples[thread.id] = {
+            "name": names.get(thread.id, f"thread-{thread.id}"),
+            "python": thread.id in names,
+            "cpu_seconds": thread.user_time + thread.system_time,
+            # Windows has no per-thread context switch count here.
+            "wakeups": None,
+            "preempted": None,
+        }
+    return samples
+
+
+def process_sample(threads: Dict[int, Dict[str, Any]]) -> Dict[str, Any]:
+    """CPU seconds and context switches of the whole process."""
+    times = os.times()
+    sample: Dict[str, Any] = {"cpu_seconds": times.user + times.system, "context_switches": None}
+    if all(thread["wakeups"] is not None for thread in threads.values()):
+        # /proc/self/status only counts the main thread's switches.
+        sample["context_switches"] = sum(thread["wakeups"] + thread["preempted"] for thread in threads.values())
+        return sample
+    try:
+        import psutil
+
+        switches = psutil.Process().num_ctx_switches()
+        sample["context_switches"] = switches.voluntary + switches.involuntary
+    except Exception:
+        pass
+    return sample
+
+
+class WakeupAudit:
+    def __init__(self, window_seconds: float, report_path: Optional[str] = None,
+                 on_done: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 settle_seconds: float = 1.0) -> None:
+        self.window_seconds = window_seconds
+        self.report_path = report_path
+        self.on_done = on_done
+        # Lets the end of startup (and the log line below) finish first.
+        self.settle_seconds = settle_seconds
+        self.report: Optional[Dict[str, Any]] = None
+
+    def start(self) -> None:
+        logger.info(f"Wakeup audit: measuring for {self.window_seconds:g}s, leave the app idle.")
+        threading.Thread(target=self._run, name=_AUDIT_THREAD_NAME, daemon=True).start()
+
+    def _run(self) -> None:
+        time.sleep(self.settle_seconds)
+        threads_before = thread_samples()
+        process_before, fires_before = process_sample(threads_before), timer_fires()
+        started = time.monotonic()
+        time.sleep(self.window_seconds)
+        threads_after = thread_samples()
+        process_after, fires_after = process_sample(threads_after), timer_fires()
+        self.report = build_report(time.monotonic() - started, threads_before, threads_after,
+                                   process_before, process_after, fires_before, fires_after)
+        for line in format_lines(self.report):
+            logger.info(f"Wakeup audit: {line}")
+        if self.report_path:
+            try:
+                # Whole or not at all: benchmarks/idle_check.py waits for it.
+                temp_path = self.report_path + ".tmp"
+                with open(temp_path, "w", encoding="utf-8") as fh:
+                    json.dump(self.report, fh, indent=2)
+                os.replace(temp_path, self.report_path)
+            except OSError as e:
+                logger.error(f"Cannot write the wakeup audit: {e}")
+        if self.on_done is not None:
+            self.on_done(self.report)
+
+
+def build_report(seconds: float, threads_before: Dict[int, Dict[str, Any]],
+                 threads_after: Dict[int, Dict[str, Any]], process_before: Dict[str, Any],
+                 process_after: Dict[str, Any], fires_before: Dict[str, int],
+                 fires_after: Dict[str, int]) -> Dict[str, Any]:
+    threads: List[Dict[str, Any]] = []
+    for tid, after in threads_after.items():
+        if after["name"] == _AUDIT_THREAD_NAME:
+            continue
+        # Threads started during the window count from zero.
+        before = threads_before.get(tid, {"cpu_seconds": 0.0, "wakeups": 0, "preempted": 0})
+        threads.append({
+            "thread": after["name"],
+            "python": after["python"],
+            "cpu_ms": round((after["cpu_seconds"] - before["cpu_seconds"]) * 1000.0, 3),
+            "wakeups": _delta(after["wakeups"], before["wakeups"]),
+            "preempted": _delta(after["preempted"], before["preempted"]),
+        })
+    threads.sort(key=lambda item: (item["wakeups"] or 0, item["cpu_ms"]), reverse=True)
+    timers = {name: count - fires_before.get(name, 0) for name, count in fires_after.items()
+              if count - fires_before.get(name, 0)}
+    return {
+        "window_seconds": round(seconds, 3),
+        "process": {
+            "cpu_ms": round((process_after["cpu_seconds"] - process_before["cpu_seconds"]) * 1000.0, 3),
+            "context_switches": _delta(process_after["context_switches"], process_before["context_switches"]),
+        },
+        "timer_fires": timers,
+        "threads": threads,
+    }
+
+
+def _delta(after: Optional[int], before: Optional[int]) -> Optional[int]:
+    if after is None or before is None:
+        return None
+    return after - before
+
+
+def format_lines(report: Dict[str, Any]) -> List[str]:
+    process = report["process"]
+    lines = [f"{report['window_seconds']:g}s: process CPU {process['cpu_ms']:.1f} ms, "
+             f"context switches {process['context_switches']}, "
+             f"timer fires {sum(report['timer_fires'].values())}"]
+    for name, count in sorted(report["timer_fires"].items()):
+        lines.append(f"timer {name}: {count}")
+    for thread in report["threads"]:
+        if thread["wakeups"] or thread["cpu_ms"]:
+            lines.append(f"thread {thread['thread']}: wakeups {thread['wakeups']}, CPU {thread['cpu_ms']:.1f} ms")
+    return lines
+
+
+def start_from_argv(argv: List[str], default_dir: str) -> Optional[WakeupAudit]:
+    """Start an audit if `--audit-wakeups[=SECONDS]` is in argv. Call once
+    startup has finished, so the window only covers idle time."""
+    for arg in argv[1:]:
+        if arg == ARG_NAME or arg.startswith(ARG_NAME + "="):
+            value = arg.partition("=")[2]
+            audit = WakeupAudit(float(value) if value else DEFAULT_WINDOW_SECONDS,
+                                os.path.join(default_dir, REPORT_NAME))
+            audit.start()
+            return audit
+    return None
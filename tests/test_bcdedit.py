@@ -0,0 +1,53 @@
+"""bcdedit output parsing against the recorded samples in benchmarks/data."""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.fakes import BCDEDIT_LOCALES, FakeRunner, load_bcdedit_sample
+from modules import bcdedit
+from modules import switch_to_megaos
+
+MEGAOS_IDENTIFIER = "{8e4a2f3c-0000-11ee-9b1c-806e6f6e6963}"
+
+
+def _without_megaos(text: str) -> str:
+    """The sample with the MegaOS block removed."""
+    blocks = text.split("\n\n")
+    return "\n\n".join(block for block in blocks if "MegaOS" not in block)
+
+
+@pytest.mark.parametrize("locale", BCDEDIT_LOCALES)
+def test_finds_megaos_in_every_locale(locale):
+    entries = bcdedit.parse_firmware_entries(load_bcdedit_sample(locale))
+    entry = bcdedit.find_entry(entries, switch_to_megaos.MEGAOS_BOOT_DESCRIPTION)
+
+    assert entry is not None
+    assert entry.identifier == MEGAOS_IDENTIFIER
+    assert entry.path == "\\EFI\\MegaOS\\grubx64.efi"
+
+
+@pytest.mark.parametrize("locale", BCDEDIT_LOCALES)
+def test_identifier_label_is_localized_but_parsed(locale):
+    entries = bcdedit.parse_firmware_entries(load_bcdedit_sample(locale))
+
+    assert [entry.identifier for entry in entries][:2] == [bcdedit.FWBOOTMGR, "{bootmgr}"]
+    # displayorder continues over several indented lines.
+    assert entries[0].elements["displayorder"][1] == MEGAOS_IDENTIFIER
+
+
+@pytest.mark.parametrize("locale", BCDEDIT_LOCALES)
+def test_missing_entry(locale):
+    text = _without_megaos(load_bcdedit_sample(locale))
+    entries = bcdedit.parse_firmware_entries(text)
+
+    assert len(entries) == 4
+    assert bcdedit.find_entry(entries, switch_to_megaos.MEGAOS_BOOT_DESCRIPTION) is None
+
+
+def test_change_boot_order_reports_missing_entry():
+    switch_to_megaos.set_entry_cache(None)
+    runner = FakeRunner({("bcdedit", "/enum"): (0, _without_megaos(load_bcdedit_sample("en-US")))})
+
+    assert switch_to_megaos.change_boot_order(runner=runner) == switch_to_megaos.EXIT_TARGET_NOT_FOUND
+    assert [call[:2] for call in runner.calls] == [["bcdedit", "/enum"]]
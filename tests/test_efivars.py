@@ -0,0 +1,43 @@
+"""Native BootOrder changes on an efivarfs-style directory."""
+
+from __future__ import annotations
+
+import struct
+
+from benchmarks.fakes import bcdedit_runner, make_efivar_store
+from modules import efivars
+from modules import switch_to_megaos
+
+BOOT_ORDER = ("BootOrder", efivars.EFI_GLOBAL_VARIABLE_GUID)
+
+
+def test_move_to_first_keeps_attributes(tmp_path):
+    store = make_efivar_store(str(tmp_path), 4)
+    # No RUNTIME_ACCESS, unlike DEFAULT_ATTRIBUTES.
+    attributes = efivars.EFI_VARIABLE_NON_VOLATILE | efivars.EFI_VARIABLE_BOOTSERVICE_ACCESS
+    store.write(*BOOT_ORDER, struct.pack("<4H", 0, 1, 2, 3), attributes)
+
+    assert efivars.move_to_first(store, 3) == [3, 0, 1, 2]
+    assert store.read(*BOOT_ORDER) == (attributes, struct.pack("<4H", 3, 0, 1, 2))
+
+
+def test_native_switch(tmp_path):
+    switch_to_megaos.set_entry_cache(None)
+    store = make_efivar_store(str(tmp_path), 4)
+    runner = bcdedit_runner()
+
+    assert switch_to_megaos.change_boot_order(runner=runner, store=store) == switch_to_megaos.EXIT_SUCCESS
+    assert efivars.read_boot_order(store) == [3, 0, 1, 2]
+    assert runner.calls == []
+
+
+def test_falls_back_to_bcdedit_when_not_in_boot_order(tmp_path):
+    switch_to_megaos.set_entry_cache(None)
+    store = make_efivar_store(str(tmp_path), 4)
+    # Boot0003 (MegaOS) exists but is not listed in BootOrder.
+    efivars.write_boot_order(store, [0, 1, 2])
+    runner = bcdedit_runner()
+
+    assert switch_to_megaos.change_boot_order(runner=runner, store=store) == switch_to_megaos.EXIT_SUCCESS
+    assert [call[:2] for call in runner.calls] == [["bcdedit", "/enum"], ["bcdedit", "/set"]]
+    assert efivars.read_boot_order(store) == [0, 1, 2]
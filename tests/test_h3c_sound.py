@@ -0,0 +1,168 @@
+"""H3CSound sessions on a fake process tree."""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, List
+
+import pytest
+
+from benchmarks.fakes import FakeProcessTree, FakeWindowWatcher
+from modules import h3c_sound
+from modules.process_index import ProcessIndex
+
+
+class ManualTimer:
+    """threading.Timer stand-in that only fires when told to."""
+
+    def __init__(self, interval: float, callback: Callable[[], None]) -> None:
+        self.interval = interval
+        self.callback = callback
+        self.daemon = False
+        self.started = False
+        self.cancelled = False
+
+    def start(self) -> None:
+        self.started = True
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+    @property
+    def armed(self) -> bool:
+        return self.started and not self.cancelled
+
+
+def _until(condition: Callable[[], bool], timeout: float = 2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+@pytest.fixture
+def tree():
+    tree = FakeProcessTree()
+    yield tree
+    # Let the session's wait() threads go.
+    for pid in tree.pids():
+        tree.exit(pid)
+
+
+@pytest.fixture
+def watcher():
+    return FakeWindowWatcher()
+
+
+@pytest.fixture
+def timers():
+    return []
+
+
+@pytest.fixture
+def manager(tree, watcher, timers):
+    def timer_factory(interval, callback):
+        timers.append(ManualTimer(interval, callback))
+        return timers[-1]
+
+    return h3c_sound.H3CSoundManager(tree, lambda: watcher, idle_timeout=60.0,
+                                     process_index=ProcessIndex(tree), timer_factory=timer_factory)
+
+
+def _armed(timers: List[ManualTimer]) -> List[ManualTimer]:
+    return [timer for timer in timers if timer.armed]
+
+
+def test_idle_timeout_counts_from_window_close_and_kills_the_tree(tree, watcher, timers, manager):
+    session = manager.start()
+    launcher = session.running()[0]
+    app = tree.add(h3c_sound.H3C_SOUND_PROCESS_NAME, ppid=launcher.pid)
+    helper = tree.add("helper.exe", ppid=app.pid)
+    # Counts from launch until a window shows up.
+    assert len(_armed(timers)) == 1
+
+    assert watcher.show(app.pid)
+    assert _armed(timers) == []
+    watcher.hide()
+    (timer,) = _armed(timers)
+    assert timer.interval == 60.0
+
+    timer.callback()
+    assert sorted(tree.killed) == sorted([launcher.pid, app.pid, helper.pid])
+    assert session.ended
+    assert manager.session is None
+    assert watcher.stopped
+
+
+def test_descendants_are_tracked_after_the_launcher_exits(tree, manager):
+    session = manager.start()
+    launcher = session.running()[0]
+    app = tree.add(h3c_sound.H3C_SOUND_PROCESS_NAME, ppid=launcher.pid)
+    tree.exit(launcher.pid)
+    assert _until(lambda: [proc.pid for proc in session.running()] == [app.pid])
+
+    helper = tree.add("helper.exe", ppid=app.pid)
+    grandchild = tree.add("grandchild.exe", ppid=helper.pid)
+    manager.stop()
+    assert sorted(tree.killed) == sorted([app.pid, helper.pid, grandchild.pid])
+    assert tree.pids() == []
+
+
+def test_session_ends_when_every_process_exited(tree, timers, manager):
+    session = manager.start()
+    launcher = session.running()[0]
+    app = tree.add(h3c_sound.H3C_SOUND_PROCESS_NAME, ppid=launcher.pid)
+    tree.exit(launcher.pid)
+    assert _until(lambda: [proc.pid for proc in session.running()] == [app.pid])
+
+    tree.exit(app.pid)
+    assert _until(lambda: session.ended)
+    assert manager.session is None
+    assert _armed(timers) == []
+    assert tree.killed == []
+
+
+def test_reused_parent_pid_is_not_ours(tree, watcher, manager):
+    session = manager.start()
+    launcher = session.running()[0]
+    # Its parent PID is the launcher's, but it is older than the launcher:
+    # its real parent had that PID before.
+    stranger = tree.add("stranger.exe", ppid=launcher.pid, create_time=launcher.create_time - 10.0)
+    ours = tree.add(h3c_sound.H3C_SOUND_PROCESS_NAME, ppid=launcher.pid)
+
+    assert not watcher.show(stranger.pid)
+    assert watcher.show(ours.pid)
+
+    manager.stop()
+    assert stranger.pid not in tree.killed
+    assert sorted(tree.killed) == sorted([launcher.pid, ours.pid])
+
+
+def test_start_kills_a_settings_app_it_did_not_start(tree, manager):
+    stray = tree.add(h3c_sound.H3C_SOUND_PROCESS_NAME)
+    other = tree.add("explorer.exe")
+
+    session = manager.start()
+    assert tree.killed == [stray.pid]
+    assert other.pid in tree.pids()
+    assert not session.ended
+
+
+def test_start_and_stop_run_off_the_calling_thread(tree, manager, monkeypatch, tmp_path):
+    launcher_path = tmp_path / "H3CLauncher.exe"
+    launcher_path.write_bytes(b"")
+    monkeypatch.setattr(h3c_sound, "H3C_SOUND_PATH", str(launcher_path))
+    monkeypatch.setattr(h3c_sound, "_manager", manager)
+    threads = []
+    spawn = tree.spawn
+    monkeypatch.setattr(tree, "spawn", lambda args: threads.append(threading.current_thread().name) or spawn(args))
+
+    h3c_sound.start_h3c_sound().result(2.0)
+    launcher = manager.session.running()[0]
+    h3c_sound.stop_h3c_sound().result(2.0)
+
+    assert threads and threads[0].startswith("h3c-sound")
+    assert tree.killed == [launcher.pid]
@@ -0,0 +1,64 @@
+"""The idle check's verdict on wakeup audit reports of a fake idle window."""
+
+from __future__ import annotations
+
+from benchmarks.idle_check import problems
+from modules import wakeup_audit
+
+
+def _thread(name, cpu_seconds=0.0, wakeups=0, python=True):
+    return {"name": name, "python": python, "cpu_seconds": cpu_seconds, "wakeups": wakeups, "preempted": 0}
+
+
+def _report(after_threads, fires_before=None, fires_after=None):
+    before_threads = {
+        1: _thread("MainThread"),
+        2: _thread("audio", wakeups=10),
+        3: _thread("QtThread", python=False),
+        4: _thread(wakeup_audit._AUDIT_THREAD_NAME),
+    }
+    process = {"cpu_seconds": 1.0, "context_switches": 100}
+    return wakeup_audit.build_report(20.0, before_threads, after_threads, process, process,
+                                     fires_before or {"memory_budget": 1}, fires_after or {"memory_budget": 1})
+
+
+def _idle_threads():
+    return {
+        1: _thread("MainThread"),
+        2: _thread("audio", wakeups=10),
+        3: _thread("QtThread", python=False),
+        # Only the audit itself wakes up, and it is left out.
+        4: _thread(wakeup_audit._AUDIT_THREAD_NAME, cpu_seconds=0.01, wakeups=2),
+    }
+
+
+def test_idle_window_passes():
+    report = _report(_idle_threads())
+
+    assert report["timer_fires"] == {}
+    assert problems(report) == []
+    assert problems(report, strict=True) == []
+
+
+def test_timer_fire_fails():
+    report = _report(_idle_threads(), fires_after={"memory_budget": 1, "metrics": 1})
+
+    assert problems(report) == ["timer metrics fired 1 times"]
+
+
+def test_python_thread_wakeup_fails():
+    threads = _idle_threads()
+    threads[2] = _thread("audio", wakeups=14)
+    threads[5] = _thread("ipc-server", wakeups=1)
+
+    assert sorted(problems(_report(threads))) == ["thread audio woke up 4 times",
+                                                  "thread ipc-server woke up 1 times"]
+
+
+def test_foreign_thread_wakeup_fails_only_when_strict():
+    threads = _idle_threads()
+    threads[3] = _thread("QtThread", wakeups=3, python=False)
+    report = _report(threads)
+
+    assert problems(report) == []
+    assert problems(report, strict=True) == ["thread QtThread woke up 3 times"]
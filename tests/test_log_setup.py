@@ -0,0 +1,50 @@
+"""Log file rotation by size and by age, with a fake clock."""
+
+from __future__ import annotations
+
+import os
+import types
+
+from modules import log_setup
+
+
+def _rotating_file(tmp_path, monkeypatch, **kwargs):
+    clock = types.SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(log_setup, "time", types.SimpleNamespace(time=lambda: clock.now))
+    options = dict(max_bytes=1 << 20, max_age_seconds=60, backup_count=3)
+    options.update(kwargs)
+    return log_setup._RotatingFile(str(tmp_path / "app.jsonl"), **options), clock
+
+
+def _files(tmp_path):
+    return sorted(os.listdir(tmp_path))
+
+
+def test_rotates_by_size(tmp_path, monkeypatch):
+    log_file, _ = _rotating_file(tmp_path, monkeypatch, max_bytes=10)
+    for _ in range(3):
+        log_file.write("0123456789\n")
+    log_file.close()
+
+    assert _files(tmp_path) == ["app.1.jsonl", "app.2.jsonl", "app.jsonl"]
+
+
+def test_rotates_once_per_age_window(tmp_path, monkeypatch):
+    log_file, clock = _rotating_file(tmp_path, monkeypatch)
+    log_file.write("first\n")
+    clock.now += 61
+    log_file.write("second\n")
+    # The new file's age starts at the rotation, whatever the file system
+    # reports as its creation time.
+    for _ in range(5):
+        clock.now += 1
+        log_file.write("more\n")
+    log_file.close()
+
+    assert _files(tmp_path) == ["app.1.jsonl", "app.jsonl"]
+    assert (tmp_path / "app.1.jsonl").read_text(encoding="utf-8") == "first\n"
+
+    clock.now += 60
+    log_file.write("third\n")
+    log_file.close()
+    assert _files(tmp_path) == ["app.1.jsonl", "app.2.jsonl", "app.jsonl"]
@@ -0,0 +1,192 @@
+"""Microphone control and mute-all mode against fake capture devices."""
+
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from benchmarks.fakes import FakeEndpoint, FakeMicrophoneBackend
+from modules import microphone_control
+from modules.audio_worker import OP_TOGGLE, AudioWorker
+
+
+class FailingEndpoint(FakeEndpoint):
+    """SetMute() raises the first `failures` times, like a device that went
+    away and came back under the same ID."""
+
+    def __init__(self, failures: int) -> None:
+        super().__init__()
+        self.failures = failures
+        self.calls = 0
+
+    def SetMute(self, mute: int, context) -> None:
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise OSError("device not available")
+        super().SetMute(mute, context)
+
+
+@pytest.fixture
+def backend():
+    previous = microphone_control._backend
+    backend = FakeMicrophoneBackend(extra_devices=3)
+    microphone_control.set_backend(backend)
+    microphone_control.set_mute_all(True)
+    yield backend
+    microphone_control.set_mute_all(False)
+    microphone_control.set_backend(previous)
+
+
+@pytest.fixture
+def default_backend(monkeypatch):
+    """Only the default device, with no endpoint listeners installed."""
+    previous = microphone_control._backend
+    monkeypatch.setattr(microphone_control, "_endpoint_listeners", [])
+    backend = FakeMicrophoneBackend()
+    microphone_control.set_backend(backend)
+    yield backend
+    microphone_control.set_backend(previous)
+
+
+def _muted(backend):
+    return {device_id: endpoint.muted for device_id, endpoint in backend.devices.items()}
+
+
+def test_every_device_is_muted_and_unmuted(backend):
+    assert microphone_control.disable_microphone()
+    assert set(_muted(backend).values()) == {1}
+    assert microphone_control.is_microphone_mute()
+
+    assert microphone_control.enable_microphone()
+    assert set(_muted(backend).values()) == {0}
+    assert not microphone_control.is_microphone_mute()
+    # One enumeration for all of it.
+    assert backend.opened == len(backend.devices)
+
+
+def test_mixed_state_is_not_muted_and_a_toggle_mutes_all(backend):
+    backend.devices["{fake-capture-2}"].muted = 1
+    states = microphone_control.get_capture_mute_states()
+
+    assert microphone_control.aggregate_mute_state(states) is None
+    assert not microphone_control.is_microphone_mute()
+
+    worker = AudioWorker()
+    worker.start()
+    try:
+        result = worker.submit(OP_TOGGLE).result(2.0)
+    finally:
+        worker.stop()
+    assert result.ok and result.changed
+    assert result.muted is True
+    assert set(_muted(backend).values()) == {1}
+
+
+def test_aggregate_mute_state():
+    assert microphone_control.aggregate_mute_state({"a": True, "b": True}) is True
+    assert microphone_control.aggregate_mute_state({"a": False, "b": False}) is False
+    assert microphone_control.aggregate_mute_state({"a": True, "b": False}) is None
+    assert microphone_control.aggregate_mute_state({}) is None
+
+
+def test_failing_device_is_retried_after_reenumerating(backend):
+    flaky = FailingEndpoint(failures=1)
+    backend.devices["{fake-capture-2}"] = flaky
+    devices = len(backend.devices)
+
+    assert microphone_control.set_capture_mute(True) == devices
+    assert set(_muted(backend).values()) == {1}
+    assert flaky.calls == 2
+    # The failure dropped the cached set and enumerated it again.
+    assert backend.opened == 2 * devices
+
+
+def test_a_dead_device_does_not_stop_the_others(backend):
+    dead = FailingEndpoint(failures=10)
+    backend.devices["{fake-capture-2}"] = dead
+
+    assert microphone_control.set_capture_mute(True) == len(backend.devices) - 1
+    assert dead.calls == 2
+    assert [device_id for device_id, muted in _muted(backend).items() if not muted] == ["{fake-capture-2}"]
+    assert microphone_control.disable_microphone()
+
+
+def test_no_device_could_be_set(backend):
+    for device_id in list(backend.devices):
+        backend.devices[device_id] = FailingEndpoint(failures=10)
+
+    with pytest.raises(RuntimeError):
+        microphone_control.set_capture_mute(True)
+    assert not microphone_control.disable_microphone()
+
+
+def test_failed_mute_is_not_reported_as_success(backend):
+    for device_id in list(backend.devices):
+        backend.devices[device_id] = FailingEndpoint(failures=10)
+
+    worker = AudioWorker()
+    worker.start()
+    try:
+        result = worker.submit(OP_TOGGLE).result(2.0)
+    finally:
+        worker.stop()
+    assert not result.ok
+    assert not result.changed
+    assert result.error
+
+
+def test_device_change_is_handled_on_the_audio_thread(default_backend):
+    threads = []
+    microphone_control.add_endpoint_listener(
+        lambda device_id, endpoint: threads.append(threading.current_thread().name))
+    release = threading.Event()
+
+    def busy():
+        # Like a slow SetMute(): the audio thread holds the lock.
+        with microphone_control._lock:
+            release.wait(2.0)
+
+    worker = AudioWorker()
+    worker.start()
+    try:
+        worker.call(microphone_control.get_mic_endpoint).result(2.0)
+        worker.post(busy)
+        notifier = threading.Thread(target=default_backend.on_default_change, name="com-notify")
+        notifier.start()
+        notifier.join(1.0)
+        # The notification only queued the invalidation.
+        assert not notifier.is_alive()
+        assert microphone_control.get_mic_device_id() is not None
+        release.set()
+        worker.call(lambda: None).result(2.0)
+        assert microphone_control.get_mic_device_id() is None
+    finally:
+        release.set()
+        worker.stop()
+    assert threads and set(threads) == {"audio"}
+
+
+def test_second_lookup_reuses_the_endpoint(default_backend):
+    endpoint = microphone_control.get_mic_endpoint()
+
+    assert microphone_control.get_mic_endpoint() is endpoint
+    assert microphone_control.disable_microphone()
+    assert microphone_control.is_microphone_mute()
+    assert default_backend.opened == 1
+
+
+def test_default_device_change_forces_a_fresh_lookup(default_backend):
+    microphone_control.get_mic_endpoint()
+    new = FakeEndpoint()
+    default_backend.device_id = "{fake-capture-new}"
+    default_backend.devices[default_backend.device_id] = new
+
+    default_backend.on_default_change()
+
+    assert microphone_control.get_mic_device_id() is None
+    assert microphone_control.disable_microphone()
+    assert new.muted == 1
+    assert default_backend.endpoint.muted == 0
+    assert default_backend.opened == 2
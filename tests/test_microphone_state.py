@@ -0,0 +1,67 @@
+"""MicrophoneState driven by fake volume and default-device notifications."""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.fakes import FakeEndpoint, FakeMicrophoneBackend
+from modules import microphone_control
+from modules.microphone_state import MicrophoneState
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    previous = microphone_control._backend
+    monkeypatch.setattr(microphone_control, "_endpoint_listeners", [])
+    backend = FakeMicrophoneBackend()
+    microphone_control.set_backend(backend)
+    yield backend
+    microphone_control.set_backend(previous)
+
+
+@pytest.fixture
+def state(backend):
+    state = MicrophoneState()
+    # Reopen inline instead of on a new thread.
+    state.set_reopen_runner(lambda reopen: reopen())
+    published = []
+    state.subscribe(published.append)
+    state.start()
+    state.published = published
+    return state
+
+
+def test_reads_the_state_once_on_start(backend, state):
+    assert state.muted is False
+    assert state.published == [False]
+    assert backend.opened == 1
+
+
+def test_follows_changes_made_by_other_applications(backend, state):
+    backend.endpoint.SetMute(1, None)
+    backend.endpoint.SetMute(0, None)
+    backend.endpoint.SetMute(0, None)
+
+    assert state.published == [False, True, False]
+    # Only notifications, no endpoint reads.
+    assert backend.opened == 1
+
+
+def test_follows_the_new_default_device(backend, state):
+    old = backend.endpoint
+    backend.endpoint = FakeEndpoint()
+    backend.endpoint.muted = 1
+    backend.device_id = "{fake-capture-new}"
+    backend.devices[backend.device_id] = backend.endpoint
+
+    backend.on_default_change()
+
+    assert state.published == [False, None, True]
+    assert state.muted is True
+    assert microphone_control.get_mic_device_id() == "{fake-capture-new}"
+    # The old device is no longer followed.
+    old.SetMute(0, None)
+    old.SetMute(1, None)
+    assert state.published == [False, None, True]
+    backend.endpoint.SetMute(0, None)
+    assert state.muted is False
@@ -0,0 +1,91 @@
+"""NotificationManager with a fake tray and a fake clock."""
+
+from __future__ import annotations
+
+import pytest
+
+from benchmarks.fakes import FakeTimers, FakeTray
+from modules.notifications import NotificationManager
+
+
+@pytest.fixture
+def timers():
+    return FakeTimers()
+
+
+@pytest.fixture
+def tray():
+    return FakeTray()
+
+
+@pytest.fixture
+def manager(tray, timers):
+    return NotificationManager(tray.show, timers.schedule, min_interval=2.0, max_age=5.0,
+                               clock=timers.clock)
+
+
+def _mic(manager, state):
+    return manager.notify("mic", "Microphone", state, duration_ms=1000)
+
+
+def test_burst_is_coalesced_to_the_latest(manager, tray, timers):
+    assert _mic(manager, "muted")
+    for state in ("unmuted", "muted", "unmuted"):
+        timers.advance(0.1)
+        assert not _mic(manager, state)
+
+    assert tray.shown == [("Microphone", "muted")]
+    assert manager.stats["coalesced"] == 2
+    assert timers.pending() == 1
+
+    timers.advance(2.0)
+    assert tray.shown == [("Microphone", "muted"), ("Microphone", "unmuted")]
+
+
+def test_rate_limit_holds(tray, timers):
+    shown_at = []
+
+    def show(*args):
+        shown_at.append(timers.now)
+        tray.show(*args)
+
+    manager = NotificationManager(show, timers.schedule, min_interval=2.0, max_age=5.0,
+                                  clock=timers.clock)
+    for press in range(60):
+        manager.notify("mic", "Microphone", f"press {press}", duration_ms=1000)
+        timers.advance(0.25)
+
+    gaps = [later - earlier for earlier, later in zip(shown_at, shown_at[1:])]
+    assert len(shown_at) == 8
+    assert min(gaps) >= 2.0
+    # Each one is the latest press at the time it was shown.
+    assert tray.shown[-1] == ("Microphone", "press 55")
+    timers.advance(1.0)
+    assert tray.shown[-1] == ("Microphone", "press 59")
+
+
+def test_delivered_once_the_window_ends(manager, tray, timers):
+    _mic(manager, "muted")
+    timers.advance(0.5)
+    _mic(manager, "unmuted")
+
+    timers.advance(1.4)
+    assert tray.shown == [("Microphone", "muted")]
+    timers.advance(0.1)
+    assert tray.shown == [("Microphone", "muted"), ("Microphone", "unmuted")]
+
+
+def test_toggling_back_shows_nothing_new(manager, tray, timers):
+    _mic(manager, "muted")
+    _mic(manager, "unmuted")
+    _mic(manager, "muted")
+    timers.advance(5.0)
+
+    assert tray.shown == [("Microphone", "muted")]
+    assert manager.stats["duplicate"] == 1
+
+
+def test_categories_are_limited_separately(manager, tray, timers):
+    _mic(manager, "muted")
+    assert manager.notify("megaos", "MegaOS", "switching")
+    assert len(tray.shown) == 2
@@ -0,0 +1,53 @@
+"""ProcessIndex against a fake process table."""
+
+from __future__ import annotations
+
+from benchmarks.fakes import FakeProcessTable
+from modules.process_index import ProcessIndex
+
+TARGET = "SystemControl.exe"
+
+
+def _index(count: int = 50):
+    table = FakeProcessTable(count, extra_names=(TARGET,))
+    return ProcessIndex(table), table
+
+
+def _pid_of(table, name):
+    return next(pid for pid, pid_name in table.names.items() if pid_name == name)
+
+
+def test_hit():
+    index, table = _index()
+    pid = _pid_of(table, TARGET)
+
+    assert index.pids_of(TARGET) == [pid]
+    assert index.is_running(TARGET)
+
+
+def test_miss_resolves_only_new_pids():
+    index, table = _index()
+    assert not index.is_running("H3CSound.exe")
+    table.name_calls = 0
+
+    table.churn(5)
+    assert not index.is_running("H3CSound.exe")
+    assert table.name_calls == 5
+
+
+def test_reused_pid_is_resolved_again():
+    index, table = _index()
+    pid = _pid_of(table, TARGET)
+    assert index.is_running(TARGET)
+
+    # The process ends and its PID is taken before the next refresh.
+    table.names[pid] = "notepad.exe"
+    assert not index.is_running(TARGET)
+    assert index.pids_of("notepad.exe", refresh=False) == [pid]
+
+    # And back again: the PID is indexed under its other name now, which
+    # hides the match until clear().
+    table.names[pid] = TARGET
+    assert not index.is_running(TARGET)
+    index.clear()
+    assert index.pids_of(TARGET) == [pid]